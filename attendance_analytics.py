@@ -0,0 +1,364 @@
+"""
+Attendance rates, streaks and trends computed in bulk with pandas.
+
+There is no enrolment table, so expected attendance is inferred the same way
+course rosters are: students are grouped into cohorts by (level, department),
+and a session counts as held for a cohort once any student of that cohort
+checked in to it. From that:
+
+- a student's rate is their Present check-ins over the sessions held for
+  their cohort, with the current run of attended/missed sessions as streaks;
+- a course's rate is the same ratio over its cohort (courses share a roster
+  when they share a level and department);
+- a session's rate is its Present check-ins over the size of the cohorts it
+  was held for;
+- trends compare the last `TREND_WEEKS` weeks with the `TREND_WEEKS` before.
+
+Everything is computed with a handful of merges and group-bys over columnar
+frames instead of a query per student. Results are cached per organisation
+and checked against the organisation's `org_stats` counters on every read.
+When only check-ins were added, just the rows past the last loaded id are
+fetched and appended to the cached frames, which saves the database reload;
+`compute` still runs over all of the organisation's check-ins, since one new
+check-in can mark a session as held for a whole cohort and so change every
+rate and streak in it. Anything else that changed (students, courses, edited
+statuses) reloads the organisation from scratch.
+
+Solo lecturers have no organisation and no student roll: their analytics
+cover their own sessions, cached per lecturer and checked against their
+check-in counts, with everyone who has checked in to one of their sessions
+as the one cohort expected at each of them.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, func, select
+
+AT_RISK_RATE = 0.75
+AT_RISK_MISSED_STREAK = 3
+AT_RISK_MIN_SESSIONS = 3
+TREND_WEEKS = 4
+WEEKLY_SERIES_WEEKS = 12
+
+STUDENT_COLUMNS = ['student_id', 'full_name', 'level', 'department', 'college', 'faculty']
+COURSE_COLUMNS = ['course_id', 'course_code', 'course_name', 'level', 'department']
+ATTENDANCE_COLUMNS = ['id', 'session_id', 'student_id', 'status', 'started_at', 'user_id']
+
+
+def _ratio(numerator, denominator):
+    return (numerator / denominator.where(denominator > 0)).astype(float)
+
+
+def _week(series):
+    return (series - pd.to_timedelta(series.dt.weekday, unit='D')).dt.normalize()
+
+
+def _cohort_key(frame):
+    return frame['level'].fillna('').astype(str) + '\x1f' + frame['department'].fillna('').astype(str)
+
+
+def _attendees(attendance):
+    """A roster of everyone in `attendance`, all in one cohort, for lecturers without a student roll."""
+    students = pd.DataFrame({'student_id': attendance['student_id'].drop_duplicates()})
+    for column in STUDENT_COLUMNS[1:]:
+        students[column] = None
+    return students
+
+
+class AnalyticsResult:
+    """Computed frames of one organisation; see `compute`."""
+
+    def __init__(self, students, courses, sessions, groups, lecturers, weekly, generated_at):
+        self.students = students
+        self.courses = courses
+        self.sessions = sessions
+        self.groups = groups
+        self.lecturers = lecturers
+        self.weekly = weekly
+        self.generated_at = generated_at
+
+
+def compute(students, courses, attendance, lecturers=None, now=None):
+    """
+    Computes per-student, per-course, per-session, per-group and weekly rates.
+
+    Args:
+        students (DataFrame): STUDENT_COLUMNS of the organisation's students.
+        courses (DataFrame): COURSE_COLUMNS of its courses.
+        attendance (DataFrame): ATTENDANCE_COLUMNS of every check-in to its sessions,
+            with `started_at` the session's creation time and `user_id` its lecturer.
+        lecturers (DataFrame): Optional `user_id`, `name` of its lecturers.
+
+    Returns:
+        AnalyticsResult
+    """
+    now = now or datetime.utcnow()
+    recent_from = now - timedelta(weeks=TREND_WEEKS)
+    prior_from = now - timedelta(weeks=2 * TREND_WEEKS)
+
+    students = students.drop_duplicates('student_id').reset_index(drop=True)
+    students['cohort'] = pd.factorize(_cohort_key(students))[0]
+    cohort_size = students.groupby('cohort').size()
+
+    # Check-ins of known students only; ids typed in for unknown students have no cohort
+    att = attendance.merge(students[['student_id', 'cohort']], on='student_id', how='inner')
+    att['present'] = (att['status'] == 'Present').astype(np.int64)
+
+    held = att.drop_duplicates(['session_id', 'cohort'])[['session_id', 'cohort', 'started_at', 'user_id']]
+
+    # One row per (student, session held for their cohort), flagged when they were present
+    grid = students[['student_id', 'cohort']].merge(held, on='cohort')
+    present_pairs = att.loc[att['present'] == 1, ['student_id', 'session_id']].drop_duplicates()
+    present_pairs['attended'] = 1
+    grid = grid.merge(present_pairs, on=['student_id', 'session_id'], how='left')
+    grid['attended'] = grid['attended'].fillna(0).astype(np.int64)
+    grid['recent'] = grid['started_at'] >= recent_from
+    grid['prior'] = (grid['started_at'] >= prior_from) & ~grid['recent']
+
+    def rates(keys):
+        grouped = grid.groupby(keys)
+        frame = pd.DataFrame({
+            'expected': grouped.size(),
+            'present': grouped['attended'].sum(),
+            'recent_expected': grouped['recent'].sum(),
+            'recent_present': grid['attended'].where(grid['recent'], 0).groupby([grid[k] for k in keys]).sum(),
+            'prior_expected': grouped['prior'].sum(),
+            'prior_present': grid['attended'].where(grid['prior'], 0).groupby([grid[k] for k in keys]).sum(),
+        })
+        frame['rate'] = _ratio(frame['present'], frame['expected'])
+        frame['trend'] = (_ratio(frame['recent_present'], frame['recent_expected'])
+                          - _ratio(frame['prior_present'], frame['prior_expected']))
+        return frame[['expected', 'present', 'rate', 'trend']]
+
+    # ---------- Students ----------
+    per_student = rates(['student_id'])
+
+    def after_last(attended):
+        # Whether each grid row is later than the student's last session with that outcome.
+        # reindex rather than map: map() can't take an empty datetime Series (nobody missed yet)
+        last = grid.loc[grid['attended'] == attended].groupby('student_id')['started_at'].max()
+        last = last.reindex(grid['student_id']).fillna(pd.Timestamp.min).to_numpy()
+        return pd.Series(grid['started_at'].to_numpy() > last, index=grid.index)
+
+    after_present = after_last(1)
+    after_missed = after_last(0)
+    per_student['missed_streak'] = after_present.groupby(grid['student_id']).sum()
+    per_student['present_streak'] = after_missed.groupby(grid['student_id']).sum()
+    student_frame = students.merge(per_student, left_on='student_id', right_index=True, how='left')
+    for column in ('expected', 'present', 'missed_streak', 'present_streak'):
+        student_frame[column] = student_frame[column].fillna(0).astype(np.int64)
+    student_frame['at_risk'] = (student_frame['expected'] >= AT_RISK_MIN_SESSIONS) & (
+        (student_frame['rate'] < AT_RISK_RATE) | (student_frame['missed_streak'] >= AT_RISK_MISSED_STREAK)
+    )
+
+    # ---------- Courses (through their cohort) ----------
+    cohort_ids = dict(zip(_cohort_key(students), students['cohort']))
+    course_frame = courses.copy()
+    course_frame['cohort'] = _cohort_key(course_frame).map(cohort_ids)
+    per_cohort = rates(['cohort'])
+    course_frame = course_frame.merge(per_cohort, left_on='cohort', right_index=True, how='left')
+    course_frame['students'] = course_frame['cohort'].map(cohort_size).fillna(0).astype(np.int64)
+    course_frame['expected'] = course_frame['expected'].fillna(0).astype(np.int64)
+
+    # ---------- Sessions ----------
+    expected_per_session = held.assign(size=held['cohort'].map(cohort_size)).groupby('session_id')['size'].sum()
+    session_frame = att.groupby('session_id').agg(
+        started_at=('started_at', 'first'), user_id=('user_id', 'first'), present=('present', 'sum'))
+    session_frame['expected'] = expected_per_session
+    session_frame['rate'] = _ratio(session_frame['present'], session_frame['expected'])
+    session_frame = session_frame.reset_index().sort_values('started_at', ascending=False)
+
+    # ---------- Colleges, faculties and departments ----------
+    grid = grid.merge(students[['student_id', 'college', 'faculty', 'department']], on='student_id')
+    groups = {}
+    for column in ('college', 'faculty', 'department'):
+        grid[column] = grid[column].fillna('Unassigned')
+        groups[column] = rates([column]).reset_index().rename(columns={column: 'name'})
+
+    # ---------- Lecturers ----------
+    lecturer_frame = session_frame.groupby('user_id').agg(
+        sessions=('session_id', 'size'), present=('present', 'sum'), expected=('expected', 'sum'))
+    lecturer_frame['rate'] = _ratio(lecturer_frame['present'], lecturer_frame['expected'])
+    lecturer_frame = lecturer_frame.reset_index()
+    if lecturers is not None:
+        lecturer_frame = lecturer_frame.merge(lecturers, on='user_id', how='left')
+
+    return AnalyticsResult(
+        students=student_frame,
+        courses=course_frame,
+        sessions=session_frame,
+        groups=groups,
+        lecturers=lecturer_frame,
+        weekly=weekly_rates(session_frame, now),
+        generated_at=now,
+    )
+
+
+def weekly_rates(sessions, now=None, weeks=WEEKLY_SERIES_WEEKS):
+    """Present over expected per week for a (possibly filtered) session frame, oldest week first."""
+    now = now or datetime.utcnow()
+    current = _week(pd.Series([pd.Timestamp(now)]))[0]
+    index = pd.date_range(end=current, periods=weeks, freq='7D')
+    recent = sessions[sessions['started_at'] >= index[0]]
+    grouped = recent.groupby(_week(recent['started_at']))
+    frame = pd.DataFrame({'present': grouped['present'].sum(), 'expected': grouped['expected'].sum()})
+    frame = frame.reindex(index, fill_value=0)
+    frame['rate'] = _ratio(frame['present'], frame['expected'])
+    frame.index.name = 'week'
+    return frame.reset_index()
+
+
+def records(frame, columns, percent=('rate', 'trend')):
+    """JSON-ready rows of `frame`: rates as percentages, NaN as None, timestamps as ISO strings."""
+    out = frame[columns].copy()
+    for column in columns:
+        if column in percent:
+            out[column] = (out[column] * 100).round(1)
+        elif pd.api.types.is_datetime64_any_dtype(out[column]):
+            out[column] = out[column].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict('records')
+
+
+class AttendanceAnalytics:
+    """
+    Per-organisation (and per solo lecturer) cache of `compute` results.
+
+    `version_of(org_id)` returns the organisation's counters
+    (students, courses, lecturers, check-ins, present check-ins); a cached
+    entry is used as long as they haven't changed.
+    """
+
+    def __init__(self, db, Student, Course, User, SessionModel, Attendance, version_of, maxsize=32):
+        self.db = db
+        self.Student = Student
+        self.Course = Course
+        self.User = User
+        self.SessionModel = SessionModel
+        self.Attendance = Attendance
+        self.version_of = version_of
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._org_locks = {}
+        self.stats = {'hits': 0, 'appends': 0, 'reloads': 0}
+
+    def for_org(self, org_id):
+        """The AnalyticsResult of an organisation, recomputed only when its data changed."""
+        return self._get(org_id, tuple(self.version_of(org_id)))
+
+    def for_lecturer(self, user_id):
+        """The AnalyticsResult of a solo lecturer's own sessions, recomputed only when they changed."""
+        Attendance, SessionModel = self.Attendance, self.SessionModel
+        checkins, present = self.db.session.execute(
+            select(func.count(Attendance.id), func.coalesce(func.sum(case((Attendance.status == 'Present', 1),
+                                                                          else_=0)), 0))
+            .join(SessionModel, SessionModel.session_id == Attendance.session_id)
+            .where(SessionModel.user_id == user_id)
+        ).one()
+        return self._get(('lecturer', user_id), (None, None, None, checkins, present))
+
+    def _get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['version'] == version:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry['result']
+            org_lock = self._org_locks.setdefault(key, threading.Lock())
+
+        # One thread per organisation recomputes; the others wait and reuse its result.
+        with org_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry['version'] == version:
+                return entry['result']
+            entry = self._refresh(key, entry, version)
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return entry['result']
+
+    def invalidate(self, org_id=None):
+        with self._lock:
+            if org_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(org_id, None)
+
+    def _refresh(self, key, entry, version):
+        students_courses_lecturers, checkins, present = version[:3], version[3], version[4]
+        # Only the query is incremental here; the rates are recomputed over every check-in
+        if entry is not None and entry['version'][:3] == students_courses_lecturers:
+            new = self._load_attendance(key, after_id=entry['watermark'])
+            attendance = pd.concat([entry['attendance'], new], ignore_index=True) if len(new) else entry['attendance']
+            # Rows committed out of id order, or edited statuses, need a full reload
+            if len(attendance) == checkins and int((attendance['status'] == 'Present').sum()) == present:
+                self.stats['appends'] += 1
+                entry = dict(entry, attendance=attendance, version=version,
+                             watermark=int(attendance['id'].max()) if len(attendance) else 0)
+                if isinstance(key, tuple):
+                    entry['students'] = _attendees(attendance)
+                entry['result'] = compute(entry['students'], entry['courses'], attendance, entry['lecturers'])
+                return entry
+
+        self.stats['reloads'] += 1
+        attendance = self._load_attendance(key)
+        if isinstance(key, tuple):
+            students, courses, lecturers = _attendees(attendance), pd.DataFrame(columns=COURSE_COLUMNS), None
+        else:
+            students, courses, lecturers = self._load_roster(key)
+        return {
+            'version': version,
+            'students': students,
+            'courses': courses,
+            'lecturers': lecturers,
+            'attendance': attendance,
+            'watermark': int(attendance['id'].max()) if len(attendance) else 0,
+            'result': compute(students, courses, attendance, lecturers),
+        }
+
+    def _frame(self, stmt, columns):
+        return pd.DataFrame.from_records(self.db.session.execute(stmt).all(), columns=columns)
+
+    def _load_roster(self, org_id):
+        Student, Course, User = self.Student, self.Course, self.User
+        students = self._frame(
+            select(Student.student_id, Student.full_name, Student.level, Student.department,
+                   Student.college, Student.faculty).where(Student.organisation_id == org_id),
+            STUDENT_COLUMNS,
+        )
+        courses = self._frame(
+            select(Course.id, Course.course_code, Course.course_name, Course.level, Course.department)
+            .where(Course.org_id == org_id),
+            COURSE_COLUMNS,
+        )
+        lecturers = self._frame(
+            select(User.id, User.name, User.email).where(User.organisation_id == org_id),
+            ['user_id', 'name', 'email'],
+        )
+        lecturers['name'] = lecturers['name'].fillna(lecturers['email'])
+        return students, courses, lecturers[['user_id', 'name']]
+
+    def _load_attendance(self, key, after_id=0):
+        """Check-ins of an organisation's sessions, or of one lecturer's for a ('lecturer', user_id) key."""
+        Attendance, SessionModel, User = self.Attendance, self.SessionModel, self.User
+        stmt = (
+            select(Attendance.id, Attendance.session_id, Attendance.student_id, Attendance.status,
+                   SessionModel.created_at, SessionModel.user_id)
+            .join(SessionModel, SessionModel.session_id == Attendance.session_id)
+            .where(Attendance.id > after_id)
+            .order_by(Attendance.id)
+        )
+        if isinstance(key, tuple):
+            stmt = stmt.where(SessionModel.user_id == key[1])
+        else:
+            stmt = stmt.join(User, User.id == SessionModel.user_id).where(User.organisation_id == key)
+        frame = self._frame(stmt, ATTENDANCE_COLUMNS)
+        frame['started_at'] = pd.to_datetime(frame['started_at'])
+        return frame
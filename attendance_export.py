@@ -0,0 +1,159 @@
+"""
+Streaming attendance exports.
+
+Rows are read from the database in fixed-size batches (server-side cursor
+on PostgreSQL via `yield_per`) and encoded batch by batch as CSV, Parquet or
+an Arrow IPC stream, so memory use depends on the batch size and not on how
+many rows are exported.
+"""
+import csv
+import io
+import time
+
+# (column, arrow type name) in export order
+EXPORT_COLUMNS = [
+    ('session_id', 'string'),
+    ('student_id', 'string'),
+    ('student_name', 'string'),
+    ('timestamp', 'timestamp'),
+    ('status', 'string'),
+    ('latitude', 'float64'),
+    ('longitude', 'float64'),
+    ('flagged', 'bool'),
+]
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def iter_batches(db_session, stmt, batch_size=5000):
+    """Yields lists of result rows, at most `batch_size` at a time."""
+    result = db_session.execute(stmt.execution_options(yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def measured(batches, on_batch=None):
+    """
+    Passes batches through, calling `on_batch(rows, seconds)` with the running
+    totals after each one and once more at the end.
+    """
+    rows = 0
+    start = time.perf_counter()
+    for batch in batches:
+        yield batch
+        rows += len(batch)
+        if on_batch:
+            on_batch(rows, time.perf_counter() - start)
+
+
+class _ByteSink:
+    """Write-only file object that collects encoder output so it can be yielded."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+# Leading characters that make Excel / Sheets read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    # Names and ids are typed in by students; keep them as text when the file is opened
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for batch in batches:
+        for row in batch:
+            writer.writerow([_csv_cell(v) for v in row])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode('utf-8')
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    types = {'string': pa.string(), 'timestamp': pa.timestamp('us'), 'float64': pa.float64(), 'bool': pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+
+
+def _record_batch(schema, rows):
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+    )
+
+
+def stream_arrow(batches, file_format='parquet'):
+    """Yields a Parquet file (one row group per batch) or an Arrow IPC stream."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema()
+    sink = _ByteSink()
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for batch in batches:
+        if batch:
+            writer.write_batch(_record_batch(schema, batch))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(batches, file_format='csv'):
+    if file_format == 'csv':
+        return stream_csv(batches)
+    return stream_arrow(batches, file_format)
+
+
+def arrow_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,215 @@
+"""
+Append-only local journal of accepted check-ins.
+
+Every check-in the app accepts is also appended here, so attendance taken
+while the database is unreachable can be replayed into it later
+(`flask replay-journal`). Records are buffered in memory and written by a
+background thread in groups, with an fsync at most every `fsync_interval`
+seconds. Each worker process writes its own files, named with the day and
+its pid, so gunicorn workers never interleave writes. Files are rotated when
+they reach `max_bytes` or the UTC day changes.
+
+File format: JSON lines. The first line is a header naming the fields and
+every following line is one record as a JSON array in that field order.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+FIELDS = ['session_id', 'student_id', 'student_name', 'timestamp', 'status',
+          'device_key', 'latitude', 'longitude', 'flagged']
+FORMAT_VERSION = 1
+FILE_PATTERN = 'attendance-*.jsonl'
+
+
+def _encode(record):
+    values = []
+    for field in FIELDS:
+        value = record.get(field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        values.append(value)
+    return json.dumps(values, separators=(',', ':'), ensure_ascii=False) + '\n'
+
+
+class AttendanceJournal:
+    def __init__(self, folder='data/journal', max_bytes=64 * 1024 * 1024, flush_interval=0.2,
+                 fsync_interval=1.0, retention_days=14):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.retention_days = retention_days
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._file = None
+        self._day = None
+        self._size = 0
+        self._last_fsync = 0.0
+        self._dirty = False
+        self.stats = {'appended': 0, 'written': 0, 'fsyncs': 0, 'files': 0}
+
+    def append(self, record):
+        """Buffers one check-in; it reaches the disk with the next group write."""
+        self._ensure_started()
+        line = _encode(record)
+        with self._buffer_lock:
+            self._buffer.append(line)
+        self.stats['appended'] += 1
+
+    def flush(self, fsync=False):
+        """Writes buffered records to the current file, optionally forcing an fsync."""
+        with self._buffer_lock:
+            lines, self._buffer = self._buffer, []
+        with self._write_lock:
+            if lines:
+                data = ''.join(lines).encode('utf-8')
+                self._rotate_if_needed(len(data))
+                self._file.write(data)
+                self._file.flush()
+                self._size += len(data)
+                self._dirty = True
+                self.stats['written'] += len(lines)
+            if self._dirty and (fsync or time.monotonic() - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+                self._dirty = False
+                self.stats['fsyncs'] += 1
+
+    def close(self):
+        """Stops the writer thread, then writes and fsyncs whatever is left."""
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(5)
+        try:
+            self.flush(fsync=True)
+        finally:
+            with self._write_lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+
+    def _ensure_started(self):
+        # Same lazy, fork-aware start as the check-in queue: after a fork the child
+        # gets its own thread and its own file instead of the parent's handle.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._write_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._file = None
+                with self._buffer_lock:
+                    self._buffer = []
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='attendance-journal', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[JOURNAL] Write failed: {e}")
+
+    def _rotate_if_needed(self, incoming):
+        day = datetime.utcnow().strftime('%Y%m%d')
+        if self._file is not None and day == self._day and self._size + incoming <= self.max_bytes:
+            return
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._dirty = False
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, f"attendance-{day}-{os.getpid()}-{time.time_ns()}.jsonl")
+        self._file = open(path, 'ab')
+        header = json.dumps({'journal': 'attendance', 'v': FORMAT_VERSION, 'fields': FIELDS}) + '\n'
+        self._file.write(header.encode('utf-8'))
+        self._size = len(header)
+        self._day = day
+        self.stats['files'] += 1
+        self._remove_expired()
+
+    def _remove_expired(self):
+        cutoff = time.time() - self.retention_days * 86400
+        for path in glob.glob(os.path.join(self.folder, FILE_PATTERN)):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def read_journal(folder='data/journal', since=None):
+    """
+    Yields the records stored in every journal file in `folder` (all workers),
+    as dicts with a datetime `timestamp`. A torn last line left by a crash is skipped.
+    `since` (datetime) drops older records.
+    """
+    for path in sorted(glob.glob(os.path.join(folder, FILE_PATTERN))):
+        with open(path, encoding='utf-8') as f:
+            fields = None
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(data, dict):
+                    fields = data.get('fields', FIELDS)
+                    continue
+                record = dict(zip(fields or FIELDS, data))
+                try:
+                    record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if since is None or record['timestamp'] >= since:
+                    yield record
+
+
+def replay_journal(records, db_session, Attendance, insert_stmt, batch_size=500):
+    """
+    Inserts journal records missing from the attendance table. Rows already
+    stored (same session and student) are left alone, so replaying twice is safe.
+    Returns (read, inserted).
+    """
+    read = inserted = 0
+    batch = []
+
+    def write(batch):
+        keys = {(r['session_id'], r['student_id']) for r in batch}
+        existing = set(db_session.execute(
+            Attendance.__table__.select().with_only_columns(Attendance.session_id, Attendance.student_id)
+            .where(Attendance.session_id.in_({k[0] for k in keys}),
+                   Attendance.student_id.in_({k[1] for k in keys}))
+        ).all())
+        missing = {}
+        for r in batch:
+            key = (r['session_id'], r['student_id'])
+            if key not in existing and key not in missing:
+                missing[key] = r
+        if missing:
+            db_session.execute(insert_stmt, list(missing.values()))
+        db_session.commit()
+        return len(missing)
+
+    for record in records:
+        read += 1
+        batch.append(record)
+        if len(batch) >= batch_size:
+            inserted += write(batch)
+            batch = []
+    if batch:
+        inserted += write(batch)
+    return read, inserted
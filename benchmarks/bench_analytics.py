@@ -0,0 +1,90 @@
+"""
+Benchmark for attendance analytics.
+
+Times attendance_analytics.compute over a synthetic faculty against the
+naive approach of working out each student's rate and streak with a loop
+over their cohort's sessions.
+
+Run from the project root:
+    python benchmarks/bench_analytics.py [n_students] [sessions_per_cohort]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from attendance_analytics import ATTENDANCE_COLUMNS, COURSE_COLUMNS, STUDENT_COLUMNS, compute
+
+
+def synthetic(n_students, sessions_per_cohort, levels=4, departments=10):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    students = [(f"S{i:06d}", f"Student {i}", str(100 * (1 + i % levels)), f"Dept {i // levels % departments}",
+                 'Engineering', f"Faculty {i % 3}") for i in range(n_students)]
+    courses = [(c, f"C{c}", f"Course {c}", str(100 * (1 + c % levels)), f"Dept {c // levels % departments}")
+               for c in range(levels * departments)]
+    by_cohort = {}
+    for s in students:
+        by_cohort.setdefault((s[2], s[3]), []).append(s[0])
+    attendance, row_id = [], 0
+    for c, members in enumerate(by_cohort.values()):
+        for k in range(sessions_per_cohort):
+            session_id, started = f"sess-{c}-{k}", now - timedelta(hours=12 * k)
+            for student_id in members:
+                if rng.random() < 0.8:
+                    row_id += 1
+                    status = 'Present' if rng.random() < 0.9 else 'Out of range'
+                    attendance.append((row_id, session_id, student_id, status, started, 1 + c % 20))
+    return (pd.DataFrame(students, columns=STUDENT_COLUMNS), pd.DataFrame(courses, columns=COURSE_COLUMNS),
+            pd.DataFrame(attendance, columns=ATTENDANCE_COLUMNS))
+
+
+def naive(students, sample, attendance):
+    """Per-student Python loop over `sample`: rate and current missed streak."""
+    rows = list(attendance.itertuples(index=False))
+    cohort_of = {s.student_id: (s.level, s.department) for s in students.itertuples(index=False)}
+    out = {}
+    for s in sample.itertuples(index=False):
+        cohort = cohort_of[s.student_id]
+        held = sorted({(r.started_at, r.session_id) for r in rows if cohort_of.get(r.student_id) == cohort})
+        present = {r.session_id for r in rows if r.student_id == s.student_id and r.status == 'Present'}
+        streak = 0
+        for _, session_id in reversed(held):
+            if session_id in present:
+                break
+            streak += 1
+        out[s.student_id] = (len(present) / len(held) if held else None, streak)
+    return out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    students, courses, attendance = synthetic(n, sessions)
+
+    start = time.perf_counter()
+    result = compute(students, courses, attendance)
+    t_vectorised = time.perf_counter() - start
+
+    sample = students.head(max(1, n // 50))
+    start = time.perf_counter()
+    expected = naive(students, sample, attendance)
+    t_naive = (time.perf_counter() - start) * n / len(sample)
+
+    check = result.students.set_index('student_id').loc[list(expected)]
+    same = all(abs(check.at[sid, 'rate'] - rate) < 1e-9 and check.at[sid, 'missed_streak'] == streak
+               for sid, (rate, streak) in expected.items())
+
+    print(f"students              : {n}  ({len(attendance)} check-ins, {sessions} sessions per cohort)")
+    print(f"vectorised compute    : {t_vectorised:.2f}s")
+    print(f"naive per-student loop: {t_naive:.1f}s  (extrapolated from {len(sample)} students)")
+    print(f"speed-up              : {t_naive / t_vectorised:.0f}x, results match: {same}")
+
+
+if __name__ == '__main__':
+    main()
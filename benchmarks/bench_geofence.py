@@ -0,0 +1,79 @@
+"""
+Benchmark for the geofence fast path.
+
+Compares geofence.within_radius / batch_within_radius against the exact
+geopy geodesic used by attendance_utils.calculate_distance, and reports the
+speedup and the worst-case disagreement.
+
+Run from the project root:
+    python benchmarks/bench_geofence.py [n_points]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_utils import calculate_distance
+from geofence import within_radius, batch_within_radius, haversine_distance
+
+CENTRES = [(6.6745, -1.5716), (5.6037, -0.1870), (51.5074, -0.1278), (-33.9249, 18.4241), (64.1466, -21.9426)]
+RADIUS = 50
+
+
+def random_points(n, centre_lat, centre_lon, spread_m=150):
+    points = []
+    for _ in range(n):
+        d = random.uniform(0, spread_m)
+        bearing = random.uniform(0, 2 * math.pi)
+        dlat = d * math.cos(bearing) / 111320
+        dlon = d * math.sin(bearing) / (111320 * math.cos(math.radians(centre_lat)))
+        points.append((centre_lat + dlat, centre_lon + dlon))
+    return points
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    random.seed(42)
+
+    worst_abs, worst_rel, mismatches = 0.0, 0.0, 0
+    t_geodesic = t_fast = t_batch = 0.0
+
+    for centre_lat, centre_lon in CENTRES:
+        points = random_points(n, centre_lat, centre_lon)
+
+        start = time.perf_counter()
+        exact = [calculate_distance(lat, lon, centre_lat, centre_lon) for lat, lon in points]
+        t_geodesic += time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = [within_radius(lat, lon, centre_lat, centre_lon, RADIUS)[0] for lat, lon in points]
+        t_fast += time.perf_counter() - start
+
+        lats, lons = zip(*points)
+        start = time.perf_counter()
+        batch, _ = batch_within_radius(lats, lons, centre_lat, centre_lon, RADIUS)
+        t_batch += time.perf_counter() - start
+
+        for (lat, lon), d_exact, inside_fast, inside_batch in zip(points, exact, fast, batch):
+            d_hav = haversine_distance(lat, lon, centre_lat, centre_lon)
+            worst_abs = max(worst_abs, abs(d_hav - d_exact))
+            if d_exact > 1:
+                worst_rel = max(worst_rel, abs(d_hav - d_exact) / d_exact)
+            inside_exact = d_exact <= RADIUS
+            if inside_fast != inside_exact or bool(inside_batch) != inside_exact:
+                mismatches += 1
+
+    total = n * len(CENTRES)
+    print(f"points evaluated        : {total}")
+    print(f"geodesic (per point)    : {t_geodesic:.3f}s  ({total / t_geodesic:,.0f}/s)")
+    print(f"within_radius           : {t_fast:.3f}s  ({total / t_fast:,.0f}/s)  x{t_geodesic / t_fast:.1f}")
+    print(f"batch_within_radius     : {t_batch:.3f}s  ({total / t_batch:,.0f}/s)  x{t_geodesic / t_batch:.1f}")
+    print(f"worst haversine error   : {worst_abs:.3f}m ({worst_rel * 100:.3f}%)")
+    print(f"inside/outside mismatch : {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
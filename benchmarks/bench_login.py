@@ -0,0 +1,81 @@
+"""
+Benchmark for a login storm.
+
+Fires `n_logins` password checks from 64 request threads at once, first
+hashing inline on the request threads (as the login route used to) and then
+through password_hashing's pool of `workers` threads, and reports logins/sec,
+p50/p99 latency and how many were refused with a 503. Uses the
+PASSWORD_HASH_METHOD from the environment (default scrypt).
+
+Run from the project root:
+    python benchmarks/bench_login.py [n_logins] [workers] [queue_limit]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from password_hashing import HasherBusy, PasswordHasher
+
+REQUEST_THREADS = 64
+
+
+def storm(n, check):
+    """Runs `n` calls of `check` from REQUEST_THREADS threads; returns (seconds, latencies, refused)."""
+    latencies, refused = [], []
+    remaining = iter(range(n))
+    lock = threading.Lock()
+    start_gate = threading.Event()
+
+    def request_thread():
+        start_gate.wait()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                check()
+            except HasherBusy:
+                refused.append(time.perf_counter() - start)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=request_thread) for _ in range(REQUEST_THREADS)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    start_gate.set()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies), refused
+
+
+def report(label, seconds, latencies, refused):
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0
+    print(f"{label:<22}: {len(latencies) / seconds:7.1f} logins/s  p50 {p(0.5):7.0f} ms  "
+          f"p99 {p(0.99):7.0f} ms  refused {len(refused)}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    queue_limit = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    method = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    pwhash = generate_password_hash('correct horse', method)
+
+    print(f"method                : {pwhash.split('$', 1)[0]}")
+    print(f"logins                : {n} from {REQUEST_THREADS} request threads, {os.cpu_count()} CPU(s)")
+    report("inline", *storm(n, lambda: check_password_hash(pwhash, 'correct horse')))
+
+    hasher = PasswordHasher(method, workers=workers, queue_limit=queue_limit)
+    report(f"pool of {workers}, queue {queue_limit}", *storm(n, lambda: hasher.verify(pwhash, 'correct horse')))
+    hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
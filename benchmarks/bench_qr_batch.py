@@ -0,0 +1,48 @@
+"""
+Benchmark for roster QR sheets.
+
+Times rendering a class roster one code at a time (as the single-QR path
+does) against qr_batch's process pool, and reports when the streamed PDF
+produced its first bytes.
+
+Run from the project root:
+    python benchmarks/bench_qr_batch.py [n_students]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_batch import get_pool, render_raw, stream_roster_pdf
+
+LOGO = os.path.join('static', 'images', 'logo.png')
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    entries = [(f"Student {i}", f"https://example.com/checkin/ABC123?student=KNUST/{i:05d}/24") for i in range(n)]
+
+    start = time.perf_counter()
+    for _, data in entries:
+        render_raw((data, LOGO))
+    t_serial = time.perf_counter() - start
+
+    get_pool().submit(int).result()  # start the workers outside the timing
+    start = time.perf_counter()
+    first_byte, size = None, 0
+    for chunk in stream_roster_pdf(entries, LOGO, title='Benchmark'):
+        if first_byte is None and len(chunk) > 100:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    t_pdf = time.perf_counter() - start
+
+    print(f"students              : {n}  (pool of {get_pool()._max_workers} processes)")
+    print(f"serial render         : {t_serial:.2f}s  ({n / t_serial:,.0f}/s)")
+    print(f"pooled PDF, streamed  : {t_pdf:.2f}s  ({n / t_pdf:,.0f}/s)  x{t_serial / t_pdf:.1f}")
+    print(f"first QR page bytes   : {first_byte:.2f}s")
+    print(f"PDF size              : {size / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Import-time check for worker startup.
+
+Runs `from app import create_app; create_app()` in a fresh interpreter with
+`python -X importtime`, prints the wall time and the slowest modules, and
+exits 1 if it takes longer than the budget or imports one of the libraries
+that should only load on first use (pandas, numpy, geopy, alembic).
+
+Nearly all of the ~1 s left is Flask and SQLAlchemy themselves (the
+postgresql dialect included, which the partial indexes' postgresql_where
+loads). The budget leaves half as much again for slower CI machines; one
+heavy library back on the import path (pandas alone is ~0.5 s) goes over it.
+The first run writes .pyc files, so the interpreter is started twice and
+the second run is timed.
+
+Runs in CI (.github/workflows/checks.yml). Run from the project root:
+    python benchmarks/check_import_time.py [budget_ms]
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY = ('pandas', 'numpy', 'geopy', 'alembic')
+TOP = 10
+
+
+def run():
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    for _ in range(2):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'from app import create_app; create_app()'],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        wall = (time.perf_counter() - start) * 1000
+        if proc.returncode:
+            break
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        sys.exit(proc.returncode)
+    return wall, parse(proc.stderr)
+
+
+def parse(stderr):
+    """-X importtime lines -> [(cumulative_us, module)], nested imports indented by depth."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative), name[1:].rstrip()))
+    return modules
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    wall, modules = run()
+    names = {name.strip() for _, name in modules}
+    loaded = [lib for lib in LAZY if lib in names]
+
+    print(f"create_app() in a fresh interpreter: {wall:.0f} ms (budget {budget:.0f} ms), {len(modules)} modules")
+    print("slowest imports made by app.py:")
+    direct = [(us, name.strip()) for us, name in modules if name.startswith('  ') and name[2] != ' ']
+    for us, name in sorted(direct, reverse=True)[:TOP]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"❌ imported at startup: {', '.join(loaded)}")
+        failed = True
+    if wall > budget:
+        print(f"❌ over budget by {wall - budget:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ startup within budget, no heavy imports")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Check that the job runner renews the lease of jobs it is still running.
+
+Shortens the lease to a couple of seconds, then checks that:
+
+  - a queued job whose handler runs past the lease without reporting progress
+    runs once and succeeds, rather than being re-queued and run again;
+  - a tracked download that outlives the lease is still running;
+  - a tracked download dropped without finishing is failed once its lease runs out.
+
+Uses a fresh SQLite file unless DATABASE_URL is set. Exits 1 if a check fails.
+
+Run from the project root:
+    python benchmarks/check_job_lease.py [lease_seconds]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import load_suite  # noqa: E402,F401  (sets up the scratch database first)
+
+HANDLER_RUNS = []
+
+
+def wait_for(read, want, timeout):
+    start = time.perf_counter()
+    while (value := read()) != want and time.perf_counter() - start < timeout:
+        time.sleep(0.1)
+    return value
+
+
+def main():
+    lease = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    import app as core
+
+    flask_app = core.create_app()
+    runner = core.job_runner
+    runner.lease_seconds = lease
+    runner.heartbeat_seconds = lease / 5
+    runner.poll_interval = 0.1
+
+    @runner.handler('lease_check')
+    def slow(payload, progress):
+        HANDLER_RUNS.append(payload['n'])
+        time.sleep(lease * 2)  # no progress() while it works
+        return {'slept': lease * 2}
+
+    failures = []
+
+    def check(ok, message):
+        print(f"{'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    def job(job_id):
+        with flask_app.app_context():
+            row = core.db.session.get(core.Job, job_id)
+            return row.status, row.attempts
+
+    with flask_app.app_context():
+        core.db.create_all()
+        queued = runner.enqueue('lease_check', {'n': 1})
+        tracked = runner.track('lease_check_download')
+        dropped = runner.track('lease_check_dropped').id
+
+    state = wait_for(lambda: job(queued), ('succeeded', 1), lease * 4)
+    check(state == ('succeeded', 1) and HANDLER_RUNS == [1],
+          f"a handler running {lease * 2:g}s on a {lease:g}s lease ran {len(HANDLER_RUNS)} time(s): {state}")
+    check(job(tracked.id)[0] == 'running', "a tracked download that outlives its lease is still running")
+    with flask_app.app_context():
+        tracked.finish()
+    check(job(tracked.id)[0] == 'succeeded', "and finishes normally")
+    state = wait_for(lambda: job(dropped)[0], 'failed', lease * 2)
+    check(state == 'failed', f"a dropped download is failed once its lease runs out: {state}")
+
+    core.checkin_queue.stop()
+    runner.stop()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Check the read-replica routing against two real databases.
+
+Builds a primary SQLite database, copies it to a replica file (a replica
+that is a little behind, as a real one is), then drives the `@read_replica`
+views that also write on the primary: session and course exports and the
+roster QR sheet (each records a tracked job) and the organisation dashboard
+when its stats are due a reconcile (it queues a job). Reading back the job
+the request wrote must go to the primary, which has it, so each should
+answer 200, while the request's other reads still come from the replica.
+
+Uses scratch files in a temporary folder. Exits 1 if a check fails.
+
+Run from the project root:
+    python benchmarks/check_replica_routing.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCRATCH = tempfile.mkdtemp(prefix='replica-check-')
+PRIMARY = os.path.join(SCRATCH, 'primary.db')
+REPLICA = os.path.join(SCRATCH, 'replica.db')
+# The app reads its settings at import, so both databases are named first
+os.environ['DATABASE_URL'] = f"sqlite:///{PRIMARY}"
+os.environ['REPLICA_DATABASE_URL'] = f"sqlite:///{REPLICA}"
+os.environ['ORG_STATS_RECONCILE_SECONDS'] = '0'  # every dashboard view is due a reconcile
+import load_suite  # noqa: E402
+
+
+def main():
+    import app as core
+    from db_routing import RoutingSession
+
+    flask_app = core.create_app()
+    flask_app.config['WTF_CSRF_ENABLED'] = False
+    with flask_app.app_context():
+        core.db.create_all()
+        with core.db.engine.begin() as conn:
+            fixtures = load_suite.generate(conn, core, 'replica', orgs=1, students=20, lecturers=1, weeks=2)
+        course_id = core.db.session.scalar(core.db.select(core.Course.id).order_by(core.Course.id))
+        core.db.engines['replica'].dispose()
+    shutil.copyfile(PRIMARY, REPLICA)
+
+    lecturer = fixtures['lecturers'][0]
+    failures = []
+
+    def check(ok, message):
+        print(f"{'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    clients = {'lecturer': load_suite.login(flask_app, lecturer['email']),
+               'admin': load_suite.login(flask_app, fixtures['admins'][0])}
+    pages = [
+        ('lecturer', f"/export/attendance/session/{lecturer['session_id']}"),
+        ('lecturer', f"/export/attendance/course/{course_id}"),
+        ('lecturer', f"/qr/roster/{course_id}?session_id={lecturer['session_id']}"),
+        ('admin', '/org/dashboard'),
+    ]
+    for who, path in pages:
+        before = dict(RoutingSession.stats)
+        response = clients[who].get(path)
+        response.get_data()  # run streamed bodies to the end
+        response.close()
+        replica_reads = RoutingSession.stats['replica'] - before['replica']
+        check(response.status_code == 200 and replica_reads > 0,
+              f"GET {path} as {who}: {response.status_code}, {replica_reads} read(s) from the replica")
+
+    with flask_app.app_context():
+        jobs = core.db.session.execute(core.db.select(core.Job.kind, core.Job.status)).all()
+    check(len(jobs) == len(pages), f"jobs recorded on the primary: {sorted(map(tuple, jobs))}")
+
+    core.checkin_queue.stop()
+    core.job_runner.stop()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
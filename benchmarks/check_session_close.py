@@ -0,0 +1,110 @@
+"""
+Check that a session closed right after a burst of check-ins counts them all.
+
+Students check in, the lecturer closes the session at once (POST
+/session/<id>/close), and one more student checks in through a worker whose
+session cache still holds the open session. Then it checks that:
+
+  - this worker refuses check-ins as soon as the window has ended;
+  - the sweeper leaves the session active until the grace has passed;
+  - once swept, the stored counts include every accepted check-in, and so
+    does the lecturer dashboard.
+
+Uses a fresh SQLite file unless DATABASE_URL is set; it inserts synthetic
+rows, so never point it at real data. Exits 1 if a check fails.
+
+Run from the project root:
+    python benchmarks/check_session_close.py [checkins]
+"""
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import load_suite  # noqa: E402  (sets up the scratch database first)
+
+
+def drain(queue, timeout=30):
+    start = time.perf_counter()
+    while queue.pending() or queue.stats['flushed'] + queue.stats['fallback'] < queue.stats['accepted']:
+        if time.perf_counter() - start > timeout:
+            raise RuntimeError('check-in queue did not drain')
+        time.sleep(0.01)
+
+
+def main():
+    checkins = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    import app as core
+    from session_summary import lecturer_sessions
+
+    flask_app = core.create_app()
+    flask_app.config['WTF_CSRF_ENABLED'] = False
+    with flask_app.app_context():
+        core.db.create_all()
+        with core.db.engine.begin() as conn:
+            fixtures = load_suite.generate(conn, core, 'close', orgs=1, students=checkins + 2, lecturers=1, weeks=1)
+    lecturer = fixtures['lecturers'][0]
+    session_id = lecturer['session_id']
+    students = fixtures['students'][lecturer['organisation_id']]
+    student_client = flask_app.test_client()
+    failures = []
+
+    def check(ok, message):
+        print(f"{'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    def submit(student_n):
+        student_id, name = students[student_n]
+        student_client.set_cookie('device_key', load_suite.device_cookie(flask_app, f'close-{student_id}'))
+        return student_client.post('/submit_attendance', json={
+            'session_id': session_id, 'student_id': student_id, 'student_name': name,
+            'latitude': load_suite.CENTRE[0], 'longitude': load_suite.CENTRE[1],
+        }, environ_base={'REMOTE_ADDR': f'10.1.0.{student_n + 1}'}).status_code
+
+    codes = [submit(n) for n in range(checkins)]
+    check(codes == [202] * checkins, f"{checkins} check-ins accepted before the close: {codes}")
+
+    # The lecturer closes the session straight away, before the queue has written anything
+    response = load_suite.login(flask_app, lecturer['email']).post(f'/session/{session_id}/close')
+    check(response.status_code == 200 and response.get_json()['checkin_closes_at'],
+          f"close ends the check-in window: {response.status_code} {response.get_json()}")
+    check(submit(checkins) == 403, "this worker refuses a check-in after the close")
+
+    # Another worker still has the open session cached and accepts one more
+    with flask_app.app_context():
+        snapshot = core.load_session_snapshot(session_id)
+    core.session_cache.put(session_id, snapshot._replace(checkin_closes_at=None))
+    check(submit(checkins + 1) == 202, "a worker with a stale cached session still accepts a check-in")
+    core.session_cache.invalidate(session_id)
+    expected = checkins + 1
+
+    with flask_app.app_context():
+        sweeper = core.session_sweeper
+        closes_at = core.db.session.scalar(core.db.select(core.SessionModel.checkin_closes_at).where(
+            core.SessionModel.session_id == session_id))
+        check(sweeper.sweep(now=closes_at) == 0, f"the sweeper waits {sweeper.grace_seconds}s before closing it")
+
+        drain(core.checkin_queue)
+        user_id = core.db.session.scalar(core.db.select(core.User.id).where(core.User.email == lecturer['email']))
+        row = lecturer_sessions(core.db.session, core.SessionModel, core.Attendance, user_id)['sessions'][0]
+        check(row.checkins == expected, f"dashboard counts {row.checkins}/{expected} check-ins while closing")
+
+        closed = sweeper.sweep(now=closes_at + timedelta(seconds=sweeper.grace_seconds + 1))
+        check(closed == 1, f"the sweeper closes it after the grace ({closed} closed)")
+        stored = core.db.session.execute(core.db.select(
+            core.SessionModel.status, core.SessionModel.checkin_count, core.SessionModel.present_count
+        ).where(core.SessionModel.session_id == session_id)).one()
+        check(tuple(stored) == ('closed', expected, expected), f"stored status and counts: {tuple(stored)}")
+        row = lecturer_sessions(core.db.session, core.SessionModel, core.Attendance, user_id)['sessions'][0]
+        check((row.checkins, row.present) == (expected, expected),
+              f"dashboard counts after closing: {row.checkins} check-ins, {row.present} present")
+
+    core.checkin_queue.stop()
+    core.job_runner.stop()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
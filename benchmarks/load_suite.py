@@ -0,0 +1,471 @@
+"""
+End-to-end load benchmark around a lecture-start check-in burst.
+
+Generates synthetic organisations, students, lecturers, past sessions and
+their attendance, then drives the app in-process (one Flask test client per
+simulated user, each on its own thread) through these scenarios:
+
+    checkin              --burst students of one class post /submit_attendance at once
+    dashboard <path>     admins and lecturers load their dashboards and list APIs
+    upload_students      admins upload a student roll and wait for the import job
+    generate_qr_code     new check-in links rendered to QR images
+    calculate_distance   exact distance from a student to the class location
+
+and reports throughput and p50/p95/p99 latency for each. Results are saved
+as JSON; pass --compare with an earlier file to flag regressions (exit 1).
+
+Uses DATABASE_URL if set, e.g. an empty local Postgres after `flask db
+upgrade`, otherwise a fresh SQLite file. It inserts synthetic rows, so never
+point it at real data. Check-in rate limits and admission control stay at
+their configured values, so throttled requests show up as 429/503.
+
+Run from the project root:
+    python benchmarks/load_suite.py [--students 2000] [--burst 500] [--concurrency 50]
+                                    [--only checkin,dashboard] [--out FILE] [--compare FILE]
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCRATCH = tempfile.mkdtemp(prefix='load-suite-')
+# The app reads its settings at import, so the scratch locations go in first
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(SCRATCH, 'load.db')}")
+os.environ.setdefault('JOURNAL_FOLDER', os.path.join(SCRATCH, 'journal'))
+os.environ.setdefault('JOB_UPLOAD_FOLDER', os.path.join(SCRATCH, 'uploads'))
+# Logins are only setup here (bench_login.py measures them), so use a cheap hash
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+
+CENTRE = (6.6745, -1.5716)  # class location of every session
+RADIUS = 50
+PASSWORD = 'load-suite'
+STUDENTS_PER_IP = 20  # students behind one campus Wi-Fi address
+ADMIN_PAGES = ['/org/dashboard', '/org_students', '/api/org/students?count=1', '/api/org/courses',
+               '/api/analytics', '/attendance']
+LECTURER_PAGES = ['/lecturer/dashboard', '/api/analytics?mine=1']
+
+
+# -------------------------
+# Synthetic data
+# -------------------------
+def point_near(rng, centre, max_m):
+    """A random point within `max_m` metres of `centre`."""
+    d = max_m * math.sqrt(rng.random())
+    bearing = rng.uniform(0, 2 * math.pi)
+    lat = centre[0] + d * math.cos(bearing) / 111320
+    lon = centre[1] + d * math.sin(bearing) / (111320 * math.cos(math.radians(centre[0])))
+    return lat, lon
+
+
+def generate(conn, core, tag, orgs=2, students=2000, lecturers=10, weeks=12):
+    """
+    Bulk inserts a school year's worth of rows for `orgs` organisations: students
+    spread over departments and levels, an admin and `lecturers` lecturers each, a
+    weekly session per lecturer for `weeks` weeks with attendance, and one active
+    session per lecturer starting now. Returns the accounts and sessions to drive.
+    """
+    from werkzeug.security import generate_password_hash
+
+    db = core.db
+    rng = random.Random(22)
+    now = datetime.utcnow()
+    pwhash = generate_password_hash(PASSWORD, os.environ['PASSWORD_HASH_METHOD'])
+    departments = ['Computer Science', 'Mathematics', 'Physics', 'Chemistry', 'Economics']
+    levels = ['100', '200', '300', '400']
+
+    conn.execute(db.insert(core.Organisation), [
+        {'name': f'Load {tag} University {o}', 'email': f'load{tag}-{o}@example.com',
+         'secret_code': f'{tag}{o:04d}'[-10:]}
+        for o in range(orgs)
+    ])
+    org_ids = conn.execute(db.select(core.Organisation.id).where(
+        core.Organisation.email.like(f'load{tag}-%')).order_by(core.Organisation.id)).scalars().all()
+
+    fixtures = {'password': PASSWORD, 'admins': [], 'lecturers': [], 'students': {}}
+    rows = {name: [] for name in ('Department', 'Course', 'Student', 'User', 'Lecturer')}
+    for o, org_id in enumerate(org_ids):
+        rows['Department'] += [{'name': d, 'organisation_id': org_id} for d in departments]
+        rows['Course'] += [{'org_id': org_id, 'course_name': f'{d} {lvl}', 'course_code': f'{d[:3].upper()}{lvl}',
+                            'level': lvl, 'department': d} for d in departments for lvl in levels]
+        org_students = []
+        for s in range(students):
+            student_id = f'L{tag}/{o}/{s:05d}'
+            org_students.append((student_id, f'Student {o}-{s}'))
+            rows['Student'].append({
+                'student_id': student_id, 'index_number': f'IX{tag}{o}{s:05d}', 'full_name': f'Student {o}-{s}',
+                'email': f'student{tag}-{o}-{s}@example.com', 'organisation_id': org_id,
+                'level': levels[s % len(levels)], 'department': departments[s % len(departments)],
+                'college': 'Science', 'faculty': 'Physical Sciences',
+            })
+        fixtures['students'][org_id] = org_students
+        admin_email = f'admin{tag}-{o}@example.com'
+        fixtures['admins'].append(admin_email)
+        rows['User'].append({'email': admin_email, 'password_hash': pwhash, 'role': 'org_admin',
+                             'organisation_id': org_id, 'name': f'Admin {o}'})
+        for u in range(lecturers):
+            rows['User'].append({'email': f'lecturer{tag}-{o}-{u}@example.com', 'password_hash': pwhash,
+                                 'role': 'school_lecturer', 'organisation_id': org_id, 'name': f'Lecturer {o}-{u}'})
+            rows['Lecturer'].append({'full_name': f'Lecturer {o}-{u}', 'email': f'roster{tag}-{o}-{u}@example.com',
+                                     'organisation_id': org_id, 'department': departments[u % len(departments)]})
+    for name, values in rows.items():
+        conn.execute(db.insert(getattr(core, name)), values)
+
+    users = conn.execute(db.select(core.User.id, core.User.email, core.User.organisation_id).where(
+        core.User.email.like(f'lecturer{tag}-%')).order_by(core.User.id)).all()
+    sessions, attendance = [], []
+    propensity = {}
+    for user_id, email, org_id in users:
+        # A lecturer teaches one block of the organisation's students every week
+        org_students = fixtures['students'][org_id]
+        lecturer_n = int(email.rsplit('-', 1)[1].split('@')[0])
+        size = max(1, len(org_students) // lecturers)
+        cohort = org_students[lecturer_n * size:(lecturer_n + 1) * size]
+        for week in range(weeks, 0, -1):
+            started = now - timedelta(weeks=week)
+            session_id = f'LOAD-{tag}-{user_id}-{week}'
+            sessions.append({'session_id': session_id, 'user_id': user_id, 'latitude': CENTRE[0],
+                             'longitude': CENTRE[1], 'radius': RADIUS, 'status': 'closed', 'created_at': started})
+            for student_id, name in cohort:
+                p = propensity.setdefault(student_id, rng.uniform(0.5, 0.98))
+                if rng.random() < p:
+                    lat, lon = point_near(rng, CENTRE, RADIUS * 0.8)
+                    attendance.append({'session_id': session_id, 'student_id': student_id, 'student_name': name,
+                                       'timestamp': started + timedelta(seconds=rng.randrange(900)),
+                                       'status': 'Present', 'device_key': f'dev-{student_id}',
+                                       'latitude': lat, 'longitude': lon, 'flagged': False})
+        active_id = f'LOAD-{tag}-{user_id}-now'
+        sessions.append({'session_id': active_id, 'user_id': user_id, 'latitude': CENTRE[0],
+                         'longitude': CENTRE[1], 'radius': RADIUS, 'status': 'active', 'created_at': now})
+        fixtures['lecturers'].append({'email': email, 'organisation_id': org_id, 'session_id': active_id})
+    conn.execute(db.insert(core.SessionModel), sessions)
+    for start in range(0, len(attendance), 5000):
+        conn.execute(db.insert(core.Attendance), attendance[start:start + 5000])
+    core.org_stats.recount(conn, org_ids)
+
+    fixtures['counts'] = {'organisations': len(org_ids), 'students': sum(map(len, fixtures['students'].values())),
+                          'lecturers': len(users), 'sessions': len(sessions), 'attendance': len(attendance)}
+    return fixtures
+
+
+# -------------------------
+# Runner
+# -------------------------
+def percentile(latencies, q):
+    return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+
+def run(n, concurrency, op, make_client=None):
+    """
+    Calls op(i, client) for i in range(n) from `concurrency` threads released together.
+    `make_client(thread_n)` builds each thread's client outside the timing. op returns
+    an HTTP status (anything >= 400 is an error) or None for plain function calls.
+    """
+    latencies, statuses, errors = [], Counter(), Counter()
+    remaining = iter(range(n))
+    lock = threading.Lock()
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker(thread_n):
+        client = make_client(thread_n) if make_client else None
+        ready.wait()
+        while True:
+            with lock:
+                i = next(remaining, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            try:
+                status = op(i, client)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if status is not None:
+                    statuses[status] += 1
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    failed = sum(count for status, count in statuses.items() if status >= 400) + sum(errors.values())
+    return {
+        'requests': n,
+        'concurrency': concurrency,
+        'seconds': round(seconds, 3),
+        'throughput': round((n - failed) / seconds, 1) if seconds else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        'failed': failed,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'errors': dict(errors),
+    }
+
+
+def login(flask_app, email):
+    client = flask_app.test_client()
+    response = client.post('/login', data={'email': email, 'password': PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f"login as {email} failed with {response.status_code}")
+    return client
+
+
+def device_cookie(flask_app, key):
+    """The signed device_key cookie the check-in page issues, for a simulated phone."""
+    from routes.lecturer_routes import device_signer
+    with flask_app.app_context():
+        return device_signer().sign(key).decode()
+
+
+# -------------------------
+# Scenarios
+# -------------------------
+def checkin_burst(flask_app, core, fixtures, args):
+    """Every student of one class checks in at once, then the write-behind queue drains."""
+    session = fixtures['lecturers'][0]
+    students = fixtures['students'][session['organisation_id']][:args.burst]
+    rng = random.Random(1)
+    positions = [point_near(rng, CENTRE, RADIUS * 0.8) for _ in students]
+
+    def op(i, client):
+        student_id, name = students[i]
+        lat, lon = positions[i]
+        client.set_cookie('device_key', device_cookie(flask_app, f'burst-{student_id}'))
+        return client.post('/submit_attendance', json={
+            'session_id': session['session_id'], 'student_id': student_id, 'student_name': name,
+            'latitude': lat, 'longitude': lon,
+        }, environ_base={'REMOTE_ADDR': f'10.0.{i // STUDENTS_PER_IP // 250}.{i // STUDENTS_PER_IP % 250 + 1}'}
+        ).status_code
+
+    result = run(len(students), args.concurrency, op, lambda t: flask_app.test_client())
+
+    # Accepted check-ins are written by the queue's thread; time until they're all in the table
+    queue = core.checkin_queue
+    start = time.perf_counter()
+    while queue.pending() or queue.stats['flushed'] + queue.stats['fallback'] < queue.stats['accepted']:
+        if time.perf_counter() - start > 60:
+            break
+        time.sleep(0.01)
+    result['drain_seconds'] = round(time.perf_counter() - start, 3)
+    with flask_app.app_context():
+        result['rows_written'] = core.db.session.scalar(core.db.select(core.db.func.count()).select_from(
+            core.Attendance).where(core.Attendance.session_id == session['session_id']))
+    return {'checkin': result}
+
+
+def dashboards(flask_app, core, fixtures, args):
+    """Each page is loaded `--page-loads` times by logged-in admins or lecturers."""
+    results = {}
+    pages = [(path, fixtures['admins']) for path in ADMIN_PAGES]
+    pages += [(path, [lecturer['email'] for lecturer in fixtures['lecturers']]) for path in LECTURER_PAGES]
+    for path, accounts in pages:
+        clients = [login(flask_app, accounts[t % len(accounts)]) for t in range(args.concurrency)]
+        op = lambda i, client, path=path: client.get(path).status_code
+        results[f'dashboard {path}'] = run(args.page_loads, args.concurrency, op, clients.__getitem__)
+    return results
+
+
+def upload_students(flask_app, core, fixtures, args):
+    """Admins upload a roll of --upload-rows new students; latency runs until the import job finishes."""
+    tag = fixtures['tag']
+
+    def op(i, client):
+        lines = ['student_id,index_number,full_name,email,level,department']
+        lines += [f'U{tag}/{i}/{r:05d},UX{tag}{i}{r:05d},Upload {i}-{r},upload{tag}-{i}-{r}@example.com,100,Physics'
+                  for r in range(args.upload_rows)]
+        response = client.post('/upload_students', content_type='multipart/form-data', data={
+            'file': (io.BytesIO('\n'.join(lines).encode()), f'roll-{i}.csv')})
+        if response.status_code != 202:
+            return response.status_code
+        status_url = response.get_json()['status_url']
+        while True:
+            job = client.get(status_url).get_json()
+            if job['status'] in ('succeeded', 'failed'):
+                return 200 if job['status'] == 'succeeded' else 500
+            time.sleep(0.02)
+
+    concurrency = min(args.concurrency, args.uploads)
+    clients = [login(flask_app, fixtures['admins'][t % len(fixtures['admins'])]) for t in range(concurrency)]
+    result = run(args.uploads, concurrency, op, clients.__getitem__)
+    result['rows_per_upload'] = args.upload_rows
+    return {'upload_students': result}
+
+
+def qr_codes(flask_app, core, fixtures, args):
+    """generate_qr_code for new check-in links (cache misses), rendered into the scratch folder."""
+    import qr_generator
+
+    qr_generator.QR_CACHE_DIR = os.path.join(SCRATCH, 'qr_codes')
+    os.makedirs(qr_generator.QR_CACHE_DIR, exist_ok=True)
+    session_id = fixtures['lecturers'][0]['session_id']
+    logo = os.path.join(ROOT, 'static', 'images', 'logo.png')
+
+    def op(i, client):
+        qr_generator.generate_qr_code(f"https://example.com/checkin/{session_id}?student={fixtures['tag']}-{i}",
+                                      logo_path=logo if os.path.exists(logo) else None)
+
+    return {'generate_qr_code': run(args.qr, args.concurrency, op)}
+
+
+def distances(flask_app, core, fixtures, args):
+    """calculate_distance (geopy geodesic) for check-in positions around the class location."""
+    from attendance_utils import calculate_distance
+
+    rng = random.Random(2)
+    points = [point_near(rng, CENTRE, RADIUS * 2) for _ in range(1000)]
+
+    def op(i, client):
+        calculate_distance(*points[i % len(points)], *CENTRE)
+
+    return {'calculate_distance': run(args.distances, args.concurrency, op)}
+
+
+SCENARIOS = {
+    'checkin': checkin_burst,
+    'dashboard': dashboards,
+    'upload': upload_students,
+    'qr': qr_codes,
+    'distance': distances,
+}
+
+
+# -------------------------
+# Reporting
+# -------------------------
+def report(name, result):
+    extra = ''
+    if 'drain_seconds' in result:
+        extra = f"  drained in {result['drain_seconds']:.2f}s, {result['rows_written']} rows"
+    statuses = ' '.join(f"{status}x{count}" for status, count in result['statuses'].items())
+    print(f"{name:<40}: {result['throughput']:8.1f}/s  p50 {result['p50_ms']:7.1f}  p95 {result['p95_ms']:7.1f}  "
+          f"p99 {result['p99_ms']:7.1f} ms  failed {result['failed']:<4} {statuses}{extra}")
+    for error, count in result['errors'].items():
+        print(f"{'':<40}  ❌ {error} x{count}")
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints p95 and throughput against an earlier run; returns the scenarios that regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['scenarios']
+    regressed = []
+    print(f"\nAgainst {baseline_path} (tolerance {tolerance:.0%}):")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        p95 = result['p95_ms'] / before['p95_ms'] if before['p95_ms'] else 1.0
+        rate = result['throughput'] / before['throughput'] if before['throughput'] else 1.0
+        worse = p95 > 1 + tolerance or rate < 1 / (1 + tolerance) or result['failed'] > before['failed']
+        if worse:
+            regressed.append(name)
+        print(f"{'❌' if worse else '✅'} {name:<40} p95 x{p95:5.2f}  throughput x{rate:5.2f}  "
+              f"failed {before['failed']} -> {result['failed']}")
+    return regressed
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--orgs', type=int, default=2)
+    parser.add_argument('--students', type=int, default=2000, help='students per organisation')
+    parser.add_argument('--lecturers', type=int, default=10, help='lecturers per organisation')
+    parser.add_argument('--weeks', type=int, default=12, help='weekly sessions of history per lecturer')
+    parser.add_argument('--burst', type=int, default=500, help='students checking in at lecture start')
+    parser.add_argument('--concurrency', type=int, default=50, help='simultaneous users (threads)')
+    parser.add_argument('--page-loads', type=int, default=200, help='loads of each dashboard page')
+    parser.add_argument('--uploads', type=int, default=4)
+    parser.add_argument('--upload-rows', type=int, default=1000)
+    parser.add_argument('--qr', type=int, default=100, help='QR codes to generate')
+    parser.add_argument('--distances', type=int, default=20000, help='calculate_distance calls')
+    parser.add_argument('--only', default=','.join(SCENARIOS), help=f"comma-separated from {', '.join(SCENARIOS)}")
+    parser.add_argument('--out', help='results file (default benchmarks/results/load-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before --compare fails')
+    args = parser.parse_args()
+    args.burst = min(args.burst, args.students)
+    return args
+
+
+def main():
+    args = parse_args()
+    only = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(only) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    import app as core
+
+    flask_app = core.create_app()
+    flask_app.config['WTF_CSRF_ENABLED'] = False
+    tag = f'{random.randrange(10 ** 6):06d}'
+    with flask_app.app_context():
+        core.db.create_all()
+        start = time.perf_counter()
+        with core.db.engine.begin() as conn:
+            fixtures = generate(conn, core, tag, args.orgs, args.students, args.lecturers, args.weeks)
+        fixtures['tag'] = tag
+        dialect = core.db.engine.dialect.name
+    counts = ', '.join(f"{count} {name}" for name, count in fixtures['counts'].items())
+    print(f"database              : {dialect}, generated {counts} in {time.perf_counter() - start:.1f}s")
+    print(f"users                 : {args.concurrency} at once, {os.cpu_count()} CPU(s)\n")
+
+    results = {}
+    for name in only:
+        for scenario, result in SCENARIOS[name](flask_app, core, fixtures, args).items():
+            report(scenario, result)
+            results[scenario] = result
+
+    out = args.out or os.path.join(ROOT, 'benchmarks', 'results', f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({
+            'meta': {
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'commit': git_commit(),
+                'database': dialect,
+                'python': platform.python_version(),
+                'cpus': os.cpu_count(),
+                'data': fixtures['counts'],
+                'args': {key: value for key, value in vars(args).items() if key not in ('out', 'compare')},
+            },
+            'scenarios': results,
+        }, f, indent=2)
+    print(f"\nResults saved to {out}")
+
+    core.checkin_queue.stop()
+    core.job_runner.stop()
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import os
+import queue
+import threading
+import time
+
+
+class CheckinQueue:
+    """
+    Bounded write-behind queue for student check-ins.
+
+    Requests put validated attendance rows on the queue and return straight away.
+    A single background thread hands them to `flush_fn` in batches, whenever
+    `batch_size` rows are waiting or `flush_interval` seconds have passed since
+    the oldest one arrived. If `flush_fn` raises, each record of the batch is
+    handed to `fallback_fn` when one is given; otherwise the failure is logged
+    and the batch is dropped. Records still queued when the process dies are
+    lost too.
+
+    The app passes no `fallback_fn`: every accepted check-in is also appended
+    to the attendance journal (attendance_journal.py), and check-ins that never
+    reached the database are recovered by replaying it (`flask replay-journal`).
+    The journal buffers its writes and syncs them to disk at most every
+    AttendanceJournal.fsync_interval, so a crash can still lose the check-ins
+    accepted just before it.
+    """
+
+    def __init__(self, flush_fn, fallback_fn=None, maxsize=5000, batch_size=200,
+                 flush_interval=0.5, put_timeout=0.05):
+        self.flush_fn = flush_fn
+        self.fallback_fn = fallback_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.stats = {'accepted': 0, 'rejected': 0, 'flushed': 0, 'fallback': 0, 'batches': 0}
+
+    def submit(self, record):
+        """
+        Queues a record for insertion.
+        Returns False when the queue is full so the caller can shed load.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            self.stats['rejected'] += 1
+            return False
+        self.stats['accepted'] += 1
+        return True
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def stop(self, timeout=10):
+        """Stops the writer thread after draining everything still queued."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        # Anything put after the thread exited is flushed inline.
+        self._flush(self._take_all())
+
+    def _ensure_started(self):
+        # The thread is started lazily (and restarted after a fork) so the queue
+        # works with gunicorn's --preload as well as the dev server.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='checkin-writer', daemon=True)
+            self._thread.start()
+
+    def _take_all(self):
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+        # Graceful drain on shutdown
+        remaining = self._take_all()
+        for i in range(0, len(remaining), self.batch_size):
+            self._flush(remaining[i:i + self.batch_size])
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            self.flush_fn(batch)
+            self.stats['flushed'] += len(batch)
+            self.stats['batches'] += 1
+        except Exception as e:
+            print(f"[CHECKIN_QUEUE] Flush of {len(batch)} records failed: {e}")
+            if self.fallback_fn is None:
+                return
+            for record in batch:
+                try:
+                    self.fallback_fn(record)
+                    self.stats['fallback'] += 1
+                except Exception as fe:
+                    print(f"[CHECKIN_QUEUE] Fallback failed for {record.get('student_id')}: {fe}")
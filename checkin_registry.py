@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+
+
+class _SessionMembers:
+    __slots__ = ('students', 'devices')
+
+    def __init__(self):
+        self.students = set()
+        self.devices = {}
+
+
+class CheckinRegistry:
+    """
+    In-memory record of who has checked in to each session, and from which device.
+
+    `loader(session_id)` returns the (student_id, device_key) pairs already stored
+    for a session and is used to warm a session the first time it is seen. After
+    that, duplicate check-ins and shared devices are detected with set lookups only.
+    The database unique constraint on (session_id, student_id) stays the source
+    of truth across workers; this just keeps the common case off the database.
+    """
+
+    def __init__(self, loader, max_sessions=512, shared_device_limit=1):
+        self.loader = loader
+        self.max_sessions = max_sessions
+        self.shared_device_limit = shared_device_limit
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.duplicates = 0
+        self.shared_device_flags = 0
+
+    def claim(self, session_id, student_id, device_key=None):
+        """
+        Registers a check-in for a student.
+
+        Returns:
+            tuple: (accepted, shared_device). `accepted` is False when the student
+            already checked in to this session. `shared_device` is True when the
+            device has now been used for more than `shared_device_limit` students.
+        """
+        members = self._members(session_id)
+        with self._lock:
+            if student_id in members.students:
+                self.duplicates += 1
+                return False, False
+            members.students.add(student_id)
+
+            shared = False
+            if device_key:
+                used_by = members.devices.setdefault(device_key, set())
+                used_by.add(student_id)
+                shared = len(used_by) > self.shared_device_limit
+                if shared:
+                    self.shared_device_flags += 1
+            return True, shared
+
+    def release(self, session_id, student_id, device_key=None):
+        """Undoes a claim whose record could not be queued."""
+        with self._lock:
+            members = self._sessions.get(session_id)
+            if members is None:
+                return
+            members.students.discard(student_id)
+            if device_key and device_key in members.devices:
+                members.devices[device_key].discard(student_id)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'duplicates': self.duplicates,
+                'shared_device_flags': self.shared_device_flags,
+            }
+
+    def _members(self, session_id):
+        with self._lock:
+            members = self._sessions.get(session_id)
+            if members is not None:
+                self._sessions.move_to_end(session_id)
+                return members
+
+        warmed = _SessionMembers()
+        for student_id, device_key in self.loader(session_id):
+            warmed.students.add(student_id)
+            if device_key:
+                warmed.devices.setdefault(device_key, set()).add(student_id)
+
+        with self._lock:
+            # Another thread may have warmed the same session meanwhile.
+            members = self._sessions.setdefault(session_id, warmed)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return members
@@ -0,0 +1,100 @@
+"""
+Read-replica routing for db.session.
+
+With REPLICA_DATABASE_URL set, the replica is the `replica` bind. Views
+decorated with `@read_replica` (dashboards, list APIs, exports, analytics)
+send their plain SELECTs there for the rest of the request, including a
+streamed response. Flushes, UPDATE/INSERT/DELETE, SELECT ... FOR UPDATE and
+anything run on `db.session.connection()` stay on the primary, as does
+every request not marked, so check-ins and admin changes never touch the
+replica. Once a request has written to a table (a flush or a DML
+statement), its later SELECTs touching that table go to the primary too, so
+it reads back what it just committed (e.g. the job a streamed export
+records) from a database that has it, while the export itself still reads
+the replica. Without a replica everything goes to the primary.
+
+`DB_ROUTE_BINDS` overrides the choice per endpoint, e.g.
+`school.org_dashboard=primary,school.org_list=replica`; an override covers the whole
+request, including loading current_user.
+"""
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import CompoundSelect, Select
+from sqlalchemy.sql.util import find_tables
+
+PRIMARY = 'primary'
+REPLICA = 'replica'
+
+
+def parse_route_binds(text):
+    """'endpoint=bind,...' -> {endpoint: bind}."""
+    binds = {}
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        endpoint, _, bind = item.partition('=')
+        if bind.strip() not in (PRIMARY, REPLICA):
+            raise ValueError(f"DB_ROUTE_BINDS: {item!r} must be endpoint=primary or endpoint=replica")
+        binds[endpoint.strip()] = bind.strip()
+    return binds
+
+
+def read_replica(view):
+    """Sends the view's reads to the replica, unless DB_ROUTE_BINDS says otherwise."""
+    view.db_bind = REPLICA
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Set inside the view rather than before the request, so login_required has
+        # already loaded current_user from the primary
+        g.setdefault('db_bind', REPLICA)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def apply_route_binds():
+    """before_request hook for DB_ROUTE_BINDS."""
+    bind = current_app.config['DB_ROUTE_BINDS'].get(request.endpoint)
+    if bind:
+        g.db_bind = bind
+
+
+class RoutingSession(Session):
+    stats = {PRIMARY: 0, REPLICA: 0}
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if has_app_context() and g.get('db_bind') == REPLICA:
+            if self._flushing or isinstance(clause, UpdateBase):
+                _record_write(mapper, clause)
+            elif (bind is None and _is_read(clause) and not _reads_own_write(clause)
+                    and REPLICA in self._db.engines):
+                RoutingSession.stats[REPLICA] += 1
+                return self._db.engines[REPLICA]
+        RoutingSession.stats[PRIMARY] += 1
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _record_write(mapper, clause):
+    # The tables this request has written to; reading them back must not hit a lagging replica
+    written = g.setdefault('db_written_tables', set())
+    if mapper is not None:
+        written.update(table.name for table in mapper.tables)
+    if isinstance(clause, UpdateBase):
+        written.add(clause.table.name)
+
+
+def _reads_own_write(clause):
+    written = g.get('db_written_tables')
+    if not written:
+        return False
+    tables = {table.name for table in find_tables(clause, include_aliases=False, include_joins=True)
+              if hasattr(table, 'name')}
+    # A statement whose tables can't be told apart is sent to the primary to be safe
+    return not tables or not tables.isdisjoint(written)
+
+
+def _is_read(clause):
+    if isinstance(clause, CompoundSelect):
+        return True
+    return isinstance(clause, Select) and clause._for_update_arg is None
@@ -0,0 +1,82 @@
+import math
+
+# numpy and geopy are imported where they're used: the check-in fast path needs
+# neither, and importing them at startup slows every worker boot
+
+# Mean Earth radius (IUGG) in meters
+EARTH_RADIUS_M = 6371008.8
+
+# Haversine on a sphere is within ~0.5% of the WGS-84 geodesic. Points whose fast
+# distance lands closer than this to the radius boundary are re-checked exactly.
+DEFAULT_MARGIN_RATIO = 0.006
+DEFAULT_MARGIN_METERS = 1.0
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two points in meters.
+    Cheap spherical approximation used as the geofence fast path.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def boundary_margin(radius, margin_ratio=DEFAULT_MARGIN_RATIO, margin_meters=DEFAULT_MARGIN_METERS):
+    """Width of the band around the radius where the exact geodesic is used."""
+    return max(margin_meters, radius * margin_ratio)
+
+
+def within_radius(lat, lon, centre_lat, centre_lon, radius,
+                  margin_ratio=DEFAULT_MARGIN_RATIO, margin_meters=DEFAULT_MARGIN_METERS):
+    """
+    Checks whether a point lies inside the class geofence.
+
+    Returns:
+        tuple: (inside, distance_in_meters). The distance is the haversine estimate
+        unless the point was close enough to the boundary to need the geodesic.
+    """
+    distance = haversine_distance(lat, lon, centre_lat, centre_lon)
+    if abs(distance - radius) <= boundary_margin(radius, margin_ratio, margin_meters):
+        from geopy.distance import geodesic
+        distance = geodesic((lat, lon), (centre_lat, centre_lon)).meters
+    return distance <= radius, distance
+
+
+def haversine_distances(lats, lons, centre_lat, centre_lon):
+    """Vectorised haversine distance from every point to the centre, in meters."""
+    import numpy as np
+
+    phi1 = np.radians(np.asarray(lats, dtype=float))
+    lmb1 = np.radians(np.asarray(lons, dtype=float))
+    phi2 = math.radians(centre_lat)
+    dphi = phi2 - phi1
+    dlmb = math.radians(centre_lon) - lmb1
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * math.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def batch_within_radius(lats, lons, centre_lat, centre_lon, radius,
+                        margin_ratio=DEFAULT_MARGIN_RATIO, margin_meters=DEFAULT_MARGIN_METERS):
+    """
+    Evaluates a whole set of submissions against one geofence at once.
+    Only points in the boundary band fall back to the exact geodesic.
+
+    Returns:
+        tuple: (inside, distances) as NumPy arrays aligned with the inputs.
+    """
+    import numpy as np
+    from geopy.distance import geodesic
+
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    distances = haversine_distances(lats, lons, centre_lat, centre_lon)
+
+    near_boundary = np.abs(distances - radius) <= boundary_margin(radius, margin_ratio, margin_meters)
+    for i in np.flatnonzero(near_boundary):
+        distances[i] = geodesic((lats[i], lons[i]), (centre_lat, centre_lon)).meters
+
+    return distances <= radius, distances
@@ -0,0 +1,47 @@
+import os
+
+from config import Config
+
+# GUNICORN_PRELOAD=1 builds the app once in the master and forks the workers from it,
+# so they start in milliseconds and share the imported code copy-on-write
+preload_app = bool(int(os.getenv('GUNICORN_PRELOAD', 0)))
+
+# Threaded workers: a live check-in feed (/session/<id>/live) holds its thread for up to
+# LIVE_FEED_MAX_SECONDS, which would block a sync worker until the arbiter kills it (and
+# its check-in queue with it). Streams don't hold a DB connection, so DB_POOL_SIZE only
+# needs to cover the threads serving ordinary requests at once. LIVE_FEED_MAX_CLIENTS is
+# derived from the thread count so streams can't take the threads check-ins need.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = Config.GUNICORN_THREADS
+
+
+def on_starting(server):
+    # Worker metrics from the last run would otherwise be added to this one's
+    metrics_dir = os.getenv('METRICS_DIR')
+    if metrics_dir:
+        from metrics import clear_folder
+        clear_folder(metrics_dir)
+
+
+def when_ready(server):
+    if preload_app:
+        # Import the analytics stack (pandas) once here rather than in every worker on first use
+        import attendance_analytics  # noqa: F401
+
+
+def post_fork(server, worker):
+    # Connections opened in the master (there shouldn't be any) must not be shared with the workers
+    if not preload_app:
+        return
+    from app import db, background_context
+    with background_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Flush check-ins still waiting in the write-behind queue before the worker goes away.
+    from app import checkin_queue, attendance_journal, metrics
+    checkin_queue.stop()
+    attendance_journal.close()
+    metrics.stop()
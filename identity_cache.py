@@ -0,0 +1,93 @@
+"""
+Cached identity of the logged-in user for Flask-Login.
+
+`load_user` used to fetch the User row on every request, and pages then
+fetched it again and lazily loaded its organisation. Instead the user and
+their organisation are read together in one query into an immutable
+`Identity` snapshot, kept in a per-process TTL + LRU cache (the same
+SessionCache the check-in path uses) and wrapped in a read-only `CachedUser`
+that Flask-Login hands out as `current_user`.
+
+Entries are dropped when a User or Organisation row is updated or deleted
+through the ORM (after the commit, so a concurrent request can't re-cache
+the old row), and otherwise expire after the TTL, which bounds how long
+another worker can serve a stale snapshot.
+"""
+from collections import namedtuple
+
+from flask_login import UserMixin
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from session_cache import SessionCache
+
+Identity = namedtuple(
+    'Identity',
+    'id email name role logo_filename organisation_id organisation_name organisation_logo'
+)
+
+
+class CachedUser(UserMixin):
+    """Read-only stand-in for a User row; load the row to change anything."""
+
+    def __init__(self, identity):
+        object.__setattr__(self, '_identity', identity)
+
+    def __getattr__(self, name):
+        return getattr(self._identity, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"current_user is a cached snapshot; update the User row instead of setting {name}")
+
+    def get_id(self):
+        return str(self._identity.id)
+
+
+class IdentityCache(SessionCache):
+    def __init__(self, db, User, Organisation, maxsize=1024, ttl=60, negative_ttl=10):
+        self.db = db
+        self.User = User
+        self.Organisation = Organisation
+        super().__init__(self._load, maxsize=maxsize, ttl=ttl, negative_ttl=negative_ttl)
+
+    def user(self, user_id):
+        """The CachedUser for `user_id`, or None if there is no such user."""
+        identity = self.get(int(user_id))
+        return CachedUser(identity) if identity is not None else None
+
+    def _load(self, user_id):
+        User, Organisation = self.User, self.Organisation
+        row = self.db.session.execute(
+            select(User.id, User.email, User.name, User.role, User.logo_filename, User.organisation_id,
+                   Organisation.name, Organisation.logo_filename)
+            .outerjoin(Organisation, Organisation.id == User.organisation_id)
+            .where(User.id == user_id)
+        ).first()
+        return Identity(*row) if row else None
+
+    def invalidate_organisation(self, organisation_id):
+        with self._lock:
+            for user_id, (identity, _) in list(self._entries.items()):
+                if identity is not None and identity.organisation_id == organisation_id:
+                    del self._entries[user_id]
+
+    def install(self):
+        """Drops cached identities whose User or Organisation row a commit changed."""
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+
+    def _after_flush(self, session, flush_context):
+        changed = session.info.setdefault('identity_changes', set())
+        for obj in list(session.dirty) + list(session.deleted):
+            if isinstance(obj, self.User):
+                changed.add(('user', obj.id))
+            elif isinstance(obj, self.Organisation):
+                changed.add(('organisation', obj.id))
+
+    def _after_commit(self, session):
+        for kind, key in session.info.pop('identity_changes', ()):
+            if kind == 'user':
+                self.invalidate(key)
+            else:
+                self.invalidate_organisation(key)
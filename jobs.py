@@ -0,0 +1,283 @@
+"""
+Small database-backed job runner.
+
+Jobs are rows in the `job` table, so they survive restarts and any gunicorn
+worker can pick them up; no broker is needed beyond the app's own database.
+Each process runs one dispatcher thread that claims due jobs with a
+conditional UPDATE and hands them to a thread pool. Handlers report progress
+through a callback, failures are retried with exponential backoff, and jobs
+left `running` by a worker that died are re-queued once their lease expires.
+While a process is alive its dispatcher renews the lease of every job it is
+running, tracked downloads included, so a slow handler is never run twice.
+"""
+import os
+import threading
+import time
+import weakref
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+
+class JobRunner:
+    def __init__(self, db, Job, workers=2, poll_interval=1.0, lease_seconds=300,
+                 heartbeat_seconds=None, retry_base_seconds=5):
+        self.app = None
+        self.db = db
+        self.Job = Job
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds or lease_seconds / 5
+        self.retry_base_seconds = retry_base_seconds
+        self.handlers = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._thread = None
+        self._pid = None
+        self._running = 0
+        self._executing = set()
+        # Weak, so a download whose response is dropped without being closed stops
+        # being renewed and is failed once its lease runs out
+        self._tracked = weakref.WeakSet()
+        self._next_heartbeat = 0.0
+
+    def init_app(self, app):
+        """The app whose context the dispatcher and workers run in."""
+        self.app = app
+
+    def handler(self, kind):
+        """Decorator registering `fn(payload, progress)` as the handler for a job kind."""
+        def register(fn):
+            self.handlers[kind] = fn
+            return fn
+        return register
+
+    def enqueue(self, kind, payload=None, user_id=None, max_attempts=3, run_after=None):
+        """Stores a job and wakes the dispatcher. Returns the new job id."""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job = self.Job(
+            kind=kind,
+            payload=payload or {},
+            user_id=user_id,
+            max_attempts=max_attempts,
+            run_after=run_after or datetime.utcnow(),
+        )
+        self.db.session.add(job)
+        self.db.session.commit()
+        self.start()
+        self._wake.set()
+        return job.id
+
+    def track(self, kind, payload=None, user_id=None):
+        """
+        Records work that runs inside the current request (e.g. a streamed download)
+        as a running job, so its progress can be polled like any other job.
+        """
+        now = datetime.utcnow()
+        job = self.Job(kind=kind, payload=payload or {}, user_id=user_id, status='running',
+                       attempts=1, max_attempts=1, run_after=now, started_at=now, heartbeat_at=now)
+        self.db.session.add(job)
+        self.db.session.commit()
+        self.start()  # its dispatcher renews the lease while the download runs
+        tracked = TrackedJob(self.db, self.Job, job.id)
+        with self._lock:
+            self._tracked.add(tracked)
+        return tracked
+
+    def start(self):
+        # Started lazily (and again after a fork) so it works with gunicorn --preload.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._running = 0
+            # Jobs copied from the parent across a fork aren't running here
+            self._executing = set()
+            self._tracked = weakref.WeakSet()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            self._thread = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    if time.monotonic() >= self._next_heartbeat:
+                        self._heartbeat()
+                        self._next_heartbeat = time.monotonic() + self.heartbeat_seconds
+                    self._requeue_stale()
+                    while self._running < self.workers and not self._stop.is_set():
+                        job_id = self._claim_next()
+                        if job_id is None:
+                            break
+                        with self._lock:
+                            self._running += 1
+                        self._executor.submit(self._execute, job_id)
+            except Exception as e:
+                print(f"[JOBS] Dispatcher error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _claim_next(self):
+        Job = self.Job
+        now = datetime.utcnow()
+        candidates = self.db.session.execute(
+            select(Job.id).where(Job.status == 'queued', Job.run_after <= now)
+            .order_by(Job.run_after, Job.id).limit(self.workers)
+        ).scalars().all()
+        for job_id in candidates:
+            # Only one worker process wins the conditional UPDATE
+            claimed = self.db.session.execute(
+                update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', started_at=now, heartbeat_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            self.db.session.commit()
+            if claimed:
+                return job_id
+        return None
+
+    def _heartbeat(self):
+        """Renews the lease of the jobs this process is running."""
+        with self._lock:
+            job_ids = self._executing | {tracked.id for tracked in self._tracked if not tracked.done}
+        if not job_ids:
+            return
+        Job = self.Job
+        self.db.session.execute(
+            update(Job).where(Job.id.in_(job_ids), Job.status == 'running')
+            .values(heartbeat_at=datetime.utcnow())
+        )
+        self.db.session.commit()
+
+    def _requeue_stale(self):
+        Job = self.Job
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        stale = self.db.session.execute(
+            update(Job).where(Job.status == 'running', Job.heartbeat_at < cutoff, Job.kind.in_(self.handlers))
+            .values(status='queued', message='Re-queued after the worker running it stopped')
+        ).rowcount
+        # Tracked jobs have no handler to re-run them
+        self.db.session.execute(
+            update(Job).where(Job.status == 'running', Job.heartbeat_at < cutoff, Job.kind.not_in(self.handlers))
+            .values(status='failed', message='The worker running it stopped', finished_at=datetime.utcnow())
+        )
+        self.db.session.commit()
+        if stale:
+            print(f"[JOBS] Re-queued {stale} stale job(s)")
+
+    def _execute(self, job_id):
+        with self._lock:
+            self._executing.add(job_id)
+        try:
+            with self.app.app_context():
+                job = self.db.session.get(self.Job, job_id)
+                handler = self.handlers.get(job.kind)
+
+                def progress(fraction, message=None):
+                    values = {'progress': max(0.0, min(1.0, float(fraction))), 'heartbeat_at': datetime.utcnow()}
+                    if message is not None:
+                        values['message'] = message
+                    # Separate connection so progress is visible while the handler's
+                    # own transaction is still open. Progress is best-effort.
+                    try:
+                        with self.db.engine.begin() as conn:
+                            conn.execute(update(self.Job).where(self.Job.id == job_id).values(**values))
+                    except Exception as e:
+                        print(f"[JOBS] Progress update for job {job_id} failed: {e}")
+
+                try:
+                    if handler is None:
+                        raise RuntimeError(f"No handler registered for job kind '{job.kind}'")
+                    result = handler(dict(job.payload or {}), progress)
+                except Exception as e:
+                    self.db.session.rollback()
+                    self._failed(job_id, e)
+                else:
+                    job = self.db.session.get(self.Job, job_id)
+                    job.status = 'succeeded'
+                    job.progress = 1.0
+                    job.result = result
+                    job.finished_at = datetime.utcnow()
+                    self.db.session.commit()
+        except Exception as e:
+            print(f"[JOBS] Job {job_id} could not be finalised: {e}")
+        finally:
+            with self._lock:
+                self._executing.discard(job_id)
+                self._running -= 1
+            self._wake.set()
+
+    def _failed(self, job_id, error):
+        job = self.db.session.get(self.Job, job_id)
+        job.message = f"{type(error).__name__}: {error}"
+        if job.attempts < job.max_attempts:
+            delay = self.retry_base_seconds * (2 ** (job.attempts - 1))
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+            print(f"[JOBS] {job.kind} #{job.id} failed (attempt {job.attempts}), retrying in {delay}s: {error}")
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            print(f"[JOBS] {job.kind} #{job.id} failed permanently: {error}")
+            traceback.print_exception(error)
+        self.db.session.commit()
+
+
+class TrackedJob:
+    def __init__(self, db, Job, job_id):
+        self.db = db
+        self.Job = Job
+        self.id = job_id
+        self.done = False
+
+    def _set(self, **values):
+        values['heartbeat_at'] = datetime.utcnow()
+        with self.db.engine.begin() as conn:
+            conn.execute(update(self.Job).where(self.Job.id == self.id).values(**values))
+
+    def progress(self, fraction, message=None):
+        values = {'progress': max(0.0, min(1.0, float(fraction)))}
+        if message is not None:
+            values['message'] = message
+        # Best-effort, like progress of queued jobs: a busy database mustn't break the download.
+        try:
+            self._set(**values)
+        except Exception as e:
+            print(f"[JOBS] Progress update for job {self.id} failed: {e}")
+
+    def finish(self, result=None):
+        self.done = True
+        self._set(status='succeeded', progress=1.0, result=result, finished_at=datetime.utcnow())
+
+    def fail(self, message):
+        self.done = True
+        self._set(status='failed', message=message, finished_at=datetime.utcnow())
+
+
+def job_to_dict(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'result': job.result,
+        'attempts': job.attempts,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
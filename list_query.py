@@ -0,0 +1,163 @@
+"""
+Keyset pagination, sorting and filtering for the dashboard list endpoints.
+
+A page is fetched with `WHERE (sort_column, id) > (last_sort_value, last_id)
+ORDER BY sort_column, id LIMIT n`. That reads only the rows it returns
+whatever page is requested, unlike OFFSET, which walks every skipped row.
+Positions are passed back and forth as opaque cursor strings.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import func, or_, select, tuple_
+
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+
+
+class ListSpec:
+    """
+    Describes one list endpoint.
+
+    Args:
+        model: Model whose rows are listed.
+        org_column: Column holding the owning organisation id.
+        sortable (dict): Public sort name -> column. The first entry is the default.
+        searchable (list): Columns matched by the free-text `q` parameter.
+        filters (dict): Query parameter -> column, matched exactly.
+        serialize (callable): Turns a model instance into a JSON-able dict.
+    """
+
+    def __init__(self, model, org_column, sortable, searchable, filters, serialize):
+        self.model = model
+        self.org_column = org_column
+        self.sortable = sortable
+        self.searchable = searchable
+        self.filters = filters
+        self.serialize = serialize
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns=None):
+    """
+    The values of a cursor from `encode_cursor`. With `columns`, each value is
+    checked against (and parsed into) its column's Python type, so a tampered
+    cursor is a ValueError rather than a database error.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError('Invalid cursor')
+    if columns is not None:
+        values = [_cursor_value(value, column) for value, column in zip(values, columns)]
+    return values
+
+
+def _cursor_value(value, column):
+    python_type = column.type.python_type
+    if python_type in (datetime, date) and isinstance(value, str):
+        try:
+            return python_type.fromisoformat(value)
+        except ValueError:
+            raise ValueError('Invalid cursor')
+    if isinstance(value, bool) or not isinstance(value, python_type):
+        raise ValueError('Invalid cursor')
+    return value
+
+
+def _sort_key(column):
+    # NULLs can't be compared in a row value, so nullable columns sort as ''
+    return column if not column.nullable else func.coalesce(column, '')
+
+
+def list_page(db_session, spec, organisation_id, args):
+    """
+    Runs one page of a list query.
+
+    `args` is the request's query string: `limit`, `sort`, `dir` (asc|desc),
+    `q`, any of the spec's filters, and `after` or `before` (a cursor from a
+    previous response). Pass `count=1` to also get the filtered total.
+
+    Returns:
+        dict: rows, next (cursor or None), prev (cursor or None), and total when asked for.
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be a number')
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    sort_name = args.get('sort') or next(iter(spec.sortable))
+    if sort_name not in spec.sortable:
+        raise ValueError(f"sort must be one of {', '.join(spec.sortable)}")
+    descending = args.get('dir', 'asc').lower() == 'desc'
+
+    model_id = spec.model.id
+    sort_key = _sort_key(spec.sortable[sort_name])
+    position = tuple_(sort_key, model_id)
+
+    stmt = select(spec.model).where(spec.org_column == organisation_id)
+    q = (args.get('q') or '').strip()
+    if q:
+        pattern = f"%{q}%"
+        stmt = stmt.where(or_(*[column.ilike(pattern) for column in spec.searchable]))
+    for param, column in spec.filters.items():
+        value = args.get(param)
+        if value:
+            stmt = stmt.where(column == value)
+    filtered = stmt
+
+    after, before = args.get('after'), args.get('before')
+    backwards = bool(before) and not after
+    if after or before:
+        values = tuple_(*decode_cursor(after or before, [spec.sortable[sort_name], model_id]))
+        forward_cmp = position < values if descending else position > values
+        backward_cmp = position > values if descending else position < values
+        stmt = stmt.where(backward_cmp if backwards else forward_cmp)
+
+    # Walking backwards reads in reverse order and flips the page afterwards.
+    ascending = descending == backwards
+    order = [sort_key.asc(), model_id.asc()] if ascending else [sort_key.desc(), model_id.desc()]
+    rows = db_session.execute(stmt.order_by(*order).limit(limit + 1)).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def cursor_of(obj):
+        value = getattr(obj, spec.sortable[sort_name].key)
+        return encode_cursor(['' if value is None else value, obj.id])
+
+    page = {
+        'rows': [spec.serialize(obj) for obj in rows],
+        'next': cursor_of(rows[-1]) if rows and (has_more or backwards) else None,
+        'prev': cursor_of(rows[0]) if rows and ((has_more and backwards) or (after and not backwards)) else None,
+        'sort': sort_name,
+        'dir': 'desc' if descending else 'asc',
+        'limit': limit,
+    }
+    if args.get('count'):
+        page['total'] = db_session.execute(
+            select(func.count()).select_from(filtered.order_by(None).subquery())
+        ).scalar()
+    return page
+
+
+def distinct_values(db_session, spec, organisation_id, limit=500):
+    """Distinct non-empty values of each filter column, to fill the filter dropdowns."""
+    facets = {}
+    for param, column in spec.filters.items():
+        facets[param] = db_session.execute(
+            select(column).where(spec.org_column == organisation_id, column.isnot(None), column != '')
+            .distinct().order_by(column).limit(limit)
+        ).scalars().all()
+    return facets
@@ -0,0 +1,193 @@
+"""
+Live check-in feed for lecturer dashboards (Server-Sent Events).
+
+Each worker process runs one poller thread that reads new attendance rows for
+the sessions someone is watching, in a single query per tick, and fans them
+out to every connected client of that session. Client count doesn't change
+the database load. The check-in writer nudges the poller after each batch,
+so check-ins flushed by the same worker show up without waiting a full tick.
+
+Events carry the highest attendance id sent so far as their SSE id, so a
+reconnecting EventSource resumes with Last-Event-ID. Each event holds a list
+of check-ins; a client is sent at most one event per `min_interval`, so
+under load updates arrive in batches instead of one event per check-in.
+A client that falls more than `queue_limit` rows behind is caught up from
+the database instead of from memory.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+
+class Subscription:
+    def __init__(self, session_id, limit):
+        self.session_id = session_id
+        self.limit = limit
+        self._rows = []
+        self._overflowed = False
+        self._cond = threading.Condition()
+
+    def put(self, rows):
+        with self._cond:
+            if len(self._rows) + len(rows) > self.limit:
+                self._rows = []
+                self._overflowed = True
+            else:
+                self._rows.extend(rows)
+            self._cond.notify()
+
+    def take(self, timeout):
+        """Waits up to `timeout` seconds; returns (rows, overflowed)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._rows or self._overflowed, timeout)
+            rows, overflowed = self._rows, self._overflowed
+            self._rows, self._overflowed = [], False
+            return rows, overflowed
+
+
+class LiveFeed:
+    """
+    Args:
+        load_since (callable): `(session_ids, after_id)` -> check-in dicts with an `id`
+            and `session_id`, ordered by id.
+        max_id (callable): Highest attendance id stored, where polling starts.
+        reorder_window (int): Ids below the newest one that are re-read each tick, so
+            rows committed out of id order by another worker are still delivered.
+    """
+
+    def __init__(self, load_since, max_id, poll_interval=1.0, min_interval=0.25, queue_limit=1000,
+                 reorder_window=500, heartbeat=15.0, max_clients=500):
+        self.load_since = load_since
+        self.max_id = max_id
+        self.poll_interval = poll_interval
+        self.min_interval = min_interval
+        self.queue_limit = queue_limit
+        self.reorder_window = reorder_window
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._last_id = None
+        self._seen = set()
+        self.stats = {'clients': 0, 'polls': 0, 'delivered': 0, 'events': 0, 'overflows': 0}
+
+    def subscribe(self, session_id):
+        """Registers a client of `session_id`; None when the worker is at `max_clients`."""
+        self._ensure_started()
+        with self._lock:
+            if self.stats['clients'] >= self.max_clients:
+                return None
+            subscription = Subscription(session_id, self.queue_limit)
+            self._subscribers[session_id].add(subscription)
+            self.stats['clients'] += 1
+        self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.session_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self.stats['clients'] -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.session_id]
+
+    def notify(self):
+        """Polls now instead of at the next tick (called after check-ins are committed)."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stream(self, session_id, subscription, resume_after=0, max_seconds=3600):
+        """
+        Yields the SSE text for one client: the session's check-ins after
+        `resume_after`, then new ones as they arrive, until `max_seconds` pass
+        (the browser then reconnects and resumes).
+        """
+        try:
+            sent = set()
+            last_id = resume_after
+            yield f"retry: {int(self.poll_interval * 2000)}\n\n"
+            rows = self.load_since([session_id], max(0, resume_after - self.reorder_window))
+            deadline = time.monotonic() + max_seconds
+            while True:
+                rows = [row for row in rows if row['id'] not in sent]
+                if rows:
+                    sent.update(row['id'] for row in rows)
+                    last_id = max(last_id, max(row['id'] for row in rows))
+                    self.stats['events'] += 1
+                    yield f"id: {last_id}\nevent: checkins\ndata: {json.dumps(rows, separators=(',', ':'))}\n\n"
+                    # Let the next burst pile up so it goes out as one event
+                    time.sleep(self.min_interval)
+                elif time.monotonic() >= deadline:
+                    return
+                else:
+                    yield ": keepalive\n\n"
+                rows, overflowed = subscription.take(self.heartbeat)
+                if overflowed:
+                    self.stats['overflows'] += 1
+                    rows = self.load_since([session_id], max(0, last_id - self.reorder_window))
+        finally:
+            self.unsubscribe(subscription)
+
+    def _ensure_started(self):
+        # Lazy and fork-aware, like the check-in queue and the journal writer.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._subscribers = defaultdict(set)
+                self.stats['clients'] = 0
+                self._last_id = None
+                self._seen = set()
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"[LIVE] Poll failed: {e}")
+
+    def _poll(self):
+        with self._lock:
+            watched = list(self._subscribers)
+        if self._last_id is None:
+            self._last_id = self.max_id() or 0
+        if not watched:
+            return
+        self.stats['polls'] += 1
+        low = max(0, self._last_id - self.reorder_window)
+        rows = [row for row in self.load_since(watched, low) if row['id'] not in self._seen]
+        if not rows:
+            return
+
+        by_session = defaultdict(list)
+        for row in rows:
+            by_session[row['session_id']].append(row)
+            self._seen.add(row['id'])
+        self._last_id = max(self._last_id, rows[-1]['id'])
+        floor = self._last_id - self.reorder_window
+        self._seen = {row_id for row_id in self._seen if row_id > floor}
+
+        with self._lock:
+            targets = [(subscription, by_session[session_id])
+                       for session_id in by_session for subscription in self._subscribers.get(session_id, ())]
+        for subscription, session_rows in targets:
+            subscription.put(session_rows)
+            self.stats['delivered'] += len(session_rows)
@@ -0,0 +1,307 @@
+"""
+Persistent email outbox.
+
+Messages are stored in the `outbox_message` table by the request and sent
+later by a background thread. The sender keeps one authenticated SMTP
+connection open for a whole batch, paces itself to the provider's rate limit
+and retries transient failures with backoff.
+
+Every gunicorn worker runs a sender thread, but only the one holding the
+lease in the `outbox_lease` table sends, so the provider's limit holds for
+the whole deployment rather than per worker. The holder renews the lease
+before each message; if it dies, another worker takes over once the lease
+has expired.
+"""
+import os
+import secrets
+import smtplib
+import socket
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from html import escape
+from string import Template
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+# Compiled once; only the organisation name and code change per message.
+SECRET_CODE_TEMPLATE = Template("""
+<html>
+<body style="font-family: Arial, sans-serif; background-color: #f8f9fa; padding: 20px;">
+    <div style="max-width: 500px; margin:auto; background: white; border-radius: 10px; padding: 30px; text-align: center; box-shadow: 0 4px 12px rgba(0,0,0,0.1);">
+        <img src="https://i.postimg.cc/SsdcCdbG/Locify-email.png" alt="Locify Logo" width="80" style="margin-bottom: 20px;">
+        <h2 style="color:#007bff;">Welcome to Locify - Presence Made Simple. </h2>
+        <p>Hello <strong>$org_name</strong>,</p>
+        <p>Thank you for registering your organisation with our Attendance System.</p>
+        <p style="font-size: 18px; margin-top:20px;">Here is your <strong>Unique Organisation Code</strong>:</p>
+        <div style="font-size: 24px; font-weight: bold; color: #28a745; margin:20px 0;">$secret_code</div>
+        <p>Share this code with your lecturers to let them register under your organisation.</p>
+        <hr style="margin: 30px 0;">
+        <p style="font-size: 12px; color: #888;">&copy; 2025 Locify | All Rights Reserved</p>
+    </div>
+</body>
+</html>
+""")
+
+
+def render_secret_code_email(org_name, secret_code):
+    return SECRET_CODE_TEMPLATE.substitute(org_name=escape(org_name), secret_code=escape(secret_code))
+
+
+class SMTPSender:
+    """
+    Reusable SMTP connection. Connects and logs in on first use and stays
+    connected until `close`. Set `starttls=False` and leave the credentials
+    empty to talk to a local stand-in server (e.g. `python -m aiosmtpd -n -l localhost:1025`).
+    """
+
+    def __init__(self, host, port, user=None, password=None, starttls=True, use_ssl=False, timeout=30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self._server = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            host=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+            port=int(os.getenv("SMTP_PORT", 587)),
+            user=os.getenv("SMTP_USER"),
+            password=os.getenv("SMTP_PASSWORD"),
+            starttls=os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes"),
+            use_ssl=os.getenv("SMTP_SSL", "false").lower() in ("1", "true", "yes"),
+        )
+
+    @property
+    def sender_address(self):
+        return self.user or f"no-reply@{self.host}"
+
+    def connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        self._server = server
+
+    def send(self, to_address, subject, html_body):
+        msg = MIMEText(html_body, "html")
+        msg['Subject'] = subject
+        msg['From'] = self.sender_address
+        msg['To'] = to_address
+        if self._server is None:
+            self.connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Idle connection was dropped by the provider: reconnect once.
+            self.connect()
+            self._server.send_message(msg)
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+def is_transient(error):
+    """Network problems and 4xx replies are worth retrying; 5xx replies are not."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        # Authentication and protocol problems won't fix themselves on retry
+        return False
+    return isinstance(error, (socket.error, TimeoutError))
+
+
+class Outbox:
+    def __init__(self, db, OutboxMessage, OutboxLease, sender_factory=SMTPSender.from_env, batch_size=50,
+                 rate_per_minute=30, max_attempts=5, retry_base_seconds=30, poll_interval=5.0,
+                 lease_seconds=600, sender_lease_seconds=60, timed=None):
+        self.app = None
+        self.db = db
+        self.OutboxMessage = OutboxMessage
+        self.OutboxLease = OutboxLease
+        self.sender_factory = sender_factory
+        self.batch_size = batch_size
+        self.min_interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.sender_lease_seconds = sender_lease_seconds
+        self.timed = timed or (lambda section: nullcontext())  # e.g. Metrics.timed, around each send
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._holder = None
+        self._last_send = 0.0
+
+    def init_app(self, app):
+        """The app whose context the sender runs in."""
+        self.app = app
+
+    def enqueue(self, to_address, subject, html_body):
+        """Stores a message for the background sender. Returns its id."""
+        message = self.OutboxMessage(to_address=to_address, subject=subject, html_body=html_body)
+        self.db.session.add(message)
+        self.db.session.commit()
+        self.start()
+        self._wake.set()
+        return message.id
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='outbox-sender', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    while self.send_pending() and not self._stop.is_set():
+                        pass
+            except Exception as e:
+                print(f"[OUTBOX] Sender error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _hold_lease(self):
+        """Takes or renews the sender lease. False while another process holds it."""
+        Lease = self.OutboxLease
+        if self._holder is None or self._holder[0] != os.getpid():
+            # One holder name per process, so a forked worker doesn't share the master's lease
+            self._holder = (os.getpid(), f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}")
+        holder = self._holder[1]
+        now = datetime.utcnow()
+        held = self.db.session.execute(
+            update(Lease).where(Lease.id == 1, or_(Lease.holder == holder, Lease.holder.is_(None),
+                                                   Lease.expires_at < now))
+            .values(holder=holder, expires_at=now + timedelta(seconds=self.sender_lease_seconds))
+        ).rowcount
+        if not held and self.db.session.get(Lease, 1) is None:
+            # No lease row yet (a database made with create_all): the first sender inserts it
+            self.db.session.add(Lease(id=1, holder=holder,
+                                      expires_at=now + timedelta(seconds=self.sender_lease_seconds)))
+            held = 1
+        try:
+            self.db.session.commit()
+        except IntegrityError:
+            self.db.session.rollback()
+            return False
+        return bool(held)
+
+    def _claim_batch(self):
+        Message = self.OutboxMessage
+        now = datetime.utcnow()
+        # Messages stuck in 'sending' belong to a worker that died mid-batch.
+        self.db.session.execute(
+            update(Message).where(Message.status == 'sending',
+                                  Message.claimed_at < now - timedelta(seconds=self.lease_seconds))
+            .values(status='pending')
+        )
+        ids = self.db.session.execute(
+            select(Message.id).where(Message.status == 'pending', Message.send_after <= now)
+            .order_by(Message.id).limit(self.batch_size)
+        ).scalars().all()
+        claimed = []
+        for message_id in ids:
+            if self.db.session.execute(
+                update(Message).where(Message.id == message_id, Message.status == 'pending')
+                .values(status='sending', claimed_at=now)
+            ).rowcount:
+                claimed.append(message_id)
+        self.db.session.commit()
+        return claimed
+
+    def _pace(self):
+        wait = self._last_send + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_send = time.monotonic()
+
+    def send_pending(self):
+        """
+        Sends one batch over a single connection if this process holds the sender
+        lease. Returns the number of messages attempted.
+        """
+        if not self._hold_lease():
+            return 0
+        claimed = self._claim_batch()
+        if not claimed:
+            return 0
+
+        sender = self.sender_factory()
+        attempted = 0
+        try:
+            for message_id in claimed:
+                self._pace()
+                if not self._hold_lease():
+                    # Another process took over (this one stalled past the lease): hand the rest back
+                    self._unclaim(claimed[attempted:])
+                    break
+                message = self.db.session.get(self.OutboxMessage, message_id)
+                attempted += 1
+                try:
+                    with self.timed('email_send'):
+                        sender.send(message.to_address, message.subject, message.html_body)
+                except Exception as e:
+                    sender.close()
+                    self._failed(message, e)
+                else:
+                    message.status = 'sent'
+                    message.sent_at = datetime.utcnow()
+                    print(f"✅ Email sent to {message.to_address}")
+                message.attempts += 1
+                self.db.session.commit()
+        finally:
+            sender.close()
+        return attempted
+
+    def _unclaim(self, message_ids):
+        Message = self.OutboxMessage
+        self.db.session.execute(
+            update(Message).where(Message.id.in_(message_ids), Message.status == 'sending')
+            .values(status='pending')
+        )
+        self.db.session.commit()
+
+    def _failed(self, message, error):
+        message.last_error = f"{type(error).__name__}: {error}"
+        if is_transient(error) and message.attempts + 1 < self.max_attempts:
+            delay = self.retry_base_seconds * (2 ** message.attempts)
+            message.status = 'pending'
+            message.send_after = datetime.utcnow() + timedelta(seconds=delay)
+            print(f"[OUTBOX] Sending to {message.to_address} failed, retrying in {delay}s: {error}")
+        else:
+            message.status = 'failed'
+            print(f"❌ Error sending email to {message.to_address}: {error}")
@@ -0,0 +1,257 @@
+"""
+Request timing, SQL counting and a Prometheus /metrics endpoint.
+
+`Metrics` keeps counters and latency histograms in memory:
+
+  - wall time per request, by endpoint and method, and requests by status;
+  - SQL statements and their total time per request, from SQLAlchemy's
+    cursor events on every engine (the primary and the replica). A request
+    that runs the same statement `n_plus_one_threshold` times or more is
+    logged as a likely N+1 query;
+  - `with metrics.timed('geofence'):` histograms for named hot sections.
+
+Request timings stop when the view returns its response, so a streamed
+export or QR sheet counts until its first byte.
+
+Each gunicorn worker has its own numbers. With METRICS_DIR set, a worker
+writes a snapshot of them to `<METRICS_DIR>/<pid>-<token>.json` every
+`flush_interval` seconds and on exit, and /metrics adds up every snapshot
+in the folder, including those of workers that have since exited so the
+counters never go backwards. gunicorn.conf.py empties the folder when the
+server starts. Without METRICS_DIR (the dev server) /metrics shows the one
+process.
+"""
+import glob
+import json
+import os
+import secrets
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# name -> (type, help, label names, buckets)
+DEFINITIONS = {
+    'http_requests_total': ('counter', 'Requests handled, by endpoint, method and status.',
+                            ('endpoint', 'method', 'status'), None),
+    'http_request_duration_seconds': ('histogram', 'Wall time per request until the response is returned.',
+                                      ('endpoint', 'method'), LATENCY_BUCKETS),
+    'http_request_sql_statements': ('histogram', 'SQL statements run by one request.',
+                                    ('endpoint',), STATEMENT_BUCKETS),
+    'http_request_sql_seconds': ('histogram', 'Time one request spent in SQL statements.',
+                                 ('endpoint',), LATENCY_BUCKETS),
+    'http_request_n_plus_one_total': ('counter', 'Requests that repeated one SQL statement past the threshold.',
+                                      ('endpoint',), None),
+    'sql_statements_total': ('counter', 'SQL statements, by where they ran (request or background).',
+                             ('context',), None),
+    'sql_seconds_total': ('counter', 'Time spent in SQL statements, by where they ran.', ('context',), None),
+    'section_duration_seconds': ('histogram', 'Time spent in a named hot section.', ('section',), LATENCY_BUCKETS),
+}
+
+
+class Metrics:
+    def __init__(self, folder=None, flush_interval=5.0, n_plus_one_threshold=10):
+        self.folder = folder
+        self.flush_interval = flush_interval
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._counters = Counter()  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        self._listening = False
+        self._thread = None
+        self._pid = None
+        self._path = None
+        self._stop = threading.Event()
+
+    # -------- Recording --------
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            self._counters[(name, labels)] += amount
+
+    def observe(self, name, value, labels=()):
+        buckets = DEFINITIONS[name][3]
+        with self._lock:
+            counts = self._histograms.get((name, labels))
+            if counts is None:
+                counts = self._histograms[(name, labels)] = [0] * (len(buckets) + 2)
+            counts[next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))] += 1
+            counts[-1] += value
+        self._ensure_started()
+
+    @contextmanager
+    def timed(self, section):
+        """Records how long the block takes under section_duration_seconds{section=...}."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('section_duration_seconds', time.perf_counter() - start, (section,))
+
+    # -------- Flask and SQLAlchemy hooks --------
+    def init_app(self, app):
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+
+    def _start_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql = [0, 0.0, Counter()]  # statements, seconds, statement -> runs
+
+    def _end_request(self, response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        statements, seconds, runs = g.pop('metrics_sql')
+        self.inc('http_requests_total', (endpoint, request.method, str(response.status_code)))
+        self.observe('http_request_duration_seconds', elapsed, (endpoint, request.method))
+        self.observe('http_request_sql_statements', statements, (endpoint,))
+        self.observe('http_request_sql_seconds', seconds, (endpoint,))
+
+        statement, repeats = runs.most_common(1)[0] if runs else (None, 0)
+        if repeats >= self.n_plus_one_threshold:
+            self.inc('http_request_n_plus_one_total', (endpoint,))
+            print(f"[METRICS] {request.method} {request.path} ran one statement {repeats} times "
+                  f"({statements} statements, {seconds * 1000:.0f} ms of SQL), likely an N+1 query: "
+                  f"{' '.join(statement.split())[:200]}")
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_start'].pop()
+        in_request = has_request_context() and 'metrics_sql' in g
+        if in_request:
+            sql = g.metrics_sql
+            sql[0] += 1
+            sql[1] += elapsed
+            sql[2][statement] += 1
+        context_label = ('request',) if in_request else ('background',)
+        with self._lock:
+            self._counters[('sql_statements_total', context_label)] += 1
+            self._counters[('sql_seconds_total', context_label)] += elapsed
+
+    # -------- Snapshots shared between workers --------
+    def _ensure_started(self):
+        # Started lazily, and again after a fork, so every gunicorn worker writes its own file
+        if not self.folder or (self._pid == os.getpid() and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._path = os.path.join(self.folder, f"{self._pid}-{secrets.token_hex(4)}.json")
+            if self._thread is not None:
+                # Numbers inherited from the master belong to the master, not this worker
+                self._counters.clear()
+                self._histograms.clear()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(counts)] for (name, labels), counts in self._histograms.items()],
+            }
+
+    def flush(self):
+        """Writes this worker's snapshot for the other workers' /metrics."""
+        if not self.folder or self._path is None or self._pid != os.getpid():
+            return
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            print(f"[METRICS] Could not write {self._path}: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def collect(self):
+        """Every worker's numbers added together: (counters, histograms)."""
+        if not self.folder:
+            snapshots = [self.snapshot()]
+        else:
+            self._ensure_started()
+            self.flush()
+            snapshots = []
+            for path in glob.glob(os.path.join(self.folder, '*.json')):
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # replaced or removed while we read it
+            if self._path is None or not os.path.exists(self._path):
+                snapshots.append(self.snapshot())
+        counters, histograms = Counter(), {}
+        for snap in snapshots:
+            for name, labels, value in snap['counters']:
+                counters[(name, tuple(labels))] += value
+            for name, labels, counts in snap['histograms']:
+                total = histograms.setdefault((name, tuple(labels)), [0] * len(counts))
+                for i, count in enumerate(counts):
+                    total[i] += count
+        return counters, histograms
+
+    def render(self):
+        """All workers' metrics in the Prometheus text format."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, label_names, buckets) in DEFINITIONS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(label_names, labels)} {_number(value)}")
+                continue
+            for (metric, labels), counts in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ['+Inf'], counts[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(label_names + ('le',), labels + (le,))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(label_names, labels)} {_number(counts[-1])}")
+                lines.append(f"{name}_count{_labels(label_names, labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def clear_folder(folder):
+    """Removes the snapshots of a previous run; gunicorn calls this before starting workers."""
+    for path in glob.glob(os.path.join(folder, '*.json')):
+        os.remove(path)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for v in values)
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(names, escaped)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,42 @@
+"""attendance location, shared-device flag and one check-in per student
+
+Replaces manual_migration_attendance.py.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the earliest check-in per student before enforcing uniqueness
+    op.execute("""
+        DELETE FROM attendance
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM attendance GROUP BY session_id, student_id
+        )
+    """)
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('flagged', sa.Boolean(), nullable=True))
+        batch_op.create_unique_constraint('uq_attendance_session_student', ['session_id', 'student_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_attendance_session_student', type_='unique')
+        batch_op.drop_column('flagged')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
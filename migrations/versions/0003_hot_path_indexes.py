@@ -0,0 +1,50 @@
+"""indexes for the dashboard and check-in query shapes
+
+- attendance (session_id, timestamp): per-session listings in time order;
+  plain session_id lookups use the leading column of the unique constraint
+- attendance (timestamp): date-range reports across sessions
+- session_model (user_id, created_at): a lecturer's sessions, newest first
+- session_model (user_id) WHERE status = 'active': a lecturer's open sessions
+- user (organisation_id, role): lecturers of an organisation
+- student, department (organisation_id), courses (org_id): org list pages and counts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_attendance_session_id_timestamp', 'attendance', ['session_id', 'timestamp'], unique=False)
+    op.create_index('ix_attendance_timestamp', 'attendance', ['timestamp'], unique=False)
+    op.create_index('ix_session_model_user_id_created_at', 'session_model', ['user_id', 'created_at'], unique=False)
+    op.create_index(
+        'ix_session_model_active_user_id', 'session_model', ['user_id'], unique=False,
+        postgresql_where=sa.text("status = 'active'"),
+        sqlite_where=sa.text("status = 'active'")
+    )
+    op.create_index('ix_user_organisation_id_role', 'user', ['organisation_id', 'role'], unique=False)
+    op.create_index('ix_student_organisation_id', 'student', ['organisation_id'], unique=False)
+    op.create_index('ix_department_organisation_id', 'department', ['organisation_id'], unique=False)
+    op.create_index('ix_courses_org_id', 'courses', ['org_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_courses_org_id', table_name='courses')
+    op.drop_index('ix_department_organisation_id', table_name='department')
+    op.drop_index('ix_student_organisation_id', table_name='student')
+    op.drop_index('ix_user_organisation_id_role', table_name='user')
+    op.drop_index('ix_session_model_active_user_id', table_name='session_model')
+    op.drop_index('ix_session_model_user_id_created_at', table_name='session_model')
+    op.drop_index('ix_attendance_timestamp', table_name='attendance')
+    op.drop_index('ix_attendance_session_id_timestamp', table_name='attendance')
@@ -0,0 +1,71 @@
+"""session checkin window
+
+- session_model.checkin_closes_at: end of the check-in window, swept by
+  session_expiry.SessionSweeper; closed_at, checkin_count and present_count
+  are filled in when a session is closed
+- session_model (checkin_closes_at) WHERE status = 'active': the sweeper's
+  lookup of expired sessions
+- sessions still marked active get a window of 120 minutes (the default
+  SESSION_CHECKIN_MINUTES) from their creation, so the sweeper closes the
+  stale ones on its first runs
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+DEFAULT_WINDOW = timedelta(minutes=120)
+
+
+def upgrade():
+    with op.batch_alter_table('session_model', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checkin_closes_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('closed_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('checkin_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('present_count', sa.Integer(), nullable=True))
+        batch_op.create_index(
+            'ix_session_model_active_checkin_closes_at', ['checkin_closes_at'], unique=False,
+            postgresql_where=sa.text("status = 'active'"),
+            sqlite_where=sa.text("status = 'active'")
+        )
+
+    session_model = sa.table(
+        'session_model', sa.column('id', sa.Integer), sa.column('status', sa.String),
+        sa.column('created_at', sa.DateTime), sa.column('checkin_closes_at', sa.DateTime),
+    )
+    conn = op.get_bind()
+    now = datetime.utcnow()
+    rows = conn.execute(
+        sa.select(session_model.c.id, session_model.c.created_at).where(session_model.c.status == 'active')
+    ).all()
+    if rows:
+        conn.execute(
+            session_model.update().where(session_model.c.id == sa.bindparam('session_pk'))
+            .values(checkin_closes_at=sa.bindparam('closes_at')),
+            [{'session_pk': row.id, 'closes_at': (row.created_at or now) + DEFAULT_WINDOW} for row in rows]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('session_model', schema=None) as batch_op:
+        batch_op.drop_index(
+            'ix_session_model_active_checkin_closes_at',
+            postgresql_where=sa.text("status = 'active'"),
+            sqlite_where=sa.text("status = 'active'")
+        )
+        batch_op.drop_column('present_count')
+        batch_op.drop_column('checkin_count')
+        batch_op.drop_column('closed_at')
+        batch_op.drop_column('checkin_closes_at')
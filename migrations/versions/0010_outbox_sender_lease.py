@@ -0,0 +1,33 @@
+"""outbox sender lease
+
+- outbox_lease: the single row naming the process allowed to send the
+  email outbox, so SMTP_RATE_PER_MINUTE holds across gunicorn workers
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    outbox_lease = op.create_table('outbox_lease',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('holder', sa.String(length=255), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(outbox_lease, [{'id': 1, 'holder': None, 'expires_at': None}])
+
+
+def downgrade():
+    op.drop_table('outbox_lease')
@@ -0,0 +1,245 @@
+"""
+Per-organisation counters behind the organisation dashboard.
+
+The `org_stats` table holds one row per organisation with its student,
+lecturer, department, course, session and check-in counts, so the dashboard
+reads a single row instead of counting several tables on every load.
+
+Counters move by deltas in the same transaction as the write that caused
+them: ORM inserts and deletes are picked up by a session `after_flush`
+listener, and the bulk write paths (queued check-ins, geofence re-checks)
+report their own deltas. Anything the deltas can't see (student imports,
+raw SQL, a recount racing a write) is corrected by `recount`, which the
+dashboard schedules once a row is older than `reconcile_seconds` and
+`flask reconcile-org-stats` runs on demand.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+COUNTERS = ['student_count', 'lecturer_count', 'department_count', 'course_count',
+            'session_count', 'week_session_count', 'checkin_count', 'present_count']
+
+
+def week_start(now=None):
+    """Monday (UTC) of the week `now` falls in."""
+    now = now or datetime.utcnow()
+    return (now - timedelta(days=now.weekday())).date()
+
+
+class OrgStatsTracker:
+    def __init__(self, OrgStats, Organisation, User, Student, Department, Course, SessionModel, Attendance,
+                 reconcile_seconds=3600):
+        self.OrgStats = OrgStats
+        self.Organisation = Organisation
+        self.User = User
+        self.Student = Student
+        self.Department = Department
+        self.Course = Course
+        self.SessionModel = SessionModel
+        self.Attendance = Attendance
+        self.reconcile_seconds = reconcile_seconds
+
+    def install(self):
+        """Starts counting ORM inserts and deletes of the tracked models."""
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+
+    # ---------- Incremental updates ----------
+    def _after_flush(self, session, flush_context):
+        deltas = defaultdict(lambda: defaultdict(int))
+        users, attendance = [], []
+        for objects, sign in ((session.new, 1), (session.deleted, -1)):
+            for obj in objects:
+                if isinstance(obj, self.Student):
+                    deltas[obj.organisation_id]['student_count'] += sign
+                elif isinstance(obj, self.User):
+                    if obj.role == 'school_lecturer':
+                        deltas[obj.organisation_id]['lecturer_count'] += sign
+                elif isinstance(obj, self.Department):
+                    deltas[obj.organisation_id]['department_count'] += sign
+                elif isinstance(obj, self.Course):
+                    deltas[obj.org_id]['course_count'] += sign
+                elif isinstance(obj, self.SessionModel):
+                    users.append((obj.user_id, obj.created_at, sign))
+                elif isinstance(obj, self.Attendance):
+                    attendance.append((obj.session_id, sign, sign if obj.status == 'Present' else 0))
+        for obj in session.dirty:
+            if isinstance(obj, self.Attendance):
+                history = inspect(obj).attrs.status.history
+                if history.has_changes():
+                    was = 'Present' in (history.deleted or ())
+                    now = obj.status == 'Present'
+                    if was != now:
+                        attendance.append((obj.session_id, 0, 1 if now else -1))
+        if not deltas and not users and not attendance:
+            return
+
+        connection = session.connection()
+        if users:
+            orgs = self._orgs_of_users(connection, {u for u, _, _ in users})
+            this_week = week_start()
+            for user_id, created_at, sign in users:
+                org_id = orgs.get(user_id)
+                deltas[org_id]['session_count'] += sign
+                if week_start(created_at) == this_week:
+                    deltas[org_id]['week_session_count'] += sign
+        if attendance:
+            self._add_attendance(connection, attendance, deltas)
+        self.apply(connection, deltas)
+
+    def record_attendance(self, connection, changes):
+        """
+        Applies check-in deltas written outside the ORM unit of work.
+        `changes` is an iterable of (session_id, checkins, present) deltas.
+        """
+        deltas = defaultdict(lambda: defaultdict(int))
+        self._add_attendance(connection, list(changes), deltas)
+        self.apply(connection, deltas)
+
+    def _add_attendance(self, connection, changes, deltas):
+        orgs = self._orgs_of_sessions(connection, {session_id for session_id, _, _ in changes})
+        for session_id, checkins, present in changes:
+            org_id = orgs.get(session_id)
+            deltas[org_id]['checkin_count'] += checkins
+            deltas[org_id]['present_count'] += present
+
+    def _orgs_of_users(self, connection, user_ids):
+        User = self.User
+        return dict(connection.execute(
+            select(User.id, User.organisation_id).where(User.id.in_(user_ids))
+        ).all())
+
+    def _orgs_of_sessions(self, connection, session_ids):
+        SessionModel, User = self.SessionModel, self.User
+        return dict(connection.execute(
+            select(SessionModel.session_id, User.organisation_id)
+            .join(User, User.id == SessionModel.user_id)
+            .where(SessionModel.session_id.in_(session_ids))
+        ).all())
+
+    def apply(self, connection, deltas):
+        """Adds {org_id: {counter: delta}} to the stored rows; one UPDATE per organisation."""
+        table = self.OrgStats.__table__
+        this_week = week_start()
+        for org_id, counts in deltas.items():
+            counts = {name: delta for name, delta in counts.items() if delta}
+            # Sessions and check-ins of solo lecturers belong to no organisation
+            if org_id is None or not counts:
+                continue
+            values = {name: table.c[name] + delta for name, delta in counts.items() if name != 'week_session_count'}
+            if 'week_session_count' in counts:
+                # The weekly counter starts again from zero when the week changes
+                delta = counts['week_session_count']
+                values['week_session_count'] = case(
+                    (table.c.week_start == this_week, table.c.week_session_count + delta),
+                    else_=max(delta, 0),
+                )
+                values['week_start'] = this_week
+            values['updated_at'] = datetime.utcnow()
+            updated = connection.execute(
+                update(table).where(table.c.organisation_id == org_id).values(**values)
+            ).rowcount
+            if not updated:
+                # No row yet: a recount in this transaction already includes the change
+                self.recount(connection, [org_id])
+
+    # ---------- Full recount ----------
+    def recount(self, connection, org_ids=None):
+        """
+        Recomputes every counter from the source tables, for `org_ids` or for
+        all organisations, creating missing rows. Returns the number of rows written.
+        """
+        Organisation, User, Student, Department, Course, SessionModel, Attendance = (
+            self.Organisation, self.User, self.Student, self.Department, self.Course,
+            self.SessionModel, self.Attendance,
+        )
+        this_week = week_start()
+        monday = datetime.combine(this_week, datetime.min.time())
+
+        def scoped(stmt, column):
+            return stmt.where(column.in_(org_ids)) if org_ids is not None else stmt
+
+        ids = connection.execute(scoped(select(Organisation.id), Organisation.id)).scalars().all()
+        rows = {org_id: dict.fromkeys(COUNTERS, 0) for org_id in ids}
+
+        def fill(stmt, *names):
+            for org_id, *values in connection.execute(stmt):
+                if org_id in rows:
+                    rows[org_id].update({name: int(value or 0) for name, value in zip(names, values)})
+
+        fill(scoped(select(Student.organisation_id, func.count()), Student.organisation_id)
+             .group_by(Student.organisation_id), 'student_count')
+        fill(scoped(select(User.organisation_id, func.count()).where(User.role == 'school_lecturer'),
+                    User.organisation_id).group_by(User.organisation_id), 'lecturer_count')
+        fill(scoped(select(Department.organisation_id, func.count()), Department.organisation_id)
+             .group_by(Department.organisation_id), 'department_count')
+        fill(scoped(select(Course.org_id, func.count()), Course.org_id).group_by(Course.org_id), 'course_count')
+        fill(scoped(select(User.organisation_id, func.count(),
+                           func.sum(case((SessionModel.created_at >= monday, 1), else_=0)))
+                    .join(User, User.id == SessionModel.user_id), User.organisation_id)
+             .group_by(User.organisation_id), 'session_count', 'week_session_count')
+        fill(scoped(select(User.organisation_id, func.count(),
+                           func.sum(case((Attendance.status == 'Present', 1), else_=0)))
+                    .join(SessionModel, SessionModel.session_id == Attendance.session_id)
+                    .join(User, User.id == SessionModel.user_id), User.organisation_id)
+             .group_by(User.organisation_id), 'checkin_count', 'present_count')
+
+        table = self.OrgStats.__table__
+        now = datetime.utcnow()
+        existing = set(connection.execute(
+            select(table.c.organisation_id).where(table.c.organisation_id.in_(ids))
+        ).scalars())
+        for org_id, counts in rows.items():
+            values = dict(counts, week_start=this_week, updated_at=now, reconciled_at=now)
+            if org_id in existing:
+                connection.execute(update(table).where(table.c.organisation_id == org_id).values(**values))
+            else:
+                connection.execute(table.insert().values(organisation_id=org_id, **values))
+        return len(rows)
+
+    # ---------- Reading ----------
+    def read(self, db_session, org_id):
+        """The stats row of an organisation, counted from scratch the first time it's asked for."""
+        row = db_session.get(self.OrgStats, org_id)
+        if row is None:
+            self.recount(db_session.connection(), [org_id])
+            db_session.commit()
+            # Read back from the primary, in case reads are going to a replica that hasn't caught up
+            row = db_session.get(self.OrgStats, org_id, bind_arguments={'bind': db_session.connection()})
+        return row
+
+    def claim_reconcile(self, db_session, row):
+        """
+        True when `row` is due for a recount and this caller should schedule it.
+        The conditional UPDATE lets only one worker win per interval.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.reconcile_seconds)
+        if row.reconciled_at is not None and row.reconciled_at >= cutoff:
+            return False
+        table = self.OrgStats.__table__
+        claimed = db_session.execute(
+            update(table).where(table.c.organisation_id == row.organisation_id,
+                                (table.c.reconciled_at < cutoff) | table.c.reconciled_at.is_(None))
+            .values(reconciled_at=datetime.utcnow())
+        ).rowcount
+        db_session.commit()
+        return bool(claimed)
+
+
+def stats_summary(row):
+    """Dashboard tile values for an `org_stats` row."""
+    current = row.week_start == week_start()
+    return {
+        'students': row.student_count,
+        'lecturers': row.lecturer_count,
+        'departments': row.department_count,
+        'courses': row.course_count,
+        'sessions': row.session_count,
+        'sessions_this_week': row.week_session_count if current else 0,
+        'checkins': row.checkin_count,
+        'attendance_rate': round(100.0 * row.present_count / row.checkin_count, 1) if row.checkin_count else None,
+        'updated_at': row.updated_at,
+    }
@@ -0,0 +1,139 @@
+"""
+Password hashing off the request threads.
+
+Hashing is deliberately slow (scrypt by default), so a login burst at the
+start of term would otherwise have every request thread of every worker
+hashing at once. Here hashes run on a small per-process pool
+(`workers`, about one per CPU); at most `queue_limit` more may wait for it,
+and anything beyond that is refused at once with `HasherBusy` so the route
+can answer 503 instead of piling up. hashlib releases the GIL while
+hashing, so the pool threads run in parallel.
+
+The cost is the Werkzeug method string (e.g. `scrypt:32768:8:1` or
+`pbkdf2:sha256:600000`). A stored hash made with another method is
+re-hashed with the configured one after a successful login (`verify_and_update`).
+`calibrate` times candidate costs on this machine.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool and its queue are full."""
+
+
+def method_of(pwhash):
+    return pwhash.split('$', 1)[0]
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt', workers=None, queue_limit=64, timeout=10.0):
+        self.method = method
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.workers + queue_limit)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._method_id = None
+        self._durations = deque(maxlen=1000)
+        self.stats = {'hashed': 0, 'verified': 0, 'failed': 0, 'upgraded': 0, 'busy': 0}
+
+    def hash(self, password):
+        pwhash = self._run(generate_password_hash, password, self.method)
+        self.stats['hashed'] += 1
+        return pwhash
+
+    def verify(self, pwhash, password):
+        ok = self._run(check_password_hash, pwhash, password)
+        self.stats['verified' if ok else 'failed'] += 1
+        return ok
+
+    def needs_update(self, pwhash):
+        return method_of(pwhash) != self.method_id
+
+    def verify_and_update(self, pwhash, password):
+        """
+        Checks a password. Returns (ok, new_hash), where new_hash is set when the
+        password was right but stored with another cost than the configured one.
+        """
+        if not self.verify(pwhash, password):
+            return False, None
+        if not self.needs_update(pwhash):
+            return True, None
+        try:
+            new_hash = self.hash(password)
+        except HasherBusy:
+            return True, None  # upgrade on a quieter login
+        self.stats['upgraded'] += 1
+        return True, new_hash
+
+    @property
+    def method_id(self):
+        # 'scrypt' is stored as 'scrypt:32768:8:1'; find out once what the configured method expands to
+        if self._method_id is None:
+            self._method_id = method_of(generate_password_hash('calibration', self.method))
+        return self._method_id
+
+    def timings(self):
+        durations = sorted(self._durations)
+        if not durations:
+            return {'count': 0}
+        pick = lambda q: round(durations[min(len(durations) - 1, int(q * len(durations)))] * 1000, 1)
+        return {'count': len(durations), 'p50_ms': pick(0.5), 'p99_ms': pick(0.99)}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._durations.append(time.perf_counter() - start)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.stats['busy'] += 1
+            raise HasherBusy()
+        try:
+            future = self._pool().submit(self._timed, fn, *args)
+            try:
+                return future.result(self.timeout)
+            except FutureTimeout:
+                future.cancel()
+                self.stats['busy'] += 1
+                raise HasherBusy()
+        finally:
+            self._slots.release()
+
+    def _pool(self):
+        # Created lazily, and again after a fork (gunicorn --preload)
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pwhash')
+        return self._executor
+
+
+def calibrate(target_ms=250, candidates=None):
+    """
+    Times each candidate method once on this machine.
+    Returns [(method, milliseconds)] and the costliest method within `target_ms`.
+    """
+    candidates = candidates or [f"scrypt:{2 ** n}:8:1" for n in range(14, 18)]
+    results = []
+    for method in candidates:
+        start = time.perf_counter()
+        generate_password_hash('calibration', method)
+        results.append((method, (time.perf_counter() - start) * 1000))
+    within = [method for method, ms in results if ms <= target_ms]
+    return results, (within[-1] if within else candidates[0])
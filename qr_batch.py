@@ -0,0 +1,217 @@
+"""
+Batch QR sheets for a whole class roster.
+
+QR images are rendered across a process pool and streamed to the client as
+either a printable multi-page PDF (a grid of codes with names) or a ZIP of
+PNGs. Pages are written as soon as their images come back from the pool,
+so the download starts right away. Only a few renders per pool process are
+queued at a time, so memory use doesn't grow with the roster, and the ones
+not yet started are cancelled when a download is abandoned.
+"""
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from qr_generator import render_qr_image
+
+# A4 portrait in PDF points, 3 x 4 codes per page
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+COLUMNS, ROWS = 3, 4
+MARGIN = 36
+QR_SIZE = 150
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Shared process pool, created on first use. Spawned workers only import this module."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool_workers = int(os.getenv('QR_BATCH_PROCESSES', os.cpu_count() or 2))
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def render_all(fn, args):
+    """
+    Yields `fn(a)` for each of `args` in order, rendered in the pool with at most
+    two tasks per process submitted at a time. Tasks still waiting are cancelled
+    when the caller stops early (e.g. the client disconnects and the generator is closed).
+    """
+    pool = get_pool()
+    window = 2 * _pool_workers
+    args = iter(args)
+    pending = deque()
+    try:
+        for a in args:
+            pending.append(pool.submit(fn, a))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def render_png(args):
+    data, logo_path = args
+    buffer = io.BytesIO()
+    render_qr_image(data, logo_path).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_raw(args):
+    """QR as zlib-compressed RGB pixels, ready to embed as a PDF image."""
+    data, logo_path = args
+    img = render_qr_image(data, logo_path).convert('RGB')
+    return img.width, img.height, zlib.compress(img.tobytes(), 6)
+
+
+def _pdf_text(value):
+    text = str(value).encode('latin-1', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+class _PdfWriter:
+    """Minimal streaming PDF writer: objects are emitted in order and the xref comes last."""
+
+    def __init__(self):
+        self.offset = 0
+        self.offsets = {}
+        self.next_id = 4  # 1 catalog, 2 pages, 3 font
+
+    def reserve(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def _emit(self, data):
+        self.offset += len(data)
+        return data
+
+    def header(self):
+        return self._emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def obj(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.offset
+        out = f'{obj_id} 0 obj\n'.encode() + body
+        if stream is not None:
+            out += b'\nstream\n' + stream + b'\nendstream'
+        out += b'\nendobj\n'
+        return self._emit(out)
+
+    def trailer(self, page_ids):
+        kids = ' '.join(f'{p} 0 R' for p in page_ids)
+        out = self.obj(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        out += self.obj(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>'.encode())
+        out += self.obj(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+        xref_at = self.offset
+        size = self.next_id
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        lines += [f'{self.offsets[i]:010d} 00000 n \n' for i in range(1, size)]
+        lines.append(f'trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n')
+        return out + self._emit(''.join(lines).encode())
+
+
+def stream_roster_pdf(entries, logo_path=None, title='', progress=None):
+    """
+    Yields a printable PDF for `entries`, an iterable of (label, qr_data).
+    `progress(done)` is called after each page.
+    """
+    entries = list(entries)
+    per_page = COLUMNS * ROWS
+    cell_w = (PAGE_WIDTH - 2 * MARGIN) / COLUMNS
+    cell_h = (PAGE_HEIGHT - 2 * MARGIN - 20) / ROWS
+    pdf = _PdfWriter()
+    page_ids = []
+
+    yield pdf.header()
+    images = render_all(render_raw, ((data, logo_path) for _, data in entries))
+    try:
+        for start in range(0, len(entries), per_page):
+            page_entries = entries[start:start + per_page]
+            resources, ops = [], []
+            if title:
+                ops.append(f'BT /F1 11 Tf {MARGIN} {PAGE_HEIGHT - MARGIN} Td ({_pdf_text(title)}) Tj ET')
+
+            for i, (label, _) in enumerate(page_entries):
+                width, height, pixels = next(images)
+                image_id = pdf.reserve()
+                yield pdf.obj(image_id, (
+                    f'<< /Type /XObject /Subtype /Image /Width {width} /Height {height} '
+                    f'/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode /Length {len(pixels)} >>'
+                ).encode(), pixels)
+                resources.append(f'/Im{i} {image_id} 0 R')
+
+                col, row = i % COLUMNS, i // COLUMNS
+                x = MARGIN + col * cell_w + (cell_w - QR_SIZE) / 2
+                y = PAGE_HEIGHT - MARGIN - 20 - (row + 1) * cell_h + 20
+                ops.append(f'q {QR_SIZE} 0 0 {QR_SIZE} {x:.1f} {y:.1f} cm /Im{i} Do Q')
+                ops.append(f'BT /F1 9 Tf {x:.1f} {y - 12:.1f} Td ({_pdf_text(str(label)[:40])}) Tj ET')
+
+            content = zlib.compress('\n'.join(ops).encode('latin-1'))
+            content_id = pdf.reserve()
+            yield pdf.obj(content_id, f'<< /Length {len(content)} /Filter /FlateDecode >>'.encode(), content)
+
+            page_id = pdf.reserve()
+            page_ids.append(page_id)
+            yield pdf.obj(page_id, (
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                f'/Resources << /Font << /F1 3 0 R >> /XObject << {" ".join(resources)} >> >> '
+                f'/Contents {content_id} 0 R >>'
+            ).encode())
+            if progress:
+                progress(start + len(page_entries))
+    finally:
+        images.close()  # cancels renders not started yet
+
+    yield pdf.trailer(page_ids)
+
+
+class _ChunkSink:
+    """Write-only file object that collects what zipfile writes so it can be yielded."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def stream_roster_zip(entries, logo_path=None, progress=None, report_every=25):
+    """Yields a ZIP with one PNG per (label, qr_data) entry."""
+    entries = list(entries)
+    sink = _ChunkSink()
+    used = set()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        pngs = render_all(render_png, ((data, logo_path) for _, data in entries))
+        try:
+            for done, ((label, _), png) in enumerate(zip(entries, pngs), start=1):
+                name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in str(label)) or 'qr'
+                while name in used:
+                    name += '_'
+                used.add(name)
+                archive.writestr(f'{name}.png', png)
+                yield sink.drain()
+                if progress and (done % report_every == 0 or done == len(entries)):
+                    progress(done)
+        finally:
+            pngs.close()  # cancels renders not started yet
+    yield sink.drain()
@@ -1,11 +1,108 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
 import qrcode
 from PIL import Image
-import os
-from datetime import datetime
 
 # Ensure QR code directory exists relative to app.py
 QR_CODE_DIR = 'static/qr_codes'
-os.makedirs(QR_CODE_DIR, exist_ok=True)
+# Content-addressed cache: one file per distinct (data, logo, render settings)
+QR_CACHE_SUBDIR = 'c'
+QR_CACHE_DIR = os.path.join(QR_CODE_DIR, QR_CACHE_SUBDIR)
+os.makedirs(QR_CACHE_DIR, exist_ok=True)
+
+# Render settings; part of the cache key so changing them never serves stale images
+RENDER_PARAMS = {
+    'version': 1,
+    'error_correction': 'H',  # High for logo overlay
+    'box_size': 10,
+    'border': 4,
+    'fill_color': 'black',
+    'back_color': 'white',
+    'logo_ratio': 0.2,
+}
+_ERROR_CORRECTION = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+# Disk budget for the cache directory, enforced at most every EVICT_INTERVAL seconds
+QR_CACHE_MAX_BYTES = int(os.getenv('QR_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+QR_CACHE_MAX_AGE = float(os.getenv('QR_CACHE_MAX_AGE_DAYS', 30)) * 86400
+EVICT_INTERVAL = 300
+
+_logo_cache = OrderedDict()
+_LOGO_CACHE_SIZE = 32
+_lock = threading.Lock()
+_last_eviction = 0.0
+
+
+def _logo_identity(logo_path):
+    """Path plus size and mtime, so replacing a logo file changes the cache key."""
+    if not logo_path or not os.path.exists(logo_path):
+        return None
+    st = os.stat(logo_path)
+    return (os.path.abspath(logo_path), st.st_size, st.st_mtime_ns)
+
+
+def qr_cache_key(data, logo_path=None, params=None):
+    params = params or RENDER_PARAMS
+    digest = hashlib.sha256()
+    digest.update(data.encode('utf-8'))
+    digest.update(repr(_logo_identity(logo_path)).encode('utf-8'))
+    digest.update(repr(sorted(params.items())).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _load_logo(identity, size):
+    """Returns the logo decoded and resized to fit `size`, keeping recent ones in memory."""
+    key = (identity, size)
+    with _lock:
+        logo = _logo_cache.get(key)
+        if logo is not None:
+            _logo_cache.move_to_end(key)
+            return logo
+
+    logo = Image.open(identity[0])
+    logo.load()
+    logo.thumbnail((size, size))
+
+    with _lock:
+        _logo_cache[key] = logo
+        while len(_logo_cache) > _LOGO_CACHE_SIZE:
+            _logo_cache.popitem(last=False)
+    return logo
+
+
+def render_qr_image(data, logo_path=None, params=None):
+    """Builds the QR image in memory (no caching)."""
+    params = params or RENDER_PARAMS
+    qr = qrcode.QRCode(
+        version=params['version'],
+        error_correction=_ERROR_CORRECTION[params['error_correction']],
+        box_size=params['box_size'],
+        border=params['border'],
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    qr_img = qr.make_image(fill_color=params['fill_color'], back_color=params['back_color']).convert("RGB")
+
+    identity = _logo_identity(logo_path)
+    if identity:
+        try:
+            qr_width, qr_height = qr_img.size
+            logo = _load_logo(identity, int(qr_width * params['logo_ratio']))
+            pos = ((qr_width - logo.width) // 2, (qr_height - logo.height) // 2)
+            qr_img.paste(logo, pos, mask=logo if logo.mode == "RGBA" else None)
+        except Exception as e:
+            print(f"[WARNING] Logo embedding failed: {e}")
+    return qr_img
 
 
 def generate_qr_code(data: str, filename_prefix: str = "qr_code", logo_path: str = None) -> str:
@@ -13,54 +110,75 @@ def generate_qr_code(data: str, filename_prefix: str = "qr_code", logo_path: str
     Generates a QR code for the given data and saves it to a file.
     Optionally embeds a logo in the center.
 
+    Files are content-addressed: the name is a hash of the data, the logo file and
+    the render settings, so the same payload is rendered and written only once.
+
     Args:
         data (str): The data to encode in the QR code (usually a URL).
-        filename_prefix (str): A prefix for the filename. Defaults to "qr_code".
+        filename_prefix (str): Kept for compatibility; cached files are named by hash.
         logo_path (str): Optional path to a logo image to embed in the QR.
 
     Returns:
-        str: The relative path to the generated QR code image (e.g., 'qr_codes/my_qr_code.png').
+        str: The relative path to the generated QR code image (e.g., 'qr_codes/c/<hash>.png').
     """
     try:
-        # 1️⃣ Create the QR Code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,  # High for logo overlay
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-
-        qr_img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-
-        # 2️⃣ Optional: Embed logo
-        if logo_path and os.path.exists(logo_path):
-            try:
-                logo = Image.open(logo_path)
-
-                # Resize logo to 20% of QR code size
-                qr_width, qr_height = qr_img.size
-                logo_size = int(qr_width * 0.2)
-                logo.thumbnail((logo_size, logo_size))
-
-                # Compute center position
-                pos = ((qr_width - logo.width) // 2, (qr_height - logo.height) // 2)
-                qr_img.paste(logo, pos, mask=logo if logo.mode == "RGBA" else None)
-            except Exception as e:
-                print(f"[WARNING] Logo embedding failed: {e}")
-
-        # 3️⃣ Save QR Code with unique filename
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
-        filename = f"{filename_prefix}_{timestamp}.png"
-        filepath = os.path.join(QR_CODE_DIR, filename)
-
-        qr_img.save(filepath)
-        print(f"[QR_GENERATOR] QR code saved to: {filepath}")
+        key = qr_cache_key(data, logo_path)
+        filename = f"{key}.png"
+        filepath = os.path.join(QR_CACHE_DIR, filename)
+
+        if os.path.exists(filepath):
+            # Cache hit: refresh mtime so eviction treats it as recently used
+            os.utime(filepath)
+        else:
+            qr_img = render_qr_image(data, logo_path)
+            tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+            qr_img.save(tmp_path, format='PNG')
+            os.replace(tmp_path, filepath)
+            print(f"[QR_GENERATOR] QR code saved to: {filepath}")
+            maybe_evict()
 
         # Return relative path for Flask static serving
-        return os.path.join('qr_codes', filename)
+        return '/'.join(['qr_codes', QR_CACHE_SUBDIR, filename])
 
     except Exception as e:
         print(f"[ERROR] generate_qr_code failed: {e}")
         raise
+
+
+def evict_qr_cache(max_bytes=QR_CACHE_MAX_BYTES, max_age=QR_CACHE_MAX_AGE):
+    """
+    Deletes cached QR images unused for longer than `max_age` seconds, then the
+    least recently used ones until the directory fits in `max_bytes`.
+    Returns the number of files removed.
+    """
+    now = time.time()
+    entries = []
+    for entry in os.scandir(QR_CACHE_DIR):
+        if entry.is_file() and entry.name.endswith('.png'):
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+            total -= size
+        except FileNotFoundError:
+            pass
+    if removed:
+        print(f"[QR_GENERATOR] Evicted {removed} cached QR code(s)")
+    return removed
+
+
+def maybe_evict():
+    global _last_eviction
+    now = time.monotonic()
+    if now - _last_eviction < EVICT_INTERVAL:
+        return
+    _last_eviction = now
+    evict_qr_cache()
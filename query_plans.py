@@ -0,0 +1,166 @@
+"""
+EXPLAIN-based regression check for the dashboard queries.
+
+Seeds a realistic amount of data inside a transaction, asks the database for
+the plan of each known dashboard query and fails if any of them reads a hot
+table with a sequential scan. The transaction is rolled back afterwards, so it
+is safe to point at a development or CI database (never run it on production).
+
+Run with `flask check-query-plans`.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text, tuple_
+
+from app import db, Organisation, Department, User, Student, SessionModel, Attendance, Course, Lecturer, OrgStats
+from session_summary import sessions_page_query
+
+HOT_TABLES = {'attendance', 'session_model', 'user', 'student', 'department', 'courses', 'lecturer'}
+
+
+def dashboard_queries(org_id, user_id, session_id):
+    """The query shapes issued by the dashboards, the org stats recount and the org list pages."""
+    return {
+        'org_dashboard: stats row': select(OrgStats).where(OrgStats.organisation_id == org_id),
+        'org stats recount: lecturers': select(func.count()).select_from(User).where(
+            User.organisation_id == org_id, User.role == 'school_lecturer'),
+        'org stats recount: departments': select(func.count()).select_from(Department).where(
+            Department.organisation_id == org_id),
+        'org stats recount: students': select(func.count()).select_from(Student).where(
+            Student.organisation_id == org_id),
+        'org_courses page': select(Course).where(
+            Course.org_id == org_id, tuple_(Course.course_name, Course.id) > ('Course 3', 0)
+        ).order_by(Course.course_name, Course.id).limit(26),
+        'org_students page': select(Student).where(
+            Student.organisation_id == org_id, tuple_(Student.full_name, Student.id) > ('Student 250', 0)
+        ).order_by(Student.full_name, Student.id).limit(26),
+        'org_lecturers page': select(Lecturer).where(
+            Lecturer.organisation_id == org_id, tuple_(Lecturer.full_name, Lecturer.id) > ('Lecturer 3', 0)
+        ).order_by(Lecturer.full_name, Lecturer.id).limit(26),
+        'lecturer dashboard: sessions page': sessions_page_query(SessionModel, Attendance, user_id),
+        'lecturer dashboard: older sessions page': sessions_page_query(
+            SessionModel, Attendance, user_id, before=(datetime.utcnow() - timedelta(days=5), 0)),
+        'lecturer dashboard: active sessions': select(SessionModel).where(
+            SessionModel.user_id == user_id, SessionModel.status == 'active'),
+        'session sweeper: expired sessions': select(SessionModel.id).where(
+            SessionModel.status == 'active', SessionModel.checkin_closes_at <= datetime.utcnow()
+        ).order_by(SessionModel.checkin_closes_at).limit(500),
+        'session attendance': select(Attendance).where(
+            Attendance.session_id == session_id).order_by(Attendance.timestamp),
+    }
+
+
+def seed(conn, orgs=20, students_per_org=500, lecturers_per_org=10, sessions_per_lecturer=20,
+         checkins_per_session=40):
+    """Bulk inserts synthetic rows. Returns ids to plug into the dashboard queries."""
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    tag = rng.randrange(10 ** 8)
+
+    conn.execute(db.insert(Organisation), [
+        {'name': f'plan-org-{tag}-{o}', 'email': f'plan-org-{tag}-{o}@example.com',
+         'secret_code': f'{tag:08d}'[:6] + f'{o:04d}'}
+        for o in range(orgs)
+    ])
+    org_ids = conn.execute(
+        select(Organisation.id).where(Organisation.name.like(f'plan-org-{tag}-%'))).scalars().all()
+
+    departments, students, courses, users, lecturers = [], [], [], [], []
+    for o, org_id in enumerate(org_ids):
+        departments += [{'name': f'Dept {d}', 'organisation_id': org_id} for d in range(5)]
+        courses += [{'org_id': org_id, 'course_name': f'Course {c}', 'course_code': f'C{c}',
+                     'level': '100', 'department': 'Dept'} for c in range(10)]
+        students += [{'student_id': f'P{tag}-{o}-{s}', 'index_number': f'I{tag}-{o}-{s}',
+                      'full_name': f'Student {s}', 'email': f'p{tag}-{o}-{s}@example.com',
+                      'organisation_id': org_id} for s in range(students_per_org)]
+        users += [{'email': f'lect{tag}-{o}-{u}@example.com', 'password_hash': 'x',
+                   'role': 'school_lecturer', 'organisation_id': org_id} for u in range(lecturers_per_org)]
+        lecturers += [{'full_name': f'Lecturer {u}', 'email': f'roster{tag}-{o}-{u}@example.com',
+                       'organisation_id': org_id} for u in range(lecturers_per_org)]
+    conn.execute(db.insert(Department), departments)
+    conn.execute(db.insert(Course), courses)
+    conn.execute(db.insert(Student), students)
+    conn.execute(db.insert(User), users)
+    conn.execute(db.insert(Lecturer), lecturers)
+
+    user_ids = conn.execute(
+        select(User.id).where(User.email.like(f'lect{tag}-%'))).scalars().all()
+    sessions = []
+    for user_id in user_ids:
+        for n in range(sessions_per_lecturer):
+            sessions.append({
+                'session_id': f'PLAN-{tag}-{user_id}-{n}', 'user_id': user_id,
+                'latitude': 6.67, 'longitude': -1.57, 'radius': 50,
+                'status': 'active' if n == sessions_per_lecturer - 1 else 'closed',
+                'created_at': now - timedelta(days=n),
+            })
+    conn.execute(db.insert(SessionModel), sessions)
+
+    attendance = []
+    for s in sessions:
+        for c in range(checkins_per_session):
+            attendance.append({
+                'session_id': s['session_id'], 'student_id': f'P{tag}-{c}', 'status': 'Present',
+                'timestamp': s['created_at'] + timedelta(seconds=c),
+            })
+    conn.execute(db.insert(Attendance), attendance)
+
+    return org_ids[0], user_ids[0], sessions[0]['session_id']
+
+
+def sequential_scans(conn, statement):
+    """Returns the hot tables the plan reads with a full scan."""
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    dialect = conn.dialect.name
+
+    if dialect == 'postgresql':
+        plan = conn.execute(text('EXPLAIN (FORMAT JSON) ' + sql)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        found, stack = [], [plan[0]['Plan']]
+        while stack:
+            node = stack.pop()
+            if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in HOT_TABLES:
+                found.append(node['Relation Name'])
+            stack.extend(node.get('Plans', []))
+        return found
+
+    if dialect == 'sqlite':
+        found = []
+        for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql)):
+            detail = row[-1]
+            # "SCAN student" is a full scan, "SEARCH student USING INDEX ..." is not.
+            if detail.startswith('SCAN ') and 'USING' not in detail:
+                table = detail.split()[1].strip('"')
+                if table in HOT_TABLES:
+                    found.append(table)
+        return found
+
+    raise RuntimeError(f"Query plan check does not support the '{dialect}' dialect")
+
+
+def check_query_plans(**seed_sizes):
+    """
+    Seeds data, checks every dashboard query plan and rolls everything back.
+
+    Returns:
+        dict: query name -> list of tables read with a sequential scan.
+    """
+    results = {}
+    with db.engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            org_id, user_id, session_id = seed(conn, **seed_sizes)
+            if conn.dialect.name == 'postgresql':
+                for table in HOT_TABLES:
+                    conn.execute(text(f'ANALYZE "{table}"'))
+            else:
+                conn.execute(text('ANALYZE'))
+
+            for name, statement in dashboard_queries(org_id, user_id, session_id).items():
+                results[name] = sequential_scans(conn, statement)
+        finally:
+            trans.rollback()
+    return results
@@ -0,0 +1,96 @@
+"""
+In-process throttling for the public check-in routes.
+
+`TokenBucketLimiter` keeps one token bucket per key (an IP address, a device
+key, ...). A bucket holds up to `burst` tokens and refills at `rate` tokens a
+second; a request spends one token or is refused with the seconds until the
+next token, for a 429 `Retry-After`. Buckets live in a bounded LRU, so a
+flood of distinct keys can't grow memory without limit.
+
+`ConcurrencyGate` is admission control: at most `limit` guarded requests run
+at once in a worker and the rest are refused straight away (503), instead of
+queueing behind them until the client or gunicorn times out.
+
+Both are per worker process, like the other caches in this app, so the
+effective limit is the configured one times the number of workers.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    def __init__(self, name, rate, burst, max_keys=100000):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, last refill]
+        self._lock = threading.Lock()
+        self.stats = {'allowed': 0, 'throttled': 0, 'keys': 0}
+
+    def allow(self, key, rate=None, burst=None):
+        """
+        Spends one token of `key`'s bucket. `rate` (tokens/second) and `burst`
+        override the defaults, e.g. with a session's own limits.
+        Returns (allowed, retry_after_seconds).
+        """
+        rate = rate or self.rate
+        burst = burst or self.burst
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                self.stats['keys'] = len(self._buckets)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.stats['allowed'] += 1
+                return True, 0
+            self.stats['throttled'] += 1
+            return False, max(1, math.ceil((1 - bucket[0]) / rate))
+
+
+def per_minute(limit):
+    """(rate per second, burst) for a limit given per minute; bursts of up to a quarter of it."""
+    return limit / 60.0, max(2, math.ceil(limit / 4))
+
+
+def per_minute_at_once(limit):
+    """
+    (rate per second, burst) for a limit given per minute that may all arrive at
+    once, e.g. a whole class checking in at the start of a lecture from behind
+    one campus NAT address.
+    """
+    return limit / 60.0, max(2, limit)
+
+
+class ConcurrencyGate:
+    def __init__(self, limit):
+        self.limit = limit
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.stats = {'admitted': 0, 'rejected': 0, 'in_flight': 0, 'peak': 0}
+
+    def try_enter(self):
+        with self._lock:
+            if self._in_flight >= self.limit:
+                self.stats['rejected'] += 1
+                return False
+            self._in_flight += 1
+            self.stats['admitted'] += 1
+            self.stats['in_flight'] = self._in_flight
+            self.stats['peak'] = max(self.stats['peak'], self._in_flight)
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+            self.stats['in_flight'] = self._in_flight
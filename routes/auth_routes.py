@@ -0,0 +1,241 @@
+"""
+Sign-in and account routes: landing page, login/logout, and registration of
+organisations, school lecturers and solo lecturers.
+"""
+import os
+import secrets
+
+from flask import Blueprint, current_app, flash, redirect, render_template, request, session, url_for
+from flask_login import current_user, login_required, login_user
+from werkzeug.utils import secure_filename
+
+from app import Organisation, User, allowed_logo, csrf, db, password_hasher, send_secret_code
+from password_hashing import HasherBusy
+
+auth_bp = Blueprint('auth', __name__)
+
+
+@auth_bp.route('/')
+def index():
+    return render_template('index.html')
+
+
+# -------- Organisation Registration --------
+@auth_bp.route('/register_org', methods=['GET', 'POST'])
+def register_org():
+    """Register a new organisation admin and generate secret code."""
+    if request.method == 'POST':
+        org_name = request.form['org_name'].strip()
+        org_email = request.form['org_email'].strip()
+        password = request.form['password']
+
+        # Check for existing org or user
+        if Organisation.query.filter_by(name=org_name).first():
+            flash("Organisation already exists.", "danger")
+            return redirect(url_for('auth.register_org'))
+
+        if Organisation.query.filter_by(email=org_email).first():
+            flash("Organisation email already exists.", "danger")
+            return redirect(url_for('auth.register_org'))
+
+        if User.query.filter_by(email=org_email).first():
+            flash("This email is already used for another account. Please log in instead.", "danger")
+            return redirect(url_for('auth.login', role='org_admin'))
+
+        try:
+            password_hash = password_hasher.hash(password)
+        except HasherBusy:
+            flash("Too many people are signing in right now. Please try again in a few seconds.", "warning")
+            return redirect(url_for('auth.register_org'))
+
+        # Generate secret code
+        secret_code = secrets.token_hex(4).upper()
+
+        # Handle logo upload
+        file = request.files.get('logo')
+        filename = None
+        if file and allowed_logo(file.filename):
+            filename = secrets.token_hex(8) + "_" + secure_filename(file.filename)
+            file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+
+        # Create organisation
+        org = Organisation(
+            name=org_name,
+            email=org_email,
+            logo_filename=filename,
+            secret_code=secret_code
+        )
+        db.session.add(org)
+        db.session.commit()
+
+        # Create admin user
+        admin_user = User(
+            email=org_email,
+            password_hash=password_hash,
+            role='org_admin',
+            logo_filename=filename,
+            organisation_id=org.id
+        )
+        db.session.add(admin_user)
+        db.session.commit()
+
+        # Send secret code email
+        send_secret_code(org_email, org_name, secret_code)
+
+        flash(f"Organisation registered successfully! Your secret code is {secret_code}. Check your email.", "success")
+        return redirect(url_for('auth.login', role='org_admin'))
+
+    return render_template('register_org.html')
+
+
+# -------- School Lecturer Registration --------
+@auth_bp.route('/register_lecturer', methods=['GET', 'POST'])
+def register_lecturer():
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+        secret_code = request.form['secret_code'].strip()
+
+        org = Organisation.query.filter_by(secret_code=secret_code).first()
+        if not org:
+            flash("Invalid secret code. Contact your organisation admin.", "danger")
+            return redirect(url_for('auth.register_lecturer'))
+
+        if User.query.filter_by(email=email).first():
+            flash("Email already exists.", "danger")
+            return redirect(url_for('auth.register_lecturer'))
+
+        try:
+            password_hash = password_hasher.hash(password)
+        except HasherBusy:
+            flash("Too many people are signing in right now. Please try again in a few seconds.", "warning")
+            return redirect(url_for('auth.register_lecturer'))
+
+        user = User(
+            email=email,
+            password_hash=password_hash,
+            role='school_lecturer',
+            organisation_id=org.id
+        )
+        db.session.add(user)
+        db.session.commit()
+
+        flash("Registration successful! Please log in.", "success")
+        return redirect(url_for('auth.login'))
+
+    return render_template('register_lecturer.html')
+
+
+# -------- Solo Lecturer Registration --------
+@auth_bp.route('/register_solo', methods=['GET', 'POST'])
+def register_solo():
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+
+        if User.query.filter_by(email=email).first():
+            flash("Email already exists.", "danger")
+            return redirect(url_for('auth.register_solo'))
+
+        try:
+            password_hash = password_hasher.hash(password)
+        except HasherBusy:
+            flash("Too many people are signing in right now. Please try again in a few seconds.", "warning")
+            return redirect(url_for('auth.register_solo'))
+
+        user = User(
+            email=email,
+            password_hash=password_hash,
+            role='solo_lecturer'
+        )
+        db.session.add(user)
+        db.session.commit()
+
+        flash("Registration successful! Please log in.", "success")
+        return redirect(url_for('auth.login'))
+
+    return render_template('register_solo.html')
+
+
+# -------- Login --------
+@auth_bp.route('/login', methods=['GET', 'POST'])
+@csrf.exempt  # ✅ This disables CSRF only for login
+def login():
+    role = request.args.get('role', '')  # optional: ?role=org_admin
+    if request.method == 'POST':
+        email = request.form['email'].strip()
+        password = request.form['password'].strip()
+
+        user = User.query.filter_by(email=email).first()
+        try:
+            ok, new_hash = password_hasher.verify_and_update(user.password_hash, password) if user else (False, None)
+        except HasherBusy:
+            # Login storm: refuse now rather than queue until gunicorn times out
+            flash("Too many people are signing in right now. Please try again in a few seconds.", "warning")
+            response = current_app.make_response((render_template('login.html', role=role), 503))
+            response.headers['Retry-After'] = '5'
+            return response
+        if not ok:
+            flash("Invalid email or password.", "danger")
+            return redirect(url_for('auth.login', role=role))
+        if new_hash:
+            # Stored with an older cost; keep the one made with the configured method
+            user.password_hash = new_hash
+            db.session.commit()
+
+        # Save session
+        session['logged_in'] = True
+        session['user_id'] = user.id
+        session['email'] = user.email
+        session['role'] = user.role
+        session['organisation_id'] = user.organisation_id
+        session['lecturer_logo'] = user.logo_filename
+
+        login_user(user)  # ✅ Required for Flask-Login
+
+        # ✅ Redirect based on role
+        dashboard_routes = {
+            'org_admin': 'school.org_dashboard',
+            'school_lecturer': 'lecturer.school_lecturer_dashboard',
+            'solo_lecturer': 'lecturer.solo_lecturer_dashboard'
+        }
+        return redirect(url_for(dashboard_routes.get(user.role, 'auth.index')))
+
+    # Only show the "register" link for the clicked role
+    register_links = {
+        'org_admin': url_for('auth.register_org'),
+        'school_lecturer': url_for('auth.register_lecturer'),
+        'solo_lecturer': url_for('auth.register_solo')
+    }
+    register_url = register_links.get(role, '')
+
+    return render_template('login.html', role=role, register_url=register_url)
+
+
+# -------- Logout --------
+@auth_bp.route('/logout')
+def logout():
+    session.clear()
+    flash("Logged out successfully.", "info")
+    return redirect(url_for('auth.index'))
+
+
+@auth_bp.route('/save_name', methods=['POST'])
+@login_required
+def save_name():
+    name = request.form.get('name')
+    if name:
+        # current_user is a cached snapshot; the commit drops it from the identity cache
+        db.session.get(User, current_user.id).name = name
+        db.session.commit()
+        flash('Name updated.', 'success')
+
+    # Redirect based on role
+    if current_user.role == 'org_admin':
+        return redirect(url_for('school.org_dashboard'))
+    elif current_user.role == 'school_lecturer':
+        return redirect(url_for('lecturer.school_lecturer_dashboard'))
+    elif current_user.role == 'solo_lecturer':
+        return redirect(url_for('lecturer.solo_lecturer_dashboard'))
+    else:
+        return redirect(url_for('auth.login'))
@@ -0,0 +1,525 @@
+"""
+Lecturer and attendance routes: lecturer dashboards, student check-in, roster
+QR sheets, attendance exports, analytics, the live feed, session settings and
+background job status.
+"""
+import os
+import secrets
+from datetime import datetime, timedelta
+
+from flask import (
+    Blueprint, Response, current_app, jsonify, redirect, render_template, request, stream_with_context, url_for
+)
+from flask_login import current_user, login_required
+from itsdangerous import BadSignature, Signer
+from werkzeug.utils import secure_filename
+
+from app import (
+    Attendance, Course, Job, SessionModel, Student, User, attendance_journal, checkin_admission, checkin_queue,
+    checkin_registry, csrf, db, get_attendance_analytics, get_ghana_time, job_runner, live_feed, metrics,
+    reevaluate_session_attendance, role_required, session_cache, session_rate_limit, session_sweeper,
+)
+from attendance_export import EXPORT_COLUMNS, FORMATS, arrow_available, iter_batches, measured, stream_export
+from db_routing import read_replica
+from geofence import within_radius
+from jobs import job_to_dict
+from session_expiry import accepting_checkins
+from session_summary import lecturer_sessions
+
+lecturer_bp = Blueprint('lecturer', __name__)
+
+
+# -------- Dashboards --------
+@csrf.exempt
+@lecturer_bp.route('/lecturer/dashboard')
+@role_required('school_lecturer')
+@read_replica
+def school_lecturer_dashboard():
+    return lecturer_dashboard('school_lecturer_dashboard.html')
+
+
+@csrf.exempt
+@lecturer_bp.route('/solo/dashboard')
+@role_required('solo_lecturer')
+@read_replica
+def solo_lecturer_dashboard():
+    return lecturer_dashboard('solo_lecturer_dashboard.html')
+
+
+def lecturer_dashboard(template):
+    """Renders a page of the lecturer's sessions, newest first, with their attendance counts."""
+    try:
+        summary = lecturer_sessions(
+            db.session, SessionModel, Attendance, current_user.id,
+            cursor=request.args.get('before'), limit=current_app.config['DASHBOARD_SESSIONS_PER_PAGE']
+        )
+    except ValueError:
+        return redirect(url_for(request.endpoint))
+    return render_template(
+        template,
+        sessions=summary['sessions'],
+        total_sessions=summary['total_sessions'],
+        active_sessions=summary['active_sessions'],
+        page_checkins=summary['checkins'],
+        older_url=url_for(request.endpoint, before=summary['next']) if summary['next'] else None,
+        newest_url=url_for(request.endpoint) if request.args.get('before') else None,
+    )
+
+
+#---------------------Routes for Attendance-----------------
+@lecturer_bp.route("/attendance")
+@login_required
+def attendance_dashboard():
+    return render_template("attendance_dashboard.html")
+
+
+def device_signer():
+    return Signer(current_app.secret_key, salt='device-key')
+
+
+def device_key_cookie():
+    """The device key this app issued to the browser, or None if it has none or it was tampered with."""
+    try:
+        return device_signer().unsign(request.cookies.get('device_key', '')).decode()
+    except BadSignature:
+        return None
+
+
+@lecturer_bp.route('/checkin/<session_id>')
+@checkin_admission
+def checkin(session_id):
+    """Student check-in page opened from the session QR code."""
+    class_session = session_cache.get(session_id)
+    message_override = None
+    if not class_session:
+        message_override = "This attendance session does not exist."
+    elif not accepting_checkins(class_session):
+        message_override = "This attendance session is no longer accepting check-ins."
+
+    response = current_app.make_response(render_template(
+        'checkin.html',
+        session_id=session_id,
+        student_index=request.args.get('student', ''),
+        hide_geolocation=message_override is not None,
+        message_override=message_override
+    ))
+    if not device_key_cookie():
+        response.set_cookie('device_key', device_signer().sign(secrets.token_hex(16)).decode(),
+                            max_age=60 * 60 * 24 * 365, httponly=True, samesite='Lax')
+    return response
+
+
+@lecturer_bp.route('/submit_attendance', methods=['POST'])
+@csrf.exempt
+@checkin_admission
+def submit_attendance():
+    """
+    Validates a check-in and hands it to the write-behind queue.
+    The row is inserted in the next batch flush, not inside this request.
+    """
+    data = request.get_json(silent=True) or {}
+    session_id = str(data.get('session_id', '')).strip()
+    student_id = str(data.get('student_id', '')).strip()
+    student_name = str(data.get('student_name', '')).strip()
+
+    try:
+        latitude = float(data['latitude'])
+        longitude = float(data['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Your location could not be read. Please try again."}), 400
+
+    if not session_id or not student_id or not student_name:
+        return jsonify({"status": "error", "message": "Name, index number and session are required."}), 400
+
+    class_session = session_cache.get(session_id)
+    if not class_session:
+        return jsonify({"status": "error", "message": "This attendance session does not exist."}), 404
+    if not accepting_checkins(class_session):
+        return jsonify({"status": "error", "message": "This attendance session is no longer accepting check-ins."}), 403
+
+    with metrics.timed('geofence'):
+        inside, distance = within_radius(
+            latitude, longitude, class_session.latitude, class_session.longitude, class_session.radius or 0
+        )
+    if not inside:
+        return jsonify({
+            "status": "error",
+            "message": f"You are {distance:.0f}m from the class location. Move closer and try again."
+        }), 403
+
+    # Only the key issued by the check-in page counts; one sent in the body could be anything
+    device_key = device_key_cookie()
+    refused = session_rate_limit(class_session, device_key)
+    if refused:
+        return refused
+
+    accepted, shared_device = checkin_registry.claim(session_id, student_id, device_key)
+    if not accepted:
+        return jsonify({"status": "error", "message": "You have already checked in for this session."}), 409
+    if shared_device:
+        print(f"[CHECKIN] Device {device_key} reused for {student_id} in session {session_id}")
+
+    record = {
+        'session_id': session_id,
+        'student_id': student_id,
+        'student_name': student_name,
+        'timestamp': datetime.utcnow(),
+        'status': 'Present',
+        'device_key': device_key,
+        'latitude': latitude,
+        'longitude': longitude,
+        'flagged': shared_device,
+    }
+    if not checkin_queue.submit(record):
+        checkin_registry.release(session_id, student_id, device_key)
+        response = jsonify({"status": "error", "message": "Check-in is busy right now. Please try again in a moment."})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    attendance_journal.append(record)
+
+    return jsonify({"status": "success", "message": f"Attendance recorded for {student_name}."}), 202
+
+
+@lecturer_bp.route('/qr/roster/<int:course_id>')
+@login_required
+@read_replica
+def qr_roster(course_id):
+    """
+    Streams personalised check-in QR codes for every student on a course roster,
+    as a printable PDF (default) or a ZIP of PNGs (?format=zip). Progress can be
+    polled at the job URL sent in the X-Job-Status header.
+    """
+    from qr_batch import stream_roster_pdf, stream_roster_zip
+
+    course = db.session.get(Course, course_id)
+    if not course or course.org_id != current_user.organisation_id:
+        return jsonify({'success': False, 'error': 'Course not found'}), 404
+
+    session_id = request.args.get('session_id', '')
+    class_session = SessionModel.query.filter_by(session_id=session_id, user_id=current_user.id).first()
+    if not class_session:
+        return jsonify({'success': False, 'error': 'Choose one of your sessions'}), 400
+
+    # Students have no course enrolment table; the roster is the course's level and department.
+    students = db.session.execute(
+        db.select(Student.student_id, Student.full_name)
+        .where(Student.organisation_id == course.org_id,
+               Student.level == course.level, Student.department == course.department)
+        .order_by(Student.full_name)
+    ).all()
+    entries = [
+        (f"{name} ({student_id})",
+         url_for('lecturer.checkin', session_id=session_id, student=student_id, _external=True))
+        for student_id, name in students
+    ]
+
+    fmt = 'zip' if request.args.get('format') == 'zip' else 'pdf'
+    job = job_runner.track('qr_roster', {'course_id': course_id, 'session_id': session_id, 'format': fmt},
+                           user_id=current_user.id)
+    total = len(entries) or 1
+    logo_path = os.path.join('static', 'images', 'logo.png')
+
+    def report(done):
+        job.progress(done / total, f"{done} of {len(entries)} QR codes")
+
+    def generate():
+        try:
+            with metrics.timed('qr_roster'):
+                if fmt == 'zip':
+                    yield from stream_roster_zip(entries, logo_path, progress=report)
+                else:
+                    title = f"{course.course_code} {course.course_name} - session {session_id}"
+                    yield from stream_roster_pdf(entries, logo_path, title=title, progress=report)
+            job.finish({'count': len(entries)})
+        except GeneratorExit:
+            job.fail('Download cancelled')
+            raise
+        except Exception as e:
+            job.fail(str(e))
+            raise
+
+    filename = secure_filename(f"{course.course_code}_{session_id}_qr.{fmt}")
+    response = Response(stream_with_context(generate()),
+                        mimetype='application/zip' if fmt == 'zip' else 'application/pdf')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Job-Status'] = url_for('lecturer.job_status', job_id=job.id)
+    response.headers['X-Total-Count'] = str(len(entries))
+    return response
+
+
+def export_attendance(stmt, name):
+    """
+    Streams the rows selected by `stmt` as ?format=csv|parquet|arrow, optionally
+    limited to ?start= / ?end= (YYYY-MM-DD, both inclusive). Row count and throughput
+    are recorded on a tracked job, linked in the X-Job-Status header.
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    if fmt != 'csv' and not arrow_available():
+        return jsonify({'success': False, 'error': 'Parquet/Arrow export needs pyarrow installed'}), 501
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        if start:
+            stmt = stmt.where(Attendance.timestamp >= datetime.strptime(start, '%Y-%m-%d'))
+        if end:
+            stmt = stmt.where(Attendance.timestamp < datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start and end must be dates like 2025-01-31'}), 400
+
+    stmt = stmt.order_by(Attendance.timestamp, Attendance.id)
+    job = job_runner.track('attendance_export', {'name': name, 'format': fmt, 'start': start, 'end': end},
+                           user_id=current_user.id)
+    throughput = {}
+
+    def report(rows, seconds):
+        # Recorded on the job once the cursor is closed; writing mid-stream would
+        # contend with the open read on SQLite.
+        throughput.update(rows=rows, seconds=round(seconds, 3),
+                          rows_per_second=round(rows / seconds) if seconds else None)
+
+    def generate():
+        try:
+            batches = measured(iter_batches(db.session, stmt, current_app.config['EXPORT_BATCH_SIZE']), report)
+            yield from stream_export(batches, fmt)
+            job.finish(throughput)
+            print(f"[EXPORT] {name}: {throughput.get('rows', 0)} rows as {fmt} "
+                  f"({throughput.get('rows_per_second')} rows/s)")
+        except GeneratorExit:
+            job.fail('Download cancelled')
+            raise
+        except Exception as e:
+            job.fail(str(e))
+            raise
+
+    mimetype, extension = FORMATS[fmt]
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{secure_filename(name)}.{extension}"'
+    response.headers['X-Job-Status'] = url_for('lecturer.job_status', job_id=job.id)
+    return response
+
+
+def attendance_export_select():
+    return db.select(*[getattr(Attendance, column) for column, _ in EXPORT_COLUMNS])
+
+
+def can_view_session(session_id):
+    """The session's lecturer, or an admin of the lecturer's organisation, may see its attendance."""
+    class_session = SessionModel.query.filter_by(session_id=session_id).first()
+    owner = db.session.get(User, class_session.user_id) if class_session else None
+    return owner is not None and (
+        owner.id == current_user.id
+        or (current_user.role == 'org_admin' and owner.organisation_id == current_user.organisation_id)
+    )
+
+
+@lecturer_bp.route('/export/attendance/session/<session_id>')
+@login_required
+@read_replica
+def export_session_attendance(session_id):
+    if not can_view_session(session_id):
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    stmt = attendance_export_select().where(Attendance.session_id == session_id)
+    return export_attendance(stmt, f"attendance_{session_id}")
+
+
+@lecturer_bp.route('/export/attendance/course/<int:course_id>')
+@login_required
+@read_replica
+def export_course_attendance(course_id):
+    """Attendance of the course's students (its level and department), in sessions the user may see."""
+    course = db.session.get(Course, course_id)
+    if not course or course.org_id != current_user.organisation_id:
+        return jsonify({'success': False, 'error': 'Course not found'}), 404
+    stmt = (
+        attendance_export_select()
+        .join(Student, Student.student_id == Attendance.student_id)
+        .join(SessionModel, SessionModel.session_id == Attendance.session_id)
+        .where(Student.organisation_id == course.org_id,
+               Student.level == course.level, Student.department == course.department)
+    )
+    if current_user.role == 'org_admin':
+        stmt = stmt.join(User, User.id == SessionModel.user_id).where(User.organisation_id == course.org_id)
+    else:
+        stmt = stmt.where(SessionModel.user_id == current_user.id)
+    return export_attendance(stmt, f"attendance_{course.course_code}")
+
+
+@lecturer_bp.route('/export/attendance/organisation')
+@login_required
+@read_replica
+def export_organisation_attendance():
+    if current_user.role != 'org_admin' or not current_user.organisation_id:
+        return jsonify({'success': False, 'error': 'Only organisation admins can export the organisation'}), 403
+    stmt = (
+        attendance_export_select()
+        .join(SessionModel, SessionModel.session_id == Attendance.session_id)
+        .join(User, User.id == SessionModel.user_id)
+        .where(User.organisation_id == current_user.organisation_id)
+    )
+    return export_attendance(stmt, f"attendance_org_{current_user.organisation_id}")
+
+
+@lecturer_bp.route('/api/analytics')
+@login_required
+@read_replica
+def analytics_summary():
+    """
+    Attendance rates and trends for the dashboards, from the per-organisation
+    analytics cache. Lecturers get their own sessions (solo lecturers from a cache
+    of just their sessions); organisation admins also get courses,
+    colleges/faculties/departments, lecturers and at-risk students.
+    """
+    if current_user.organisation_id:
+        result = get_attendance_analytics().for_org(current_user.organisation_id)
+    elif current_user.role == 'solo_lecturer':
+        result = get_attendance_analytics().for_lecturer(current_user.id)
+    else:
+        return jsonify({'success': False, 'error': 'Analytics are available for organisation accounts'}), 404
+    from attendance_analytics import records, weekly_rates
+
+    sessions = result.sessions
+    if current_user.role != 'org_admin' or request.args.get('mine'):
+        sessions = sessions[sessions['user_id'] == current_user.id]
+    today = sessions[sessions['started_at'] >= get_ghana_time().replace(tzinfo=None).replace(
+        hour=0, minute=0, second=0, microsecond=0)]
+    present_today = int(today['present'].sum())
+
+    data = {
+        'generated_at': result.generated_at.isoformat(),
+        'weekly': records(weekly_rates(sessions, result.generated_at), ['week', 'present', 'expected', 'rate']),
+        'today': {'present': present_today, 'absent': int(today['expected'].sum()) - present_today},
+        'sessions': records(sessions.head(20), ['session_id', 'started_at', 'present', 'expected', 'rate']),
+    }
+    if current_user.role == 'org_admin':
+        limit = min(request.args.get('limit', 20, type=int), 200)
+        at_risk = result.students[result.students['at_risk']].sort_values(['rate', 'missed_streak'],
+                                                                          ascending=[True, False])
+        data.update({
+            'courses': records(result.courses.sort_values('rate'),
+                               ['course_id', 'course_code', 'course_name', 'students', 'expected', 'rate', 'trend']),
+            'groups': {name: records(frame.sort_values('rate'), ['name', 'expected', 'rate', 'trend'])
+                       for name, frame in result.groups.items()},
+            'lecturers': records(result.lecturers.sort_values('rate', ascending=False),
+                                 ['user_id', 'name', 'sessions', 'rate']),
+            'at_risk': records(at_risk.head(limit), ['student_id', 'full_name', 'level', 'department', 'expected',
+                                                     'present', 'rate', 'missed_streak', 'trend']),
+            'at_risk_total': int(len(at_risk)),
+        })
+    return jsonify(data)
+
+
+@lecturer_bp.route('/session/<session_id>/live')
+@login_required
+def live_checkins(session_id):
+    """
+    Server-Sent Events stream of a session's check-ins: everything after
+    Last-Event-ID (or ?last_event_id=), then new check-ins as they're committed.
+    """
+    if not can_view_session(session_id):
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    if request.environ.get('wsgi.multiprocess') and not request.environ.get('wsgi.multithread'):
+        # A sync gunicorn worker would be tied up by the stream until its timeout kills it
+        return jsonify({'success': False, 'error': 'Live feed needs a threaded server (see gunicorn.conf.py)'}), 503
+    try:
+        resume_after = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        resume_after = 0
+    # Release this request's DB connection; the stream may stay open for an hour
+    db.session.remove()
+
+    subscription = live_feed.subscribe(session_id)
+    if subscription is None:
+        response = jsonify({'success': False, 'error': 'Too many live viewers right now'})
+        response.headers['Retry-After'] = '10'
+        return response, 503
+    stream = live_feed.stream(session_id, subscription, resume_after,
+                              max_seconds=current_app.config['LIVE_FEED_MAX_SECONDS'])
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@lecturer_bp.route('/session/<session_id>/location', methods=['POST'])
+@login_required
+def update_session_location(session_id):
+    """Corrects a session's class location and re-checks everyone who already checked in."""
+    class_session = SessionModel.query.filter_by(session_id=session_id).first_or_404()
+    if class_session.user_id != current_user.id:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    try:
+        class_session.latitude = float(request.form['latitude'])
+        class_session.longitude = float(request.form['longitude'])
+        if request.form.get('radius'):
+            class_session.radius = int(request.form['radius'])
+    except (KeyError, ValueError):
+        return jsonify({'success': False, 'error': 'Latitude, longitude and radius must be numbers'}), 400
+
+    changed = reevaluate_session_attendance(class_session)
+    db.session.commit()
+    session_cache.invalidate(session_id)
+    return jsonify({'success': True, 'session_id': session_id, 'updated': changed})
+
+
+@lecturer_bp.route('/session/<session_id>/limits', methods=['POST'])
+@login_required
+def update_session_limits(session_id):
+    """
+    Sets a session's check-in limits (requests per minute per IP and per device).
+    An empty value goes back to the app default, e.g. raise the IP limit for a
+    large lecture hall where everyone shares the campus Wi-Fi address (up to
+    CHECKIN_GLOBAL_IP_PER_MINUTE, which applies to every session).
+    """
+    class_session = SessionModel.query.filter_by(session_id=session_id).first_or_404()
+    if class_session.user_id != current_user.id:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    limits = {}
+    for field in ('checkin_ip_per_minute', 'checkin_device_per_minute'):
+        value = request.form.get(field, '').strip()
+        try:
+            limits[field] = int(value) if value else None
+        except ValueError:
+            return jsonify({'success': False, 'error': f'{field} must be a whole number'}), 400
+        if limits[field] is not None and limits[field] < 1:
+            return jsonify({'success': False, 'error': f'{field} must be at least 1'}), 400
+        setattr(class_session, field, limits[field])
+    db.session.commit()
+    session_cache.invalidate(session_id)
+    return jsonify({'success': True, 'session_id': session_id, **limits})
+
+
+@lecturer_bp.route('/session/<session_id>/close', methods=['POST'])
+@login_required
+def close_session(session_id):
+    """
+    Ends a session's check-in window now instead of waiting for it to expire.
+    The session sweeper closes it and stores its counts once the check-ins
+    already accepted have been written.
+    """
+    class_session = SessionModel.query.filter_by(session_id=session_id).first_or_404()
+    if class_session.user_id != current_user.id:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+    closes_at = session_sweeper.end_window(class_session.id)
+    session_cache.invalidate(session_id)
+    return jsonify({'success': True, 'session_id': session_id,
+                    'checkin_closes_at': closes_at.isoformat() if closes_at else None})
+
+
+@lecturer_bp.route('/jobs')
+@login_required
+def job_list():
+    """The current user's most recent background jobs."""
+    jobs = Job.query.filter_by(user_id=current_user.id).order_by(Job.id.desc()).limit(20).all()
+    return jsonify([job_to_dict(job) for job in jobs])
+
+
+@lecturer_bp.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    """Progress and result of a background job, polled by the dashboards."""
+    job = db.session.get(Job, job_id)
+    if not job or job.user_id != current_user.id:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+    return jsonify(job_to_dict(job))
@@ -0,0 +1,66 @@
+"""
+Operations routes: the Prometheus /metrics endpoint and the check-in hot path
+counters. Both show the internals of every worker, so they share one access check.
+"""
+import secrets
+from functools import wraps
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+
+from app import (
+    attendance_analytics_stats, attendance_journal, checkin_gate, checkin_queue, checkin_registry, db,
+    device_limiter, global_ip_limiter, identity_cache, live_feed, metrics, password_hasher, session_cache,
+    session_ip_limiter, session_sweeper,
+)
+from db_routing import RoutingSession
+
+ops_bp = Blueprint('ops', __name__)
+
+
+def ops_access(f):
+    """
+    Lets through requests with METRICS_TOKEN as a Bearer token. Without a
+    token configured the route only answers on the debug server.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = current_app.config['METRICS_TOKEN']
+        if not token:
+            if not current_app.debug:
+                abort(404)
+        elif not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return f(*args, **kwargs)
+    return decorated
+
+
+@ops_bp.route('/metrics')
+@ops_access
+def metrics_page():
+    """Request, SQL and hot-section metrics of every worker, for Prometheus to scrape."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@ops_bp.route('/checkin_stats')
+@ops_access
+def checkin_stats():
+    """Counters for the check-in hot path (queue and session cache)."""
+    return jsonify({
+        'queue': dict(checkin_queue.stats, pending=checkin_queue.pending()),
+        'journal': attendance_journal.stats,
+        'session_cache': session_cache.stats(),
+        'identity_cache': identity_cache.stats(),
+        'password_hashing': dict(password_hasher.stats, method=password_hasher.method_id, **password_hasher.timings()),
+        'registry': checkin_registry.stats(),
+        'throttle': {
+            'admission': checkin_gate.stats,
+            **{limiter.name: limiter.stats for limiter in (global_ip_limiter, session_ip_limiter, device_limiter)},
+        },
+        'analytics_cache': attendance_analytics_stats(),
+        'live_feed': live_feed.stats,
+        'session_expiry': session_sweeper.stats,
+        'database': {
+            'statements': RoutingSession.stats,
+            'pools': {bind or 'primary': engine.pool.status() for bind, engine in db.engines.items()},
+        },
+    })
@@ -0,0 +1,363 @@
+"""
+Organisation admin routes: the organisation dashboard, students, courses and
+lecturers, and student roll uploads.
+"""
+import os
+import secrets
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, session, url_for
+from flask_login import current_user, login_required
+from werkzeug.utils import secure_filename
+
+from app import Course, Lecturer, Student, csrf, db, job_runner, org_stats, role_required
+from db_routing import read_replica
+from list_query import ListSpec, distinct_values, list_page
+from org_stats import stats_summary
+
+school_bp = Blueprint('school', __name__)
+
+
+# -------- Dashboards --------
+@csrf.exempt
+@school_bp.route('/org/dashboard')
+@role_required('org_admin')
+@read_replica
+def org_dashboard():
+    org_id = session.get('organisation_id') or current_user.organisation_id
+    row = org_stats.read(db.session, org_id)
+    if org_stats.claim_reconcile(db.session, row):
+        job_runner.enqueue('reconcile_org_stats', {'organisation_id': org_id})
+    return render_template('org_dashboard.html', stats=stats_summary(row))
+
+
+@school_bp.route('/register_course', methods=['POST'])
+@role_required('org_admin')
+@login_required
+def register_course():
+    course_name = request.form.get('course_name')
+    course_code = request.form.get('course_code')
+
+    if not course_name or not course_code:
+        flash("Course name and code are required.", "danger")
+        return redirect(url_for('school.org_dashboard'))
+
+    existing = Course.query.filter_by(course_code=course_code, organisation_id=session['organisation_id']).first()
+    if existing:
+        flash("Course code already exists.", "warning")
+        return redirect(url_for('school.org_dashboard'))
+
+    new_course = Course(
+        name=course_name,
+        course_code=course_code,
+        organisation_id=session['organisation_id']
+    )
+    db.session.add(new_course)
+    db.session.commit()
+
+    flash("✅ Course registered successfully.", "success")
+    return redirect(url_for('school.org_dashboard'))
+
+
+#---------------------Routes for Departments-----------------
+@school_bp.route("/dept/dashboard")
+@login_required
+def dept_dashboard():
+    return render_template("dept_dashboard.html")
+
+
+# ---------- Route for course dashboard ----------
+@school_bp.route('/org/courses')
+@login_required
+def org_courses():
+    # Rows are loaded page by page from /api/org/courses
+    return render_template('org_courses.html')
+
+
+#------Students-----------------
+@school_bp.route('/org_students')
+@login_required
+def org_students():
+    # Rows are loaded page by page from /api/org/students
+    return render_template('org_students.html')
+
+
+# ---------- Paginated list APIs for the org tables ----------
+def student_to_dict(student):
+    return {
+        'id': student.id,
+        'student_id': student.student_id,
+        'index_number': student.index_number,
+        'level': student.level,
+        'full_name': student.full_name,
+        'email': student.email,
+        'phone': student.phone,
+        'department': student.department,
+        'faculty': student.faculty,
+        'college': student.college,
+        'profile_pic': url_for('static', filename=f'uploads/{student.profile_pic}') if student.profile_pic else None
+    }
+
+
+def course_to_dict(course):
+    return {
+        'id': course.id,
+        'course_name': course.course_name,
+        'course_code': course.course_code,
+        'level': course.level,
+        'department': course.department
+    }
+
+
+def lecturer_to_dict(lecturer):
+    return {
+        'id': lecturer.id,
+        'full_name': lecturer.full_name,
+        'email': lecturer.email,
+        'phone': lecturer.phone,
+        'college': lecturer.college,
+        'faculty': lecturer.faculty,
+        'department': lecturer.department
+    }
+
+
+ORG_LISTS = {
+    'students': ListSpec(
+        Student, Student.organisation_id,
+        sortable={'full_name': Student.full_name, 'student_id': Student.student_id,
+                  'index_number': Student.index_number, 'level': Student.level, 'college': Student.college,
+                  'faculty': Student.faculty, 'department': Student.department},
+        searchable=[Student.full_name, Student.student_id, Student.index_number, Student.email],
+        filters={'college': Student.college, 'faculty': Student.faculty,
+                 'department': Student.department, 'level': Student.level},
+        serialize=student_to_dict,
+    ),
+    'courses': ListSpec(
+        Course, Course.org_id,
+        sortable={'course_name': Course.course_name, 'course_code': Course.course_code,
+                  'level': Course.level, 'department': Course.department},
+        searchable=[Course.course_name, Course.course_code, Course.department, Course.level],
+        filters={'level': Course.level, 'department': Course.department},
+        serialize=course_to_dict,
+    ),
+    'lecturers': ListSpec(
+        Lecturer, Lecturer.organisation_id,
+        sortable={'full_name': Lecturer.full_name, 'email': Lecturer.email, 'college': Lecturer.college,
+                  'faculty': Lecturer.faculty, 'department': Lecturer.department},
+        searchable=[Lecturer.full_name, Lecturer.email, Lecturer.department],
+        filters={'college': Lecturer.college, 'faculty': Lecturer.faculty, 'department': Lecturer.department},
+        serialize=lecturer_to_dict,
+    ),
+}
+
+
+@school_bp.route('/api/org/<name>')
+@login_required
+@read_replica
+def org_list(name):
+    """
+    One page of an organisation's students, courses or lecturers.
+    Query: limit (max 100), sort, dir, q, column filters, after/before cursors,
+    count=1 for the filtered total and facets=1 for the filter dropdown values.
+    """
+    spec = ORG_LISTS.get(name)
+    if spec is None:
+        return jsonify({'success': False, 'error': 'Unknown list'}), 404
+    if not current_user.organisation_id:
+        return jsonify({'success': False, 'error': 'No organisation for this account'}), 403
+    try:
+        page = list_page(db.session, spec, current_user.organisation_id, request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if request.args.get('facets'):
+        page['facets'] = distinct_values(db.session, spec, current_user.organisation_id)
+    return jsonify(page)
+
+
+# -------Add Students in org---------
+@school_bp.route('/org/add_student', methods=['POST'])
+@login_required
+def add_student():
+    full_name = request.form.get('full_name')
+    email = request.form.get('email')
+    phone = request.form.get('phone')
+    department = request.form.get('department')
+    faculty = request.form.get('faculty')
+    college = request.form.get('college')
+    student_id = request.form.get('student_id')   # New
+    index_number = request.form.get('index_number')  # New
+    level = request.form.get('level')  # New
+
+    profile_pic = request.files.get('profile_pic')
+    profile_pic_filename = None
+
+    if profile_pic:
+        filename = secure_filename(profile_pic.filename)
+        profile_pic.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+        profile_pic_filename = filename
+
+    student = Student(
+        full_name=full_name,
+        email=email,
+        phone=phone,
+        department=department,
+        faculty=faculty,
+        college=college,
+        student_id=student_id,          # New
+        index_number=index_number,      # New
+        level=level,      # New
+        profile_pic=profile_pic_filename,
+        organisation_id=current_user.organisation_id
+    )
+    db.session.add(student)
+    db.session.commit()
+
+    return jsonify({'success': True, 'student': student_to_dict(student)})
+
+
+# ---------- Add Course ----------
+@school_bp.route('/org/add_course', methods=['POST'])
+@login_required
+def add_course():
+    course_name = request.form.get('course_name')
+    course_code = request.form.get('course_code')
+    level = request.form.get('level')
+    department = request.form.get('department')
+
+    # Get the logged-in user's organisation ID
+    org_id = current_user.organisation_id
+
+    course = Course(
+        org_id=org_id,
+        course_name=course_name,
+        course_code=course_code,
+        level=level,
+        department=department
+    )
+    db.session.add(course)
+    db.session.commit()
+
+    return jsonify({'success': True, 'course': course_to_dict(course)})
+
+
+# ---------- Edit Course ----------
+@school_bp.route('/org/edit_course/<int:course_id>', methods=['POST'])
+@login_required
+def edit_course(course_id):
+    course = Course.query.get_or_404(course_id)
+
+    # Ensure the course belongs to the current organisation
+    if course.org_id != current_user.organisation_id:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    course.course_name = request.form.get('course_name')
+    course.course_code = request.form.get('course_code')
+    course.level = request.form.get('level')
+    course.department = request.form.get('department')
+
+    db.session.commit()
+
+    return jsonify({'success': True, 'course': course_to_dict(course)})
+
+
+# ---------- Delete Course ----------
+@school_bp.route('/org/delete_course/<int:course_id>', methods=['POST'])
+@login_required
+def delete_course(course_id):
+    course = Course.query.get_or_404(course_id)
+
+    # Ensure the course belongs to the current organisation
+    if course.org_id != current_user.organisation_id:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    db.session.delete(course)
+    db.session.commit()
+
+    return jsonify({'success': True, 'id': course_id})
+
+
+#---------------------------------
+#Org_Lecturer registration
+#--------------------------------
+@school_bp.route('/org_lecturers')
+@login_required
+def org_lecturers():
+    # Rows are loaded page by page from /api/org/lecturers
+    return render_template('org_lecturers.html')
+
+
+@school_bp.route('/register_lecturer_inline', methods=['POST'])
+@login_required
+def register_lecturer_inline():
+    try:
+        full_name = request.form.get('full_name')
+        email = request.form.get('email')
+        phone = request.form.get('phone')
+        college = request.form.get('college')
+        faculty = request.form.get('faculty')
+        department = request.form.get('department')
+
+        if not full_name or not email:
+            return jsonify({"success": False, "message": "Full name and email are required"}), 400
+
+        new_lecturer = Lecturer(
+            full_name=full_name,
+            email=email,
+            phone=phone,
+            college=college,
+            faculty=faculty,
+            department=department,
+            organisation_id=current_user.organisation_id
+        )
+
+        db.session.add(new_lecturer)
+        db.session.commit()
+
+        # Return JSON so JS can append row without reload
+        return jsonify({"success": True, "lecturer": lecturer_to_dict(new_lecturer)})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@school_bp.route('/delete_lecturer/<int:lecturer_id>', methods=['POST'])
+@login_required
+def delete_lecturer(lecturer_id):
+    # delete lecturer logic
+    try:
+        lecturer = db.session.get(Lecturer, lecturer_id)
+        if not lecturer or lecturer.organisation_id != current_user.organisation_id:
+            return jsonify({"success": False, "message": "Lecturer not found"}), 404
+
+        db.session.delete(lecturer)
+        db.session.commit()
+        return jsonify({"success": True}), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@school_bp.route('/upload_students', methods=['POST'])
+@role_required('org_admin')
+def upload_students():
+    """Queues a CSV/XLSX student roll for import into the admin's organisation."""
+    file = request.files.get('file')
+    if not file or not file.filename:
+        return jsonify({"success": False, "message": "No file uploaded"}), 400
+    if not file.filename.lower().endswith(('.csv', '.xls', '.xlsx')):
+        return jsonify({"success": False, "message": "Unsupported file format. Please upload CSV or Excel."}), 400
+
+    os.makedirs(current_app.config['JOB_UPLOAD_FOLDER'], exist_ok=True)
+    path = os.path.join(current_app.config['JOB_UPLOAD_FOLDER'], secrets.token_hex(8) + "_" + secure_filename(file.filename))
+    file.save(path)
+
+    job_id = job_runner.enqueue('import_students', {
+        'path': path,
+        'filename': file.filename,
+        'organisation_id': current_user.organisation_id,
+    }, user_id=current_user.id, max_attempts=1)
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for('lecturer.job_status', job_id=job_id),
+        "message": "Upload received. Importing students..."
+    }), 202
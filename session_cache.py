@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Immutable snapshot of the SessionModel fields the check-in path needs
+CachedSession = namedtuple(
+    'CachedSession',
+    'session_id user_id latitude longitude radius status checkin_ip_per_minute checkin_device_per_minute '
+    'checkin_closes_at'
+)
+
+_MISSING = object()
+
+
+class SessionCache:
+    """
+    TTL + LRU cache of SessionModel snapshots keyed by session_id.
+
+    `loader(session_id)` is called on a miss and must return a CachedSession or
+    None. Unknown IDs are cached as None for `negative_ttl` seconds so a mistyped
+    or forged link can't hammer the database. The cache is per process; call
+    `invalidate` whenever a session's status or coordinates change.
+    """
+
+    def __init__(self, loader, maxsize=256, ttl=60, negative_ttl=10):
+        self.loader = loader
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(session_id)
+                    if value is None:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                    return value
+                del self._entries[session_id]
+            self.misses += 1
+
+        value = self.loader(session_id)
+        self.put(session_id, value)
+        return value
+
+    def put(self, session_id, value):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        with self._lock:
+            self._entries[session_id] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,160 @@
+"""
+Check-in windows and the sweeper that closes expired sessions.
+
+Every session carries `checkin_closes_at`, when it stops accepting
+check-ins (SESSION_CHECKIN_MINUTES after it was created unless set
+otherwise; NULL means it stays open until closed by hand). The check-in
+path refuses a session past that time straight away, and each process runs
+a sweeper thread that closes expired sessions in bulk: it reads a batch of
+them through the partial index over active sessions, flips them to
+`closed` with a conditional UPDATE (so two workers never close the same
+session twice) and calls the `on_close` hooks in the same transaction,
+e.g. to store the session's final attendance counts. The active set then
+only ever holds the sessions that are actually running.
+
+Sessions are swept `grace_seconds` after their window ends, so check-ins
+accepted just before it are flushed from the write-behind queue first.
+Closing a session by hand (`end_window`) only moves its window to now; the
+other workers may still accept check-ins from their cached snapshot until
+it expires, so the grace must cover the session cache TTL as well, and the
+sweeper closes the session once it has passed.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, select, update
+
+
+def accepting_checkins(class_session, now=None):
+    """True if a session (model or CachedSession) is active and inside its check-in window."""
+    if class_session.status != 'active':
+        return False
+    closes_at = class_session.checkin_closes_at
+    return closes_at is None or (now or datetime.utcnow()) < closes_at
+
+
+class SessionSweeper:
+    def __init__(self, db, SessionModel, interval=60.0, batch_size=500, grace_seconds=30):
+        self.app = None
+        self.db = db
+        self.SessionModel = SessionModel
+        self.interval = interval
+        self.batch_size = batch_size
+        self.grace_seconds = grace_seconds
+        self.hooks = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.stats = {'sweeps': 0, 'closed': 0, 'errors': 0}
+
+    def init_app(self, app):
+        """The app whose context the sweeper runs in."""
+        self.app = app
+
+    def on_close(self, fn):
+        """Decorator registering `fn(db_session, closed)`; `closed` is a list of (id, session_id) rows."""
+        self.hooks.append(fn)
+        return fn
+
+    def start(self):
+        # Started lazily (and again after a fork) so it works with gunicorn --preload.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    while self.sweep() == self.batch_size and not self._stop.is_set():
+                        pass
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"[SESSIONS] Sweep failed: {e}")
+            self._stop.wait(self.interval)
+
+    def end_window(self, session_pk, now=None):
+        """
+        Ends an active session's check-in window now (unless it has already
+        ended) and commits. The sweeper closes the session after the grace.
+        Returns the session's checkin_closes_at, or None if it is not active.
+        """
+        Session = self.SessionModel
+        now = now or datetime.utcnow()
+        try:
+            self.db.session.execute(
+                update(Session)
+                .where(Session.id == session_pk, Session.status == 'active',
+                       or_(Session.checkin_closes_at.is_(None), Session.checkin_closes_at > now))
+                .values(checkin_closes_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            closes_at = self.db.session.execute(
+                select(Session.checkin_closes_at).where(Session.id == session_pk, Session.status == 'active')
+            ).scalar()
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        return closes_at
+
+    def sweep(self, now=None):
+        """Closes one batch of sessions whose check-in window has ended. Returns how many."""
+        Session = self.SessionModel
+        now = now or datetime.utcnow()
+        ids = self.db.session.execute(
+            select(Session.id)
+            .where(Session.status == 'active',
+                   Session.checkin_closes_at <= now - timedelta(seconds=self.grace_seconds))
+            .order_by(Session.checkin_closes_at)
+            .limit(self.batch_size)
+        ).scalars().all()
+        self.stats['sweeps'] += 1
+        closed = self.close(ids, now) if ids else []
+        if closed:
+            print(f"[SESSIONS] Closed {len(closed)} expired session(s)")
+        return len(closed)
+
+    def close(self, ids, now=None):
+        """
+        Closes the given sessions (by primary key) that are still active, runs the
+        on_close hooks and commits. Returns the (id, session_id) rows it closed.
+        Only for sessions whose window ended more than the grace ago: the hooks
+        store final counts, so check-ins still in a write-behind queue are lost.
+        """
+        Session = self.SessionModel
+        now = now or datetime.utcnow()
+        stmt = (
+            update(Session).where(Session.id.in_(ids), Session.status == 'active')
+            .values(status='closed', closed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            if self.db.session.get_bind().dialect.update_returning:
+                closed = self.db.session.execute(stmt.returning(Session.id, Session.session_id)).all()
+            else:
+                # Without RETURNING, claim row by row so each worker knows which ones it closed
+                candidates = self.db.session.execute(
+                    select(Session.id, Session.session_id).where(Session.id.in_(ids), Session.status == 'active')
+                ).all()
+                closed = [row for row in candidates if self.db.session.execute(
+                    stmt.where(Session.id == row.id)).rowcount]
+            for hook in self.hooks:
+                hook(self.db.session, closed)
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        self.stats['closed'] += len(closed)
+        return closed
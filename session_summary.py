@@ -0,0 +1,84 @@
+"""
+Session summaries for the lecturer dashboards.
+
+A dashboard page is one statement: the page of the lecturer's sessions,
+newest first, with its check-in and present counts, and the lecturer's
+session and active session totals as scalar subqueries. Closed sessions
+carry their final counts (stored by the session sweeper's close hook);
+sessions still open are joined to attendance and grouped. The page is cut
+with a keyset cursor on (created_at, id) before the join, so it reads the
+same number of rows through ix_session_model_user_id_created_at and
+ix_attendance_session_id_timestamp whether the lecturer has one term of
+sessions or ten years of them.
+"""
+from sqlalchemy import and_, case, func, select, tuple_
+
+from list_query import decode_cursor, encode_cursor
+
+DEFAULT_PAGE_SIZE = 20
+
+
+def sessions_page_query(SessionModel, Attendance, user_id, before=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    The dashboard statement. `before` is (created_at, id) of the last session
+    on the previous page. Selects limit + 1 sessions so the caller can tell
+    whether there is an older page.
+    """
+    page = select(SessionModel).where(SessionModel.user_id == user_id)
+    if before:
+        created_at, session_pk = before
+        page = page.where(SessionModel.created_at <= created_at,
+                          tuple_(SessionModel.created_at, SessionModel.id) < (created_at, session_pk))
+    page = page.order_by(SessionModel.created_at.desc(), SessionModel.id.desc()).limit(limit + 1).subquery()
+
+    total = select(func.count()).select_from(SessionModel).where(SessionModel.user_id == user_id)
+    active = total.where(SessionModel.status == 'active')
+    return (
+        select(
+            page,
+            func.coalesce(page.c.checkin_count, func.count(Attendance.id)).label('checkins'),
+            func.coalesce(page.c.present_count,
+                          func.sum(case((Attendance.status == 'Present', 1), else_=0)), 0).label('present'),
+            total.scalar_subquery().label('total_sessions'),
+            active.scalar_subquery().label('active_sessions'),
+        )
+        .select_from(page)
+        # Closed sessions carry their final counts, so only the open ones are counted here
+        .outerjoin(Attendance, and_(Attendance.session_id == page.c.session_id, page.c.checkin_count.is_(None)))
+        .group_by(*page.c)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+
+
+def lecturer_sessions(db_session, SessionModel, Attendance, user_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of a lecturer's sessions with their attendance counts.
+
+    Args:
+        cursor (str): `next` from a previous page, for the sessions older than it.
+
+    Returns:
+        dict: sessions (rows with the session columns, checkins and present),
+        next (cursor or None), total_sessions, active_sessions and checkins
+        (check-ins across the sessions on this page).
+    """
+    before = tuple(decode_cursor(cursor, [SessionModel.created_at, SessionModel.id])) if cursor else None
+
+    rows = db_session.execute(sessions_page_query(SessionModel, Attendance, user_id, before, limit)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        total_sessions, active_sessions = rows[0].total_sessions, rows[0].active_sessions
+    else:
+        # Past the last page (or no sessions yet): the totals still come from the lecturer's sessions
+        total = select(func.count()).select_from(SessionModel).where(SessionModel.user_id == user_id)
+        total_sessions = db_session.execute(total).scalar()
+        active_sessions = db_session.execute(total.where(SessionModel.status == 'active')).scalar() if total_sessions else 0
+
+    return {
+        'sessions': rows,
+        'next': encode_cursor([rows[-1].created_at, rows[-1].id]) if has_more else None,
+        'total_sessions': total_sessions,
+        'active_sessions': active_sessions,
+        'checkins': sum(row.checkins for row in rows),
+    }
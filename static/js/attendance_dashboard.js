@@ -6,6 +6,7 @@ const sessions = [];               // in-memory sessions (replace with backend l
 let activeSession = null;
 let activeTimer = null;
 let trendChart = null, snapshotChart = null;
+let liveSource = null;             // EventSource of a server session being watched
 
 // ---- Helpers ----
 function formatTime(s) {
@@ -188,6 +189,7 @@ function endActiveSession(){
   activeSession.endedAt = nowISO();
   activeSession = null;
   if(activeTimer){ clearInterval(activeTimer); activeTimer = null; }
+  if(liveSource){ liveSource.close(); liveSource = null; }
   document.querySelector('#liveContent').classList.add('hidden');
   document.querySelector('#livePanel .empty-state')?.classList.remove('hidden');
   populateRecentTable();
@@ -215,7 +217,7 @@ function renderLiveStudentTable(session, opts = {active:false}){
   tbody.innerHTML = '';
   (session.attendees || []).forEach(a=>{
     const tr = document.createElement('tr');
-    const status = (a.method === 'manual' ? 'Present (manual)' : 'Present');
+    const status = a.status || (a.method === 'manual' ? 'Present (manual)' : 'Present');
     const lon = a.longitude !== undefined && a.longitude !== null ? a.longitude : (a.lng || '');
     const lat = a.latitude !== undefined && a.latitude !== null ? a.latitude : (a.lat || '');
     const timeStr = a.time ? new Date(a.time).toLocaleTimeString() : '';
@@ -394,12 +396,10 @@ document.getElementById('btnCopyUrl')?.addEventListener('click', ()=>{
   navigator.clipboard?.writeText(urlField.value).then(()=> alert('URL copied to clipboard'));
 });
 
-// ---- Charts (keeps previous logic) ----
-function updateCharts(){
-  // aggregated sample from sessions
-  const last = sessions.slice(0,6);
-  const labels = last.map(s => s.course);
-  const values = last.map(s => Math.min(100, Math.round((s.attendees.length / 40) * 100)));
+// ---- Charts (from the server's cached attendance analytics) ----
+function renderCharts(data){
+  const labels = data.weekly.map(w => w.week.slice(5, 10));
+  const values = data.weekly.map(w => w.rate);
 
   if(trendChart){
     trendChart.data.labels = labels;
@@ -416,30 +416,87 @@ function updateCharts(){
     }
   }
 
-  // snapshot
-  const totalPresent = sessions.reduce((sum,s)=> sum + (s.attendees.length||0), 0);
-  const totalPossible = Math.max(1, sessions.length * 30);
-  const presentPct = Math.round( (totalPresent / totalPossible) * 100 );
-  const absentPct = Math.max(0, 100 - presentPct);
+  // snapshot: today's check-ins against the students expected in today's sessions
+  const { present, absent } = data.today;
 
   if(snapshotChart){
-    snapshotChart.data.datasets[0].data = [presentPct, absentPct];
+    snapshotChart.data.datasets[0].data = [present, absent];
     snapshotChart.update();
   } else {
     const ctx2 = document.getElementById('snapshotChart')?.getContext('2d');
     if(ctx2){
       snapshotChart = new Chart(ctx2, {
         type:'doughnut',
-        data:{ labels:['Present','Absent'], datasets:[{ data:[presentPct, absentPct], backgroundColor:['#10B981','#EF4444'] }]},
+        data:{ labels:['Present','Absent'], datasets:[{ data:[present, absent], backgroundColor:['#10B981','#EF4444'] }]},
         options:{ responsive:true, animation:{ duration:2000 }, cutout:'70%', plugins:{ legend:{ position:'bottom' } } }
       });
     }
   }
 }
 
+function updateCharts(){
+  fetch('/api/analytics?mine=1', { headers:{ 'Accept':'application/json' } })
+    .then(res => res.ok ? res.json() : Promise.reject(new Error('Failed to load analytics')))
+    .then(renderCharts)
+    .catch(err => console.error(err));
+}
+
+// ---- Live check-ins of a server session (Server-Sent Events) ----
+// The server pushes check-ins as they are committed, batched when many arrive
+// at once. EventSource reconnects on its own and resumes from Last-Event-ID;
+// when the server refuses the stream (503) it is retried here instead.
+function watchServerSession(sessionId){
+  const session = {
+    id: sessionId, code: sessionId, url: `${location.origin}/checkin/${encodeURIComponent(sessionId)}`,
+    course: sessionId, klass: '', date: nowISO(), duration: 120, mode: 'live',
+    location: {}, attendees: [], manualAdds: 0, createdAt: nowISO(),
+  };
+  sessions.unshift(session);
+  startSession(session);
+
+  const seen = new Set();
+  let lastEventId = '';
+  function connect(){
+    const query = lastEventId ? `?last_event_id=${encodeURIComponent(lastEventId)}` : '';
+    const source = liveSource = new EventSource(`/session/${encodeURIComponent(sessionId)}/live${query}`);
+    source.addEventListener('checkins', (e)=>{
+      lastEventId = e.lastEventId || lastEventId;
+      JSON.parse(e.data).forEach(row=>{
+        if(seen.has(row.id)) return;
+        seen.add(row.id);
+        session.attendees.push({
+          id: row.student_id, name: row.student_name, method: 'qr', status: row.status,
+          latitude: row.latitude, longitude: row.longitude, time: row.timestamp,
+        });
+      });
+      if(activeSession && activeSession.id === session.id){
+        const present = session.attendees.filter(a => a.status === 'Present').length;
+        document.getElementById('liveTotal').textContent = session.attendees.length;
+        document.getElementById('livePresent').textContent = present;
+        document.getElementById('liveAbsent').textContent = session.attendees.length - present;
+        renderLiveStudentTable(session, {active:true});
+      }
+      populateRecentTable();
+    });
+    source.onerror = ()=>{
+      if(source.readyState !== EventSource.CLOSED){
+        console.warn('Live check-in feed interrupted, reconnecting…');
+        return;
+      }
+      // Refused (e.g. 503 when the worker has its maximum of live viewers): EventSource
+      // gives up on an error response, so try again later from the last check-in seen
+      console.warn('Live check-in feed unavailable, retrying in 15s');
+      setTimeout(()=>{ if(liveSource === source) connect(); }, 15000);
+    };
+  }
+  connect();
+}
+
 // initialize
 populateRecentTable();
 updateCharts();
+const watchedSession = new URLSearchParams(location.search).get('session');
+if(watchedSession) watchServerSession(watchedSession);
 
 // ---- Export helpers (all / range) reused from previous script ----
 document.getElementById('btnExportAll')?.addEventListener('click', ()=>{
@@ -1,5 +1,5 @@
 // org_courses.js
-// AJAX add/edit/delete + client rendering + charts + export
+// AJAX add/edit/delete + server-side paged table + charts + export
 document.addEventListener('DOMContentLoaded', () => {
   // Elements
   const toggleAdd = document.getElementById('toggleAddCourse');
@@ -7,7 +7,7 @@ document.addEventListener('DOMContentLoaded', () => {
   const courseForm = document.getElementById('courseForm');
   const cancelBtn = document.getElementById('cancelCourseBtn');
   const saveBtn = document.getElementById('saveCourseBtn');
-  const searchInput = document.getElementById('searchCourse');
+  const searchInput = document.getElementById('searchBox');
   const exportBtns = document.querySelectorAll('.export-btn');
 
   const tableEl = document.getElementById('coursesTable').querySelector('tbody');
@@ -21,25 +21,9 @@ document.addEventListener('DOMContentLoaded', () => {
 
   const csrfToken = document.querySelector('meta[name="csrf-token"]')?.content || '';
 
-  // Read initial courses from DOM (server-rendered). Build JS array.
+  // Courses on the current page; the table loads them from /api/org/courses
   let courses = [];
-  (function readServerRows(){
-    const rows = Array.from(tableEl.querySelectorAll('tr[data-id]'));
-    rows.forEach(r => {
-      const id = Number(r.dataset.id);
-      const get = (sel) => r.querySelector('.' + sel)?.textContent?.trim() || '';
-      const attendanceText = r.querySelector('.attendance')?.textContent?.trim();
-      const attendance = attendanceText && !isNaN(Number(attendanceText)) ? Number(attendanceText) : undefined;
-      courses.push({
-        id,
-        course_name: get('name'),
-        course_code: get('code'),
-        level: get('level'),
-        department: get('dept'),
-        attendance
-      });
-    });
-  })();
+  let totalCourses = 0;
 
   // Theme helpers
   function isLight() { return document.documentElement.getAttribute('data-theme') === 'light'; }
@@ -98,7 +82,7 @@ document.addEventListener('DOMContentLoaded', () => {
     if (!arr.length) {
       initTrend([], []);
       initCompare([], []);
-      totalCoursesEl.textContent = 0;
+      totalCoursesEl.textContent = totalCourses;
       mostAttendedEl.textContent = 'N/A';
       leastAttendedEl.textContent = 'N/A';
       avgAttendanceEl.textContent = '0%';
@@ -111,7 +95,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const least = arr.reduce((a,b)=> a.attendance <= b.attendance ? a : b, arr[0]);
     const avg = Math.round(arr.reduce((s,c)=> s + (c.attendance||0), 0)/arr.length);
 
-    totalCoursesEl.textContent = arr.length;
+    totalCoursesEl.textContent = totalCourses;
     mostAttendedEl.textContent = most.course_name;
     leastAttendedEl.textContent = least.course_name;
     avgAttendanceEl.textContent = `${avg}%`;
@@ -123,41 +107,44 @@ document.addEventListener('DOMContentLoaded', () => {
     initCompare(labels, dataArr);
   }
 
-  function renderTable(list) {
-    // list = array of course objects
-    tableEl.innerHTML = '';
-    if (!list.length) {
-      const tr = document.createElement('tr');
-      tr.innerHTML = `<td colspan="6" style="padding:16px;color:var(--muted)">No courses found</td>`;
-      tableEl.appendChild(tr);
-      return;
-    }
-    list.forEach(c => {
-      const tr = document.createElement('tr');
-      tr.dataset.id = c.id;
-      tr.innerHTML = `
-        <td class="name">${escapeHtml(c.course_name)}</td>
-        <td class="code">${escapeHtml(c.course_code)}</td>
-        <td class="level">${escapeHtml(c.level)}</td>
-        <td class="dept">${escapeHtml(c.department)}</td>
-        <td class="attendance">${(c.attendance ?? '').toString()}</td>
-        <td class="actions-col">
-          <button class="action-btn edit" data-id="${c.id}" title="Edit"><i class="fa fa-edit"></i></button>
-          <button class="action-btn delete" data-id="${c.id}" title="Delete"><i class="fa fa-trash"></i></button>
-        </td>
-      `;
-      tableEl.appendChild(tr);
-    });
+  function courseRow(c) {
+    const tr = document.createElement('tr');
+    tr.innerHTML = `
+      <td class="name">${escapeHtml(c.course_name)}</td>
+      <td class="code">${escapeHtml(c.course_code)}</td>
+      <td class="level">${escapeHtml(c.level)}</td>
+      <td class="dept">${escapeHtml(c.department)}</td>
+      <td class="attendance">${(c.attendance ?? '').toString()}</td>
+      <td class="actions-col">
+        <button class="action-btn edit" data-id="${c.id}" title="Edit"><i class="fa fa-edit"></i></button>
+        <button class="action-btn delete" data-id="${c.id}" title="Delete"><i class="fa fa-trash"></i></button>
+      </td>
+    `;
+    return tr;
   }
 
+  const table = new ServerTable({
+    url: '/api/org/courses',
+    tbody: tableEl,
+    renderRow: courseRow,
+    columns: 6,
+    pager: document.getElementById('coursesPager'),
+    sort: 'course_name',
+    onPage: (page) => {
+      if (typeof page.total === 'number') totalCourses = page.total;
+      courses = page.rows.map(c => ({ ...c }));
+      rebuildCharts();
+    }
+  });
+  table.bindSortHeaders(document.querySelector('#coursesTable thead'));
+
   function escapeHtml(s){
     if (s == null) return '';
     return String(s).replace(/[&<>"']/g, m => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[m]));
   }
 
-  // Initial render
-  renderTable(courses);
-  rebuildCharts();
+  // Initial load
+  table.reload();
 
   // Toggle add form
   toggleAdd?.addEventListener('click', () => {
@@ -194,18 +181,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const res = await fetch('/org/add_course', { method: 'POST', body: payload, headers: { 'X-CSRFToken': csrfToken } });
         const data = await res.json();
         if (data && data.success && data.course) {
-          // push to local array and render
-          const newCourse = {
-            id: data.course.id,
-            course_name: data.course.course_name,
-            course_code: data.course.course_code,
-            level: data.course.level,
-            department: data.course.department,
-            attendance: data.course.attendance ?? undefined
-          };
-          courses.push(newCourse);
-          renderTable(courses);
-          rebuildCharts();
+          await table.reload();
           courseForm.reset();
           addWrap.classList.add('hidden');
         } else {
@@ -217,17 +193,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const res = await fetch(`/org/edit_course/${id}`, { method: 'POST', body: payload, headers: { 'X-CSRFToken': csrfToken } });
         const data = await res.json();
         if (data && data.success && data.course) {
-          // replace in courses array
-          courses = courses.map(c => c.id === Number(id) ? {
-            id: data.course.id,
-            course_name: data.course.course_name,
-            course_code: data.course.course_code,
-            level: data.course.level,
-            department: data.course.department,
-            attendance: data.course.attendance ?? c.attendance
-          } : c);
-          renderTable(courses);
-          rebuildCharts();
+          await table.reload();
           courseForm.reset();
           courseForm.querySelector('[name="id"]').value = '';
           addWrap.classList.add('hidden');
@@ -249,12 +215,10 @@ document.addEventListener('DOMContentLoaded', () => {
     if (btn.classList.contains('delete')) {
       if (!confirm('Delete this course?')) return;
       try {
-        const res = await fetch(`/org/delete_course/${id}`, { method: 'DELETE', headers: { 'X-CSRFToken': csrfToken } });
+        const res = await fetch(`/org/delete_course/${id}`, { method: 'POST', headers: { 'X-CSRFToken': csrfToken } });
         const data = await res.json();
         if (data && data.success) {
-          courses = courses.filter(c => c.id !== Number(id));
-          renderTable(courses);
-          rebuildCharts();
+          await table.reload();
         } else {
           alert('Delete failed.');
         }
@@ -263,7 +227,7 @@ document.addEventListener('DOMContentLoaded', () => {
         alert('Delete failed — check console.');
       }
     } else if (btn.classList.contains('edit')) {
-      const course = courses.find(c => c.id === Number(id));
+      const course = table.row(id);
       if (!course) return;
       // fill form, set id
       courseForm['id'].value = course.id;
@@ -276,16 +240,11 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   });
 
-  // Search filtering client-side
+  // Search is done by the server
+  let searchTimer;
   searchInput?.addEventListener('input', (e) => {
-    const q = (e.target.value || '').toLowerCase().trim();
-    const filtered = courses.filter(c => {
-      return (c.course_name||'').toLowerCase().includes(q) ||
-             (c.course_code||'').toLowerCase().includes(q) ||
-             (c.department||'').toLowerCase().includes(q) ||
-             (c.level||'').toLowerCase().includes(q);
-    });
-    renderTable(filtered);
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => table.setQuery((e.target.value || '').trim()), 250);
   });
 
   // Export handlers (csv / excel use csv; pdf uses print window)
@@ -302,12 +261,14 @@ document.addEventListener('DOMContentLoaded', () => {
     a.href = url; a.download = name; document.body.appendChild(a); a.click(); a.remove(); URL.revokeObjectURL(url);
   }
   exportBtns.forEach(btn => {
-    btn.addEventListener('click', () => {
+    btn.addEventListener('click', async () => {
       const format = btn.dataset.format;
-      if (!courses.length) { alert('No data to export'); return; }
+      // Exports every course matching the search, not just the page on screen
+      const all = await table.allRows().catch(() => []);
+      if (!all.length) { alert('No data to export'); return; }
       const header = ['Course Name','Course Code','Level','Department','Attendance %'];
       const rows = [header];
-      courses.forEach(c => rows.push([escapeCsvCell(c.course_name), escapeCsvCell(c.course_code), escapeCsvCell(c.level), escapeCsvCell(c.department), escapeCsvCell(c.attendance??'')]));
+      all.forEach(c => rows.push([escapeCsvCell(c.course_name), escapeCsvCell(c.course_code), escapeCsvCell(c.level), escapeCsvCell(c.department), escapeCsvCell(c.attendance??'')]));
       if (format === 'csv' || format === 'excel') {
         const filename = `courses_${(new Date()).toISOString().slice(0,10)}.csv`;
         downloadCSV(filename, rows);
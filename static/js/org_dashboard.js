@@ -6,17 +6,17 @@ document.addEventListener('DOMContentLoaded', function() {
 
     const getColor = (light, dark) => isDarkMode ? dark : light;
 
-    const createLineChart = (canvasId, label) => {
+    const createLineChart = (canvasId, label, labels, data) => {
         const ctx = document.getElementById(canvasId);
         if (!ctx) return;
 
         new Chart(ctx, {
             type: 'line',
             data: {
-                labels: ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul'],
+                labels,
                 datasets: [{
                     label,
-                    data: Array.from({ length: 7 }, () => Math.floor(Math.random() * 100)),
+                    data,
                     borderColor: getColor('#4F46E5', '#818CF8'),
                     backgroundColor: getColor('rgba(99,102,241,0.15)', 'rgba(129,140,248,0.2)'),
                     fill: true,
@@ -57,6 +57,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     },
                     y: {
                         beginAtZero: true,
+                        max: 100,
                         ticks: {
                             color: getColor('#1F2937', '#E5E7EB')
                         },
@@ -69,17 +70,17 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     };
 
-    const createBarChart = () => {
+    const createBarChart = (labels, data) => {
         const ctx = document.getElementById('coursePopularityChart');
         if (!ctx) return;
 
         new Chart(ctx, {
             type: 'bar',
             data: {
-                labels: ['CS101', 'MATH102', 'PHY201', 'ENG103', 'BIO202'],
+                labels,
                 datasets: [{
-                    label: 'Enrolled Students',
-                    data: [120, 90, 75, 150, 60],
+                    label: 'Attendance %',
+                    data,
                     backgroundColor: [
                         '#3B82F6',
                         '#8B5CF6',
@@ -113,6 +114,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     },
                     y: {
                         beginAtZero: true,
+                        max: 100,
                         ticks: {
                             color: getColor('#374151', '#D1D5DB')
                         },
@@ -125,10 +127,42 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     };
 
-    // Init all charts
-    createLineChart('schoolAttendanceChart', 'University Attendance');
-    createLineChart('collegeAttendanceChart', 'College Attendance');
-    createLineChart('facultyAttendanceChart', 'Faculty Attendance');
-    createLineChart('departmentAttendanceChart', 'Department Attendance');
-    createBarChart();
+    const fillList = (id, items, text) => {
+        const list = document.getElementById(id);
+        if (!list) return;
+        list.innerHTML = '';
+        if (!items.length) {
+            list.innerHTML = '<li>No attendance yet</li>';
+            return;
+        }
+        items.forEach((item) => {
+            const li = document.createElement('li');
+            li.textContent = text(item);
+            list.appendChild(li);
+        });
+    };
+
+    const pct = (rate) => rate === null ? '–' : `${rate}%`;
+
+    // Rates come from the server's cached attendance analytics
+    fetch('/api/analytics', { headers: { 'Accept': 'application/json' } })
+        .then((res) => res.ok ? res.json() : Promise.reject(new Error('Failed to load analytics')))
+        .then((data) => {
+            createLineChart('schoolAttendanceChart', 'Attendance % by week',
+                data.weekly.map((w) => w.week.slice(0, 10)), data.weekly.map((w) => w.rate));
+            [['collegeAttendanceChart', 'college', 'College Attendance %'],
+                ['facultyAttendanceChart', 'faculty', 'Faculty Attendance %'],
+                ['departmentAttendanceChart', 'department', 'Department Attendance %']
+            ].forEach(([canvasId, group, label]) => {
+                const rows = data.groups[group] || [];
+                createLineChart(canvasId, label, rows.map((r) => r.name), rows.map((r) => r.rate));
+            });
+            const courses = data.courses.filter((c) => c.rate !== null);
+            createBarChart(courses.slice(-10).reverse().map((c) => c.course_code), courses.slice(-10).reverse().map((c) => c.rate));
+
+            fillList('topLecturers', data.lecturers.filter((l) => l.rate !== null).slice(0, 3),
+                (l) => `${l.name} – ${pct(l.rate)}`);
+            fillList('lowestCourses', courses.slice(0, 3), (c) => `${c.course_code} – ${pct(c.rate)}`);
+        })
+        .catch((err) => console.error(err));
 });
\ No newline at end of file
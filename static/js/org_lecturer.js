@@ -60,20 +60,52 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // ----------------------------
-    // Search function
+    // Server-side table
     // ----------------------------
-    const filterTable = () => {
-        const v = $('#searchInput').value.trim().toLowerCase();
-        const rows = $$('#lecturersTable tbody tr');
-        rows.forEach(row => {
-            const txt = row.textContent.toLowerCase();
-            row.style.display = txt.includes(v) ? '' : 'none';
-        });
-    };
+    // tiny helper (very important to avoid XSS)
+    function escapeHtml(s) { return String(s ?? '').replace(/[&<>"]/g, c => ({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;' }[c])); }
+
+    function lecturerRow(data) {
+        const tr = document.createElement('tr');
+        tr.className = "bg-gray-100 dark:bg-gray-800 border-b dark:border-gray-700 rounded-lg overflow-hidden";
+        tr.innerHTML = `
+            <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${escapeHtml(data.full_name)}</td>
+            <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${escapeHtml(data.email)}</td>
+            <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${escapeHtml(data.college)}</td>
+            <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${escapeHtml(data.faculty)}</td>
+            <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${escapeHtml(data.department)}</td>
+            <td class="px-4 py-2 text-right flex justify-end gap-2">
+                <button class="btn-outline text-xs flex items-center gap-1 edit-btn" title="Edit Lecturer">
+                    <i class="fas fa-edit"></i>
+                    <span class="hidden sm:inline">Edit</span>
+                </button>
+                <button class="btn-outline text-xs text-red-500 delete-lecturer-btn" data-id="${data.id}" title="Delete Lecturer">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </td>
+        `;
+        return tr;
+    }
 
+    const tableBody = $('#lecturersTableBody');
+    const table = new ServerTable({
+        url: '/api/org/lecturers',
+        tbody: tableBody,
+        renderRow: lecturerRow,
+        columns: 6,
+        pager: $('#lecturersPager'),
+        sort: 'full_name',
+        onPage: setAriaLabels,
+    });
+    table.bindSortHeaders($('#lecturersTable thead'));
+    table.reload();
+
+    // ----------------------------
+    // Search (done by the server)
+    // ----------------------------
     const searchInput = $('#searchInput');
     if (searchInput) {
-        searchInput.addEventListener('input', debounce(filterTable, 150));
+        searchInput.addEventListener('input', debounce(() => table.setQuery(searchInput.value.trim()), 250));
     }
 
     // ----------------------------
@@ -114,7 +146,8 @@ document.addEventListener('DOMContentLoaded', () => {
                     headers
                 });
                 if (res.ok) {
-                    alert('Upload succeeded — refresh to see new lecturers.');
+                    alert('Upload succeeded.');
+                    table.reload();
                 } else {
                     alert('Upload failed — check server.');
                 }
@@ -150,29 +183,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
                 const data = await res.json();
                 if (data.success) {
-                    // Create new row (dark mode + rounded corners)
-                    const tr = document.createElement('tr');
-                    tr.className = "bg-white dark:bg-gray-800 border-b dark:border-gray-700 rounded-lg overflow-hidden";
-
-                    tr.innerHTML = `
-                        <td class="px-4 py-2 dark:text-gray-300">${data.lecturer.full_name}</td>
-                        <td class="px-4 py-2 dark:text-gray-300">${data.lecturer.email}</td>
-                        <td class="px-4 py-2 dark:text-gray-300">${data.lecturer.college}</td>
-                        <td class="px-4 py-2 dark:text-gray-300">${data.lecturer.faculty}</td>
-                        <td class="px-4 py-2 dark:text-gray-300">${data.lecturer.department}</td>
-                        <td class="px-4 py-2 text-right flex justify-end gap-2">
-                            <button class="btn-outline text-xs edit-btn" aria-label="Edit" title="Edit">
-                                <i class="fas fa-edit"></i>
-                            </button>
-                            <button class="btn-outline text-xs text-red-500 delete-btn" aria-label="Delete" title="Delete">
-                                <i class="fas fa-trash"></i>
-                            </button>
-                        </td>
-                    `;
-                    $('#lecturersTable tbody').appendChild(tr);
-
-                    filterTable(); // Re-run search filter for new rows
-                    setAriaLabels(); // Refresh tooltips
+                    await table.reload();
                     form.reset();
                     addForm.classList.add('hidden');
                 }
@@ -182,103 +193,49 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // When adding a new lecturer dynamically
-    const newRow = document.createElement('tr');
-    newRow.className = "bg-gray-100 dark:bg-gray-800 border-b dark:border-gray-700 rounded-lg overflow-hidden";
-    newRow.innerHTML = `
-        <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${data.full_name}</td>
-        <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${data.email}</td>
-        <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${data.college}</td>
-        <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${data.faculty}</td>
-        <td class="px-4 py-2 text-gray-900 dark:text-gray-300">${data.department}</td>
-        <td class="px-4 py-2 text-right flex justify-end gap-2">
-            <button class="btn-outline text-xs flex items-center gap-1" aria-label="Edit Lecturer" title="Edit Lecturer">
-                <i class="fas fa-edit"></i>
-                <span class="hidden sm:inline">Edit</span>
-            </button>
-            <button class="btn-outline text-xs text-red-500 delete-lecturer-btn" data-id="${data.id}" title="Delete Lecturer">
-                <i class="fas fa-trash"></i>
-            </button>
-        </td>
-    `;
-    document.querySelector('#lecturersTableBody').appendChild(newRow);
-
     /* ------------ cancel button ------------ */
-    if (cancelBtn)
+    if (cancelBtn && form)
         cancelBtn.addEventListener("click", () => {
-            addForm.reset();
-            addFormCard.classList.add("hidden");
-            delete addForm.dataset.editId;
+            form.reset();
+            addForm.classList.add("hidden");
         });
 
-    // data is the object returned from server { id, full_name, email, college, faculty, department }
-    function appendLecturerRow(data) {
-        const tbody = document.getElementById('lecturersTableBody');
-        if (!tbody) return;
-
-        const tr = document.createElement('tr');
-
-        // NOTE: do NOT add bg-white class here
-        tr.innerHTML = `
-    <td>${escapeHtml(data.full_name)}</td>
-    <td>${escapeHtml(data.email)}</td>
-    <td>${escapeHtml(data.college)}</td>
-    <td>${escapeHtml(data.faculty)}</td>
-    <td>${escapeHtml(data.department)}</td>
-    <td class="text-right">
-      <button class="btn-outline btn-small edit-btn" data-id="${data.id}" title="Edit">
-        <i class="fas fa-edit"></i><span class="hidden sm:inline"> Edit</span>
-      </button>
-      <button class="btn-outline btn-small delete-lecturer-btn" data-id="${data.id}" title="Delete">
-        <i class="fas fa-trash"></i><span class="hidden sm:inline"> Delete</span>
-      </button>
-    </td>
-  `;
-        tbody.appendChild(tr);
-    }
-
-    // tiny helper (very important to avoid XSS)
-    function escapeHtml(s) { return String(s).replace(/[&<>"]/g, c => ({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;' }[c])); }
-
-
     // ----------------------------
     // Delete Lecturer (AJAX)
     // ----------------------------
-    document.addEventListener("DOMContentLoaded", function() {
-        const tableBody = document.querySelector("#lecturers-table tbody");
+    const csrfToken = form?.querySelector('[name="csrf_token"]')?.value || '';
 
-        // Event delegation for delete buttons
-        tableBody.addEventListener("click", async function(e) {
-            if (e.target.closest(".delete-lecturer-btn")) {
-                const btn = e.target.closest(".delete-lecturer-btn");
-                const lecturerId = btn.dataset.id;
+    // Event delegation for delete buttons
+    tableBody.addEventListener("click", async function(e) {
+        if (e.target.closest(".delete-lecturer-btn")) {
+            const btn = e.target.closest(".delete-lecturer-btn");
+            const lecturerId = btn.dataset.id;
 
-                if (!lecturerId) {
-                    alert("Missing lecturer ID.");
-                    return;
-                }
+            if (!lecturerId) {
+                alert("Missing lecturer ID.");
+                return;
+            }
 
-                if (!confirm("Are you sure you want to delete this lecturer?")) return;
+            if (!confirm("Are you sure you want to delete this lecturer?")) return;
 
-                try {
-                    const response = await fetch(`/delete_lecturer/${lecturerId}`, {
-                        method: "POST", // or DELETE if your route supports it
-                        headers: { "X-Requested-With": "XMLHttpRequest" },
-                    });
+            try {
+                const response = await fetch(`/delete_lecturer/${lecturerId}`, {
+                    method: "POST", // or DELETE if your route supports it
+                    headers: { "X-Requested-With": "XMLHttpRequest", "X-CSRFToken": csrfToken },
+                });
 
-                    const result = await response.json();
+                const result = await response.json();
 
-                    if (result.success) {
-                        btn.closest("tr").remove();
-                    } else {
-                        alert(result.message || "Failed to delete lecturer.");
-                    }
-                } catch (error) {
-                    console.error(error);
-                    alert("An error occurred while deleting.");
+                if (result.success) {
+                    table.reload();
+                } else {
+                    alert(result.message || "Failed to delete lecturer.");
                 }
+            } catch (error) {
+                console.error(error);
+                alert("An error occurred while deleting.");
             }
-        });
+        }
     });
 
-});
\ No newline at end of file
+});
@@ -101,13 +101,55 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
 
-    function updateTotals() {
-        if (!studentsTbody || !totalCountEl) return;
-        const rows = Array.from(studentsTbody.querySelectorAll("tr")).filter((r) => r.style.display !== "none");
-        totalCountEl.textContent = rows.length;
-        initChart(rows.length);
+    function updateTotals(total) {
+        if (!totalCountEl) return;
+        totalCountEl.textContent = total;
+        initChart(total);
     }
 
+    /* ------------ Server-side table ------------ */
+    function studentRow(student) {
+        const tr = document.createElement("tr");
+        tr.className = "bg-gray-100 dark:bg-gray-800 border-b dark:border-gray-700 rounded-lg overflow-hidden";
+        tr.innerHTML = `
+            <td class="px-4 py-2">
+                <img src="${escapeHtml(student.profile_pic || DEFAULT_STUDENT_PIC)}" alt="profile" class="w-10 h-10 rounded-full object-cover">
+            </td>
+            <td class="px-4 py-2">${escapeHtml(student.student_id)}</td>
+            <td class="px-4 py-2">${escapeHtml(student.index_number)}</td>
+            <td class="px-4 py-2">${escapeHtml(student.full_name)}</td>
+            <td class="px-4 py-2">${escapeHtml(student.email)}</td>
+            <td class="px-4 py-2">${escapeHtml(student.phone)}</td>
+            <td class="px-4 py-2">${escapeHtml(student.level)}</td>
+            <td class="px-4 py-2">${escapeHtml(student.college)}</td>
+            <td class="px-4 py-2">${escapeHtml(student.faculty)}</td>
+            <td class="px-4 py-2">${escapeHtml(student.department)}</td>
+            <td class="px-4 py-2 text-right flex justify-end gap-2">
+                <button class="btn-outline text-xs flex items-center gap-1 edit-student-btn" data-id="${student.id}" title="Edit Student">
+                    <i class="fas fa-edit"></i><span class="hidden sm:inline">Edit</span>
+                </button>
+                <button class="btn-outline text-xs text-red-500 delete-student-btn" data-id="${student.id}" title="Delete Student">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </td>`;
+        return tr;
+    }
+
+    const table = studentsTbody ? new ServerTable({
+        url: "/api/org/students",
+        tbody: studentsTbody,
+        renderRow: studentRow,
+        columns: 11,
+        pager: $("#studentsPager"),
+        sort: "full_name",
+        onPage: (page) => {
+            if (page.facets) updateFilters(page.facets);
+            if (typeof page.total === "number") updateTotals(page.total);
+            setAriaLabels();
+        },
+    }) : null;
+    if (table) table.bindSortHeaders($("#studentsTable thead"));
+
     /* ------------ Toggle Add Form ------------ */
     if (toggleBtn && addFormCard) {
         toggleBtn.addEventListener("click", (e) => {
@@ -145,6 +187,17 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    /* ------------ Poll a background job until it finishes ------------ */
+    async function waitForJob(url, onProgress) {
+        while (true) {
+            const res = await fetch(url);
+            const job = await res.json();
+            if (job.status === "succeeded" || job.status === "failed" || !res.ok) return job;
+            if (onProgress) onProgress(job);
+            await new Promise((r) => setTimeout(r, 1000));
+        }
+    }
+
     /* ------------ Upload students (CSV/XLSX) ------------ */
     if (uploadBtn) {
         const file = document.createElement("input");
@@ -166,13 +219,23 @@ document.addEventListener("DOMContentLoaded", () => {
             uploadBtn.disabled = true;
             uploadBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Uploading...';
             try {
-                const res = await fetch("/upload_students", { method: "POST", body: fd });
+                const csrfToken = document.querySelector('meta[name="csrf-token"]')?.content || "";
+                const res = await fetch("/upload_students", { method: "POST", body: fd, headers: { "X-CSRFToken": csrfToken } });
                 const data = await res.json().catch(() => null);
-                if (res.ok && data && data.added) {
-                    (data.added || []).forEach((s) => appendStudentRow(s));
-                    updateFilters();
-                    updateTotals();
-                    alert("Upload successful");
+                if (res.ok && data && data.success) {
+                    const job = await waitForJob(data.status_url, (j) => {
+                        uploadBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Importing ${Math.round((j.progress || 0) * 100)}%`;
+                    });
+                    if (job.status !== "succeeded") {
+                        alert(job.message || "Import failed, check server logs.");
+                        return;
+                    }
+                    const report = job.result || {};
+                    const skipped = (report.errors || []).slice(0, 10).map((e) => `Row ${e.row}: ${e.message}`).join("\n");
+                    alert(`Imported ${report.imported} of ${report.processed} students.` +
+                        (report.failed ? ` ${report.failed} row(s) were skipped.` : "") +
+                        (skipped ? "\n\n" + skipped : ""));
+                    if (report.imported && table) table.reload({ facets: true });
                 } else {
                     alert((data && data.message) ? data.message : "Upload failed, check server logs.");
                 }
@@ -186,126 +249,40 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
-    /* ------------ Filter & search ------------ */
-    function filterRows() {
-        if (!studentsTbody) return;
-        const q = (searchInput?.value || "").trim().toLowerCase();
-        const fCol = filterCollege?.value || "";
-        const fFac = filterFaculty?.value || "";
-        const fDept = filterDepartment?.value || "";
-
-        Array.from(studentsTbody.querySelectorAll("tr")).forEach((tr) => {
-            const cells = tr.querySelectorAll("td");
-            const studentId = (cells[1]?.textContent || "").toLowerCase();
-            const idx = (cells[2]?.textContent || "").toLowerCase();
-            const name = (cells[3]?.textContent || "").toLowerCase();
-            const email = (cells[4]?.textContent || "").toLowerCase();
-            const college = (cells[5]?.textContent || "").trim();
-            const faculty = (cells[6]?.textContent || "").trim();
-            const department = (cells[7]?.textContent || "").trim();
-
-            const matchesQ = [studentId, idx, name, email].some((s) => s.includes(q));
-            const matchesCol = !fCol || college === fCol;
-            const matchesFac = !fFac || faculty === fFac;
-            const matchesDept = !fDept || department === fDept;
-
-            tr.style.display = matchesQ && matchesCol && matchesFac && matchesDept ? "" : "none";
-        });
-
-        updateTotals();
+    /* ------------ Filter & search (done by the server) ------------ */
+    if (table) {
+        if (searchInput) searchInput.addEventListener("input", debounce(() => table.setQuery(searchInput.value.trim()), 250));
+        if (filterCollege) filterCollege.addEventListener("change", () => table.setFilter("college", filterCollege.value));
+        if (filterFaculty) filterFaculty.addEventListener("change", () => table.setFilter("faculty", filterFaculty.value));
+        if (filterDepartment) filterDepartment.addEventListener("change", () => table.setFilter("department", filterDepartment.value));
     }
 
-    if (searchInput) searchInput.addEventListener("input", debounce(filterRows, 120));
-    if (filterCollege) filterCollege.addEventListener("change", filterRows);
-    if (filterFaculty) filterFaculty.addEventListener("change", filterRows);
-    if (filterDepartment) filterDepartment.addEventListener("change", filterRows);
-
     /* ------------ update filter selects ------------ */
-    function updateFilters() {
-        if (!studentsTbody) return;
-        const cols = new Set(),
-            facs = new Set(),
-            depts = new Set();
-        Array.from(studentsTbody.querySelectorAll("tr")).forEach((tr) => {
-            const cells = tr.querySelectorAll("td");
-            const college = (cells[5]?.textContent || "").trim();
-            const faculty = (cells[6]?.textContent || "").trim();
-            const department = (cells[7]?.textContent || "").trim();
-            if (college) cols.add(college);
-            if (faculty) facs.add(faculty);
-            if (department) depts.add(department);
-        });
-
-        function fill(select, set) {
+    function updateFilters(facets) {
+        function fill(select, values) {
             if (!select) return;
             const cur = select.value || "";
             select.innerHTML = '<option value="">All</option>';
-            Array.from(set)
-                .sort()
-                .forEach((v) => {
-                    const o = document.createElement("option");
-                    o.value = v;
-                    o.textContent = v;
-                    select.appendChild(o);
-                });
+            (values || []).forEach((v) => {
+                const o = document.createElement("option");
+                o.value = v;
+                o.textContent = v;
+                select.appendChild(o);
+            });
             if (cur) select.value = cur;
         }
-        fill(filterCollege, cols);
-        fill(filterFaculty, facs);
-        fill(filterDepartment, depts);
+        fill(filterCollege, facets.college);
+        fill(filterFaculty, facets.faculty);
+        fill(filterDepartment, facets.department);
     }
 
     /* ------------ sorting ------------ */
-    function sortTableByColumn(colIndex, asc = true) {
-        if (!studentsTbody) return;
-        const rows = Array.from(studentsTbody.querySelectorAll("tr")).filter((r) => r.style.display !== "none");
-        rows.sort((a, b) => {
-            const aText = (a.cells[colIndex]?.textContent || "").trim().toLowerCase();
-            const bText = (b.cells[colIndex]?.textContent || "").trim().toLowerCase();
-            return asc ? aText.localeCompare(bText) : bText.localeCompare(aText);
-        });
-        rows.forEach((r) => studentsTbody.appendChild(r));
-    }
-
-    if (sortSelect) {
+    if (sortSelect && table) {
         sortSelect.addEventListener("change", () => {
-            const val = sortSelect.value;
-            if (!val) return;
-            sortTableByColumn(parseInt(val, 10), true);
+            if (sortSelect.value) table.setSort(sortSelect.value, "asc");
         });
     }
 
-    /* ------------ Helper: Add student row to table ------------ */
-    function appendStudentRow(student) {
-        const studentsTbody = document.querySelector('#studentsTable tbody');
-        if (!studentsTbody) return;
-
-        const row = document.createElement('tr');
-        row.dataset.id = student.id;
-
-        row.innerHTML = `
-        <td>
-            <img src="${student.profile_picture || '/static/img/default_profile.png'}"
-                 alt="Profile" class="h-10 w-10 rounded-full object-cover">
-        </td>
-        <td>${student.student_id || ''}</td>
-        <td>${student.index_number || ''}</td>
-        <td>${student.full_name || ''}</td>
-        <td>${student.email || ''}</td>
-        <td>${student.phone || ''}</td> <!-- ✅ phone column -->
-        <td>${student.level || ''}</td> <!-- ✅ level column -->
-        <td>${student.college || ''}</td>
-        <td>${student.faculty || ''}</td>
-        <td>${student.department || ''}</td>
-        <td>
-            <button class="edit-student-btn btn btn-sm btn-warning" data-id="${student.id}">Edit</button>
-            <button class="delete-student-btn btn btn-sm btn-danger" data-id="${student.id}">Delete</button>
-        </td>
-    `;
-
-        studentsTbody.appendChild(row);
-    }
-
     /* ------------ Unified Add/Edit Form Submit (fetch) ------------ */
     if (addForm) {
         addForm.addEventListener("submit", async(e) => {
@@ -333,31 +310,12 @@ document.addEventListener("DOMContentLoaded", () => {
                 }
 
                 if (data.success) {
-                    if (editingId) {
-                        const row = studentsTbody.querySelector(`tr[data-id="${editingId}"]`);
-                        if (row) {
-                            const cells = row.cells;
-                            cells[0].querySelector("img").src = data.student.profile_picture || cells[0].querySelector("img").src;
-                            cells[1].textContent = data.student.student_id || '';
-                            cells[2].textContent = data.student.index_number || '';
-                            cells[3].textContent = data.student.full_name || '';
-                            cells[4].textContent = data.student.email || '';
-                            cells[5].textContent = data.student.phone || '';
-                            cells[6].textContent = data.student.college || '';
-                            cells[7].textContent = data.student.faculty || '';
-                            cells[8].textContent = data.student.department || '';
-                            cells[9].textContent = data.student.level || '';
-                        }
-                    } else {
-                        appendStudentRow(data.student);
-                        updateFilters();
-                    }
+                    // Reload the current view so the row lands on the right page and sort position
+                    await table.reload({ facets: true });
 
                     addForm.reset();
                     delete addForm.dataset.editId;
                     addFormCard.classList.add("hidden");
-                    updateTotals();
-                    setAriaLabels();
                 } else {
                     alert(data.message || "Failed to save student.");
                 }
@@ -385,19 +343,12 @@ document.addEventListener("DOMContentLoaded", () => {
 
             if (editBtn) {
                 const row = editBtn.closest("tr");
-                if (!row) return;
+                const student = table.row(editBtn.dataset.id);
+                if (!row || !student) return;
 
-                const cells = row.cells;
                 addForm.dataset.editId = editBtn.dataset.id;
-                addForm.elements["student_id"].value = cells[1]?.textContent.trim();
-                addForm.elements["index_number"].value = cells[2]?.textContent.trim();
-                addForm.elements["full_name"].value = cells[3]?.textContent.trim();
-                addForm.elements["email"].value = cells[4]?.textContent.trim();
-                addForm.elements["phone"].value = cells[5]?.textContent.trim(); // ✅ phone in edit
-                addForm.elements["college"].value = cells[6]?.textContent.trim();
-                addForm.elements["faculty"].value = cells[7]?.textContent.trim();
-                addForm.elements["department"].value = cells[8]?.textContent.trim();
-                addForm.elements["level"].value = cells[9]?.textContent.trim(); // ✅ phone in edit
+                ["student_id", "index_number", "full_name", "email", "phone", "college", "faculty", "department", "level"]
+                .forEach((field) => { addForm.elements[field].value = student[field] || ""; });
 
                 const img = row.querySelector("img");
                 if (img && profilePreviewImg) {
@@ -421,9 +372,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
                     const data = await res.json().catch(() => null);
                     if (res.ok && data?.success) {
-                        delBtn.closest("tr")?.remove();
-                        updateFilters();
-                        updateTotals();
+                        table.reload({ facets: true });
                     } else {
                         alert(data?.message || "Delete failed");
                     }
@@ -439,9 +388,8 @@ document.addEventListener("DOMContentLoaded", () => {
     if (exportCsvBtn) exportCsvBtn.addEventListener("click", () => { window.location.href = "/export_students?format=csv"; });
     if (exportPdfBtn) exportPdfBtn.addEventListener("click", () => { window.location.href = "/export_students?format=pdf"; });
 
-    // finally sync filters and totals with server-rendered rows
-    updateFilters();
-    updateTotals();
+    // first page, with totals and filter values
+    if (table) table.reload({ facets: true });
 
     // Theme-based table refresh
     function updateTableTheme() {
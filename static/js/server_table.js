@@ -0,0 +1,176 @@
+// server_table.js
+// Fills a table one page at a time from the /api/org/<name> list endpoints.
+// Search, filters and sorting are done by the server; pages are walked with the
+// keyset cursors it returns, so only `pageSize` rows are ever in the DOM.
+
+class ServerTable {
+    constructor({ url, tbody, renderRow, columns = 1, pager = null, pageSize = 25, sort = "", onPage = null }) {
+        this.url = url;
+        this.tbody = tbody;
+        this.renderRow = renderRow;
+        this.columns = columns;
+        this.pager = pager;
+        this.pageSize = pageSize;
+        this.onPage = onPage;
+        this.params = { q: "", sort, dir: "asc" };
+        this.filters = {};
+        this.page = null;
+        this.pageNumber = 1;
+        this.total = null;
+        this.rowsById = new Map();
+        this._request = 0;
+        this._buildPager();
+    }
+
+    _query(extra = {}) {
+        const qs = new URLSearchParams({ limit: this.pageSize });
+        Object.entries({...this.params, ...this.filters, ...extra }).forEach(([k, v]) => {
+            if (v !== undefined && v !== null && v !== "") qs.set(k, v);
+        });
+        return `${this.url}?${qs.toString()}`;
+    }
+
+    async _fetch(extra) {
+        const res = await fetch(this._query(extra), { headers: { "Accept": "application/json" } });
+        const data = await res.json().catch(() => null);
+        if (!res.ok || !data) throw new Error((data && data.error) || `Failed to load ${this.url}`);
+        return data;
+    }
+
+    // Reloads from the first page with a fresh total; `facets` also refreshes the filter values.
+    async reload({ facets = false } = {}) {
+        this.pageNumber = 1;
+        return this._load({ count: 1, facets: facets ? 1 : "" });
+    }
+
+    async next() {
+        if (!this.page || !this.page.next) return;
+        this.pageNumber += 1;
+        return this._load({ after: this.page.next });
+    }
+
+    async prev() {
+        if (!this.page || !this.page.prev) return;
+        this.pageNumber = Math.max(1, this.pageNumber - 1);
+        return this._load({ before: this.page.prev });
+    }
+
+    setQuery(q) {
+        this.params.q = q;
+        return this.reload();
+    }
+
+    setFilter(name, value) {
+        this.filters[name] = value;
+        return this.reload();
+    }
+
+    setSort(sort, dir = "asc") {
+        this.params.sort = sort;
+        this.params.dir = dir;
+        return this.reload();
+    }
+
+    // Clicking a header with data-sort="<column>" sorts by it, clicking again reverses.
+    bindSortHeaders(thead) {
+        if (!thead) return;
+        thead.querySelectorAll("th[data-sort]").forEach((th) => {
+            th.style.cursor = "pointer";
+            th.addEventListener("click", () => {
+                const sort = th.dataset.sort;
+                const dir = this.params.sort === sort && this.params.dir === "asc" ? "desc" : "asc";
+                thead.querySelectorAll("th[data-sort]").forEach((h) => h.removeAttribute("aria-sort"));
+                th.setAttribute("aria-sort", dir === "asc" ? "ascending" : "descending");
+                this.setSort(sort, dir);
+            });
+        });
+    }
+
+    // Walks every page (100 rows at a time) with the current search, filters and sort.
+    async allRows() {
+        const rows = [];
+        let after = "";
+        do {
+            const data = await this._fetch({ after, limit: 100 });
+            rows.push(...data.rows);
+            after = data.next;
+        } while (after);
+        return rows;
+    }
+
+    row(id) {
+        return this.rowsById.get(String(id));
+    }
+
+    async _load(extra) {
+        const request = ++this._request;
+        let data;
+        try {
+            data = await this._fetch(extra);
+        } catch (err) {
+            console.error(err);
+            this._message(err.message);
+            return null;
+        }
+        // A slower, older request must not overwrite a newer one (e.g. fast typing).
+        if (request !== this._request) return null;
+
+        this.page = data;
+        if (typeof data.total === "number") this.total = data.total;
+        this.rowsById.clear();
+        this.tbody.innerHTML = "";
+        if (!data.rows.length) {
+            this._message("No records found");
+        }
+        data.rows.forEach((row) => {
+            this.rowsById.set(String(row.id), row);
+            const tr = this.renderRow(row);
+            tr.dataset.id = row.id;
+            this.tbody.appendChild(tr);
+        });
+        this._updatePager();
+        if (this.onPage) this.onPage(data, this);
+        return data;
+    }
+
+    _message(text) {
+        const tr = document.createElement("tr");
+        const td = document.createElement("td");
+        td.colSpan = this.columns;
+        td.className = "px-4 py-4 text-center text-muted";
+        td.textContent = text;
+        tr.appendChild(td);
+        this.tbody.innerHTML = "";
+        this.tbody.appendChild(tr);
+    }
+
+    _buildPager() {
+        if (!this.pager) return;
+        this.pager.classList.add("flex", "items-center", "justify-between", "gap-3", "mt-4", "text-sm");
+        this.pager.innerHTML = `
+            <span class="pager-info text-muted"></span>
+            <div class="flex gap-2">
+                <button type="button" class="btn-outline text-xs pager-prev" aria-label="Previous page">
+                    <i class="fas fa-chevron-left"></i>
+                </button>
+                <button type="button" class="btn-outline text-xs pager-next" aria-label="Next page">
+                    <i class="fas fa-chevron-right"></i>
+                </button>
+            </div>`;
+        this.pager.querySelector(".pager-prev").addEventListener("click", () => this.prev());
+        this.pager.querySelector(".pager-next").addEventListener("click", () => this.next());
+    }
+
+    _updatePager() {
+        if (!this.pager) return;
+        const count = this.page.rows.length;
+        const first = count ? (this.pageNumber - 1) * this.pageSize + 1 : 0;
+        const last = count ? first + count - 1 : 0;
+        const of = this.total !== null ? ` of ${this.total}` : "";
+        this.pager.querySelector(".pager-info").textContent = `${first}–${last}${of}`;
+        this.pager.querySelector(".pager-prev").disabled = !this.page.prev;
+        this.pager.querySelector(".pager-next").disabled = !this.page.next;
+    }
+}
+
+window.ServerTable = ServerTable;
@@ -0,0 +1,233 @@
+"""
+Streaming bulk student import.
+
+Reads CSV or Excel rolls in fixed-size chunks, validates each chunk with
+vectorised pandas operations and upserts the valid rows with one multi-row
+statement per chunk. Memory use depends on the chunk size, not the file size.
+Bad rows are collected in a per-row error report instead of aborting the import.
+"""
+import re
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+
+REQUIRED_COLUMNS = ['student_id', 'index_number', 'full_name', 'email']
+OPTIONAL_COLUMNS = ['phone', 'level', 'college', 'faculty', 'department']
+COLUMN_ALIASES = {'name': 'full_name', 'student_name': 'full_name', 'index': 'index_number',
+                  'index_no': 'index_number', 'id': 'student_id', 'email_address': 'email'}
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+# The report keeps every count but only the first errors, so a completely wrong
+# file can't produce a response as big as the file itself.
+MAX_REPORTED_ERRORS = 1000
+
+
+def _normalise_header(name):
+    key = re.sub(r'[^a-z0-9]+', '_', str(name).strip().lower()).strip('_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def read_chunks(stream, filename, chunk_size=1000):
+    """Yields DataFrames of at most `chunk_size` rows, all values as stripped strings."""
+    import pandas as pd
+
+    name = filename.lower()
+    if name.endswith('.csv'):
+        reader = pd.read_csv(stream, dtype=str, chunksize=chunk_size, keep_default_na=False,
+                             skipinitialspace=True)
+        for chunk in reader:
+            yield chunk
+    elif name.endswith('.xls'):
+        # Legacy .xls can't be streamed; these files are small by format limits anyway.
+        df = pd.read_excel(stream, dtype=str, keep_default_na=False)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    elif name.endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        # read_only mode streams rows from the sheet XML instead of building the workbook
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buffer = []
+        for row in rows:
+            buffer.append(['' if v is None else str(v) for v in row])
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+        workbook.close()
+    else:
+        raise ValueError("Unsupported file format. Please upload CSV or Excel.")
+
+
+def _split_errors(df, problems):
+    """
+    Splits a chunk on a dict of {message: boolean mask}.
+    Returns the clean rows and one error entry per bad row.
+    """
+    bad = None
+    for mask in problems.values():
+        bad = mask if bad is None else bad | mask
+    if not bad.any():
+        return df, []
+
+    messages = {}
+    for message, mask in problems.items():
+        for row in df.loc[mask, '_row']:
+            messages.setdefault(int(row), []).append(message)
+    errors = [
+        {'row': int(row), 'student_id': student_id, 'message': '; '.join(messages[int(row)])}
+        for row, student_id in zip(df.loc[bad, '_row'], df.loc[bad, 'student_id'])
+    ]
+    return df[~bad], errors
+
+
+def validate_chunk(df, first_row):
+    """
+    Normalises a chunk and splits it into valid rows and errors.
+
+    Returns:
+        tuple: (valid DataFrame with a `_row` column, list of error dicts)
+    """
+    df = df.rename(columns=_normalise_header)
+    df = df.loc[:, ~df.columns.duplicated()]
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    for col in OPTIONAL_COLUMNS:
+        if col not in df.columns:
+            df[col] = ''
+    df = df[REQUIRED_COLUMNS + OPTIONAL_COLUMNS].fillna('').astype(str)
+    df = df.apply(lambda col: col.str.strip())
+    df['email'] = df['email'].str.lower()
+    # Spreadsheet row number: header is row 1
+    df['_row'] = range(first_row, first_row + len(df))
+
+    problems = {}
+    for col in REQUIRED_COLUMNS:
+        problems[f'{col} is required'] = df[col] == ''
+    problems['email is not valid'] = (df['email'] != '') & ~df['email'].str.match(EMAIL_PATTERN)
+    for col in ('student_id', 'index_number', 'email'):
+        problems[f'duplicate {col} in file'] = (df[col] != '') & df.duplicated(col, keep='last')
+
+    return _split_errors(df, problems)
+
+
+def _conflicts(df, organisation_id, db_session, Student):
+    """
+    Finds rows that would clash with students already stored, with one SELECT.
+    A student_id owned by another organisation, or an index number or email
+    already used by a different student, can't be upserted.
+    """
+    existing = db_session.execute(
+        select(Student.student_id, Student.index_number, Student.email, Student.organisation_id).where(or_(
+            Student.student_id.in_(df['student_id'].tolist()),
+            Student.index_number.in_(df['index_number'].tolist()),
+            Student.email.in_(df['email'].tolist()),
+        ))
+    ).all()
+    if not existing:
+        return df, []
+
+    org_by_id = {r.student_id: r.organisation_id for r in existing}
+    owner_by_index = {r.index_number: r.student_id for r in existing}
+    owner_by_email = {r.email: r.student_id for r in existing}
+
+    owner_org = df['student_id'].map(org_by_id)
+    index_owner = df['index_number'].map(owner_by_index)
+    email_owner = df['email'].map(owner_by_email)
+    problems = {
+        'student_id belongs to another organisation': owner_org.notna() & (owner_org != organisation_id),
+        'index_number is used by another student': index_owner.notna() & (index_owner != df['student_id']),
+        'email is used by another student': email_owner.notna() & (email_owner != df['student_id']),
+    }
+
+    return _split_errors(df, problems)
+
+
+def _upsert_statement(db_session, Student, organisation_id):
+    dialect = db_session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+
+    stmt = insert(Student)
+    return stmt.on_conflict_do_update(
+        index_elements=['student_id'],
+        set_={col: stmt.excluded[col] for col in ['index_number', 'full_name', 'email'] + OPTIONAL_COLUMNS},
+        where=Student.organisation_id == organisation_id,
+    )
+
+
+def _write_chunk(valid, organisation_id, db_session, Student, upsert, report, add_errors):
+    rows = [
+        dict({k: (v if v != '' else None) for k, v in row.items()}, organisation_id=organisation_id)
+        for row in valid.drop(columns='_row').to_dict('records')
+    ]
+    statement = upsert if upsert is not None else Student.__table__.insert()
+    try:
+        db_session.execute(statement, rows)
+        db_session.commit()
+        report['imported'] += len(rows)
+    except IntegrityError:
+        # Someone else wrote a clashing row meanwhile: retry this chunk row by row.
+        db_session.rollback()
+        for row, line in zip(rows, valid['_row']):
+            try:
+                with db_session.begin_nested():
+                    db_session.execute(statement, [row])
+                report['imported'] += 1
+            except IntegrityError as e:
+                add_errors([{'row': int(line), 'student_id': row['student_id'],
+                             'message': str(e.orig).splitlines()[0]}])
+        db_session.commit()
+
+
+def import_students(stream, filename, organisation_id, db_session, Student, chunk_size=1000, on_chunk=None):
+    """
+    Imports a student roll into an organisation.
+
+    Args:
+        stream: File-like object with the uploaded CSV/XLSX.
+        filename (str): Original filename, used to pick the reader.
+        organisation_id (int): Organisation the students belong to.
+        db_session: SQLAlchemy session to write with (committed once per chunk).
+        Student: The Student model.
+        chunk_size (int): Rows read, validated and written at a time.
+        on_chunk (callable): Optional, called with the running report after each chunk.
+
+    Returns:
+        dict: counts of processed, imported and failed rows plus the per-row errors.
+    """
+    report = {'processed': 0, 'imported': 0, 'failed': 0, 'errors': []}
+    upsert = _upsert_statement(db_session, Student, organisation_id)
+    next_row = 2
+
+    def add_errors(errors):
+        report['failed'] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(report['errors'])
+        if room > 0:
+            report['errors'].extend(errors[:room])
+
+    for chunk in read_chunks(stream, filename, chunk_size):
+        report['processed'] += len(chunk)
+        valid, errors = validate_chunk(chunk, next_row)
+        next_row += len(chunk)
+        if not valid.empty:
+            valid, conflict_errors = _conflicts(valid, organisation_id, db_session, Student)
+            errors += conflict_errors
+        add_errors(errors)
+        if not valid.empty:
+            _write_chunk(valid, organisation_id, db_session, Student, upsert, report, add_errors)
+        if on_chunk is not None:
+            on_chunk(report)
+
+    return report
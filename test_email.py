@@ -1,20 +1,17 @@
-import os, smtplib
-from email.mime.text import MIMEText
+import os
 from dotenv import load_dotenv
 
-load_dotenv()
+from mail_outbox import SMTPSender
 
-smtp_user = os.getenv("SMTP_USER")
-smtp_pass = os.getenv("SMTP_PASSWORD")
+load_dotenv()
 
-msg = MIMEText("Hello, this is a test email from Locify App.")
-msg['Subject'] = "Test Email"
-msg['From'] = smtp_user
-msg['To'] = smtp_user
+# Uses the same SMTP_* settings as the app. To try it without a real account,
+# run a local stand-in server (python -m aiosmtpd -n -l localhost:1025) and set
+# SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_STARTTLS=false
+sender = SMTPSender.from_env()
+to_address = os.getenv("TEST_EMAIL_TO", sender.sender_address)
 
-# ✅ USE SSL port 465 instead of TLS
-with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-    server.login(smtp_user, smtp_pass)
-    server.send_message(msg)
+sender.send(to_address, "Test Email", "<p>Hello, this is a test email from Locify App.</p>")
+sender.close()
 
 print("✅ Test email sent!")